@@ -0,0 +1,38 @@
+"""Per candidate cost of the allowed names check, linear scan of a list against the case folded index
+
+    python -m benchmarks.bench_allowed_names
+"""
+import time
+
+from english_words import get_english_words_set
+
+from masked_ai.core import vocabulary
+
+CANDIDATES = ("Adam", "Cohen", "NetAct", "alarm", "Hillel", "Java", "Smith", "node")
+
+
+def main() -> None:
+    words = list(get_english_words_set(['web2'], lower=True)) + list(vocabulary.DOMAIN_WORDS)
+
+    start = time.perf_counter()
+    for name in CANDIDATES:
+        any([name.lower() == x.lower() for x in words])
+    before = (time.perf_counter() - start) / len(CANDIDATES)
+
+    start = time.perf_counter()
+    vocabulary.allowed_names()
+    build = time.perf_counter() - start
+
+    rounds = 100000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name in CANDIDATES:
+            vocabulary.is_allowed(name)
+    after = (time.perf_counter() - start) / (rounds * len(CANDIDATES))
+
+    print(f"linear scan: {before * 1e6:12.3f} us per candidate")
+    print(f"index:       {after * 1e6:12.3f} us per candidate (one time build {build * 1e3:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
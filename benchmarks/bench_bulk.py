@@ -0,0 +1,38 @@
+"""Scaling of the bulk masking engine from 1 to N worker processes, on a synthetic corpus
+
+    python -m benchmarks.bench_bulk --documents 400 --size-kb 20 --max-workers 8
+"""
+import argparse
+import os
+import time
+
+from benchmarks.data import telecom_log
+from masked_ai.bulk import mask_corpus
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=400)
+    parser.add_argument("--size-kb", type=float, default=20)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--skip", action="append", default=None, help="NamesMask and NERNamesMASK by default")
+    args = parser.parse_args()
+    args.skip = args.skip or ["NamesMask", "NERNamesMASK"]
+
+    corpus = [telecom_log(int(args.size_kb * 1e3), seed=i) for i in range(args.documents)]
+    size = sum(len(text) for text in corpus) / 1e6
+    print(f"corpus: {args.documents} documents, {size:.1f} MB, skipping {args.skip}")
+    baseline = None
+    workers = 1
+    while workers <= args.max_workers:
+        start = time.perf_counter()
+        for _ in mask_corpus(corpus, skip=args.skip, workers=workers):
+            pass
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:3d} workers: {size / elapsed:8.2f} MB/s, speedup {baseline / elapsed:5.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
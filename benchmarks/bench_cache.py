@@ -0,0 +1,77 @@
+"""Latency of templated prompts with and without the paragraph detection cache
+
+    python -m benchmarks.bench_cache --prompts 500 --skip NERNamesMASK
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import List, Optional
+
+from masked_ai.core.cache import DetectionCache
+from masked_ai.masker import Masker
+
+PARAGRAPHS = (
+    "You are the first line support assistant of Operator Telecom. Escalate anything about billing to billing@operator.com "
+    "and anything about the radio network to noc@operator.com, the on call engineer is John Smith.",
+    "Known core gateways are 10.20.0.1, 10.20.0.2 and 10.20.0.3, the runbooks live on https://wiki.operator.com/runbooks "
+    "and the status page on https://status.operator.com.",
+    "Never share customer account numbers or card numbers such as 4012-8888-8882-1881, never promise refunds, and "
+    "always answer in the language of the customer.",
+    "Previous incidents this week: S1 link resets in Berlin, degraded throughput in Madrid reported by Maria Garcia, "
+    "and a failed upgrade on site 4471 handled by Ahmed Khan.",
+)
+
+TICKETS = (
+    "Customer {n} reports that host 10.30.{a}.{b} is unreachable since this morning.",
+    "Please call back on 555 {n:03d} 4567, the customer says the last bill is wrong.",
+    "Mail from user{n}@example.com about a roaming charge of 12 EUR.",
+    "Alarm 7653 on eNB-{n}, cell {a} degraded.",
+)
+
+
+def templated_prompts(count: int, seed: int = 0) -> List[str]:
+    """The same system paragraphs, followed by a different ticket every time
+    """
+    rnd = random.Random(seed)
+    prompts = []
+    for _ in range(count):
+        ticket = rnd.choice(TICKETS).format(n=rnd.randint(100, 999), a=rnd.randint(0, 254), b=rnd.randint(1, 254))
+        prompts.append("\n\n".join(PARAGRAPHS + (ticket, "Answer in one short paragraph.")))
+    return prompts
+
+
+def run(prompts: List[str], skip: List, cache: Optional[DetectionCache]) -> List[float]:
+    latencies = []
+    for prompt in prompts:
+        start = time.perf_counter()
+        Masker(prompt, skip=skip, cache=cache)
+        latencies.append((time.perf_counter() - start) * 1e3)
+    return latencies
+
+
+def report(name: str, latencies: List[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:12s} p50 {quantiles[49]:8.3f} ms  p95 {quantiles[94]:8.3f} ms  mean {statistics.mean(latencies):8.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=500)
+    parser.add_argument("--cache-size", type=int, default=4096)
+    parser.add_argument("--skip", action="append", default=None, help="NamesMask and NERNamesMASK by default")
+    args = parser.parse_args()
+    args.skip = args.skip or ["NamesMask", "NERNamesMASK"]
+
+    prompts = templated_prompts(args.prompts)
+    print(f"{args.prompts} prompts of {len(prompts[0])} characters, skipping {args.skip}")
+    run(prompts[:5], args.skip, None)  # warm up
+    report("no cache", run(prompts, args.skip, None))
+    cache = DetectionCache(max_size=args.cache_size)
+    report("cache", run(prompts, args.skip, cache))
+    stats = cache.stats()
+    print(f"hit rate {stats.hits / (stats.hits + stats.misses):.1%}, {stats.size} paragraphs cached")
+
+
+if __name__ == "__main__":
+    main()
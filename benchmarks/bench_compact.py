@@ -0,0 +1,53 @@
+"""Memory of the plain and compact placeholder tables, measured with tracemalloc
+
+    python -m benchmarks.bench_compact --size-mb 100
+
+``retained`` is what the `Masker` keeps once done, without the masked text (the same in both
+modes), ``peak`` is the most memory used while masking, with the masked text. Both leave out
+the synthetic log itself. tracemalloc slows allocations down, so the timings are only
+comparable with each other.
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from benchmarks.data import telecom_log
+from masked_ai.core import registry
+from masked_ai.masker import Masker
+
+
+def measure(data: str, compact: bool) -> None:
+    pipeline = registry.pipeline("fast-regex-only")
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    masker = Masker(data, pipeline=pipeline, compact=compact)
+    seconds = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = current - before - sys.getsizeof(masker.masked_data)
+    hits = len(masker.get_offsets())
+    print(
+        f"{'compact' if compact else 'plain':8s} {hits:10d} hits {len(masker.get_lookup()):9d} placeholders  "
+        f"retained {retained / 1e6:9.1f} MB ({retained / max(hits, 1):6.1f} B/hit)  "
+        f"peak {(peak - before) / 1e6:9.1f} MB  {seconds:7.1f} s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=100)
+    args = parser.parse_args()
+
+    data = telecom_log(int(args.size_mb * 1e6))
+    print(f"{len(data) / 1e6:.0f} MB synthetic log, regex masks only")
+    for compact in (False, True):
+        measure(data, compact)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Throughput of masking a log file: read and decoded whole, streamed, or memory mapped as bytes
+
+    python -m benchmarks.bench_files --size-mb 50
+
+``read`` is only reading the file, the closest the masking can get. The file is written once
+and read before timing, so it is in the page cache, the numbers are CPU bound.
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable
+
+from benchmarks.data import telecom_log
+from masked_ai.core import registry
+from masked_ai.files import FileMasker
+from masked_ai.masker import Masker
+from masked_ai.streaming import StreamingMasker
+
+
+def read(path: str, output: str) -> None:
+    with open(path, "rb") as f:
+        while f.read(1 << 20):
+            pass
+
+
+def whole(path: str, output: str) -> None:
+    with open(path, encoding="utf-8") as f:
+        masker = Masker(f.read(), profile="fast-regex-only")
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(masker.masked_data)
+
+
+def streamed(path: str, output: str) -> None:
+    with open(output, "w", encoding="utf-8") as f:
+        for chunk in StreamingMasker(profile="fast-regex-only").mask_file(path):
+            f.write(chunk)
+
+
+def mapped(path: str, output: str) -> None:
+    FileMasker(profile="fast-regex-only").mask_path(path, output)
+
+
+def measure(name: str, run: Callable[[str, str], None], path: str, output: str) -> None:
+    size = os.path.getsize(path)
+    start = time.perf_counter()
+    run(path, output)
+    seconds = time.perf_counter() - start
+    print(f"{name:10s} {seconds:8.2f} s  {size / 1e6 / seconds:8.1f} MB/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=50)
+    args = parser.parse_args()
+
+    # compiled before timing
+    registry.pipeline("fast-regex-only").scanner.bytes_regex
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "syslog")
+        output = os.path.join(directory, "syslog.masked")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(telecom_log(int(args.size_mb * 1e6)))
+        print(f"{os.path.getsize(path) / 1e6:.0f} MB synthetic log, regex masks only")
+        read(path, output)
+        for name, run in (("read", read), ("whole", whole), ("streamed", streamed), ("mapped", mapped)):
+            measure(name, run, path, output)
+
+
+if __name__ == "__main__":
+    main()
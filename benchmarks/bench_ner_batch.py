@@ -0,0 +1,41 @@
+"""Throughput of the NER mask on CPU for different batch sizes, needs `transformers` and `torch`
+
+    python -m benchmarks.bench_ner_batch --documents 64 --batch-sizes 1 4 8 16 32
+"""
+import argparse
+import time
+
+from masked_ai.core.masks import NERNamesMASK
+from masked_ai.core.models import registry
+
+SENTENCES = (
+    "Ticket opened by John Smith after the eNB in Berlin lost its S1 link to Vodafone core.",
+    "Maria Garcia from Nokia confirmed the alarm was cleared at 10:22 on site 4471.",
+    "Please ask Ahmed Khan to check the backup of the node before the upgrade.",
+    "The customer, Telefonica, reported degraded throughput in Madrid since Monday.",
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    texts = [" ".join(SENTENCES[(i + j) % len(SENTENCES)] for j in range(3)) for i in range(args.documents)]
+    registry.preload(device=-1)
+    mask = NERNamesMASK(pipel=registry.get(device=-1))
+    mask.find_many(texts[:2])  # warm up
+
+    start = time.perf_counter()
+    for text in texts:
+        mask.find(text)
+    print(f"one at a time: {args.documents / (time.perf_counter() - start):8.1f} docs/s")
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        mask.find_many(texts, batch_size=batch_size)
+        print(f"batch size {batch_size:3d}: {args.documents / (time.perf_counter() - start):8.1f} docs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Latency of short chat prompts with and without the mask prefilters
+
+    python -m benchmarks.bench_prefilter --prompts 2000 --profile no-ner
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import List
+
+from masked_ai.core import registry
+from masked_ai.core.registry import Pipeline
+from masked_ai.masker import Masker
+
+# most chat prompts have nothing to mask
+QUESTIONS = (
+    "how do i reverse a list in python without copying it?",
+    "Write a haiku about the sea.",
+    "what is the difference between a process and a thread",
+    "Summarise the plot of the last book I told you about in two sentences.",
+    "can you explain big o notation with a simple example?",
+    "Translate 'good morning, how are you' to spanish.",
+    "give me three ideas for a birthday party at home",
+    "Why is the sky blue? keep it short.",
+)
+
+WITH_VALUES = (
+    "my server at 10.0.{a}.{b} stopped answering, what should i check first?",
+    "Draft a reply to support{n}@example.com saying the refund was sent.",
+    "is https://docs.example.com/page{n} a good reference for asyncio?",
+    "call me back on 555 {n:03d} 4567 about the order.",
+)
+
+
+def chat_prompts(count: int, seed: int = 0) -> List[str]:
+    """Short prompts, one in five has a value to mask
+    """
+    rnd = random.Random(seed)
+    prompts = []
+    for _ in range(count):
+        template = rnd.choice(WITH_VALUES) if rnd.random() < 0.2 else rnd.choice(QUESTIONS)
+        prompts.append(template.format(n=rnd.randint(100, 999), a=rnd.randint(0, 254), b=rnd.randint(1, 254)))
+    return prompts
+
+
+def run(prompts: List[str], pipeline: Pipeline) -> List[float]:
+    latencies = []
+    for prompt in prompts:
+        start = time.perf_counter()
+        Masker(prompt, pipeline=pipeline)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def report(name: str, latencies: List[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:12s} p50 {quantiles[49]:8.1f} us  p95 {quantiles[94]:8.1f} us  mean {statistics.mean(latencies):8.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=2000)
+    parser.add_argument("--profile", default="fast-regex-only", help="no-ner to include NamesMask, it needs the NLTK corpora")
+    args = parser.parse_args()
+
+    masks = registry.resolve(args.profile)
+    gated = Pipeline(masks, name=args.profile)
+    ungated = Pipeline(masks, name=args.profile, prefilter=False)
+    prompts = chat_prompts(args.prompts)
+    ruled_out = sum(len(gated.ruled_out(prompt)) for prompt in prompts)
+    print(f"{args.prompts} prompts, {args.profile}, {ruled_out / (len(prompts) * len(masks)):.0%} of the mask runs ruled out")
+    # warm up, the scanners of the mask combinations are compiled on first use
+    run(prompts[:200], gated)
+    run(prompts[:200], ungated)
+    report("all masks", run(prompts, ungated))
+    report("prefilter", run(prompts, gated))
+
+
+if __name__ == "__main__":
+    main()
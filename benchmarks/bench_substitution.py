@@ -0,0 +1,51 @@
+"""Building the masked data with one join against the ``str.replace`` per hit loop
+
+    python -m benchmarks.bench_substitution --size-kb 200
+"""
+import argparse
+import time
+
+from benchmarks.bench_scanner import REGEX_MASKS
+from benchmarks.data import telecom_log
+from masked_ai.core.scanner import Scanner
+from masked_ai.core.substitution import settle_overlaps, substitute, unmask
+
+
+def replace_loop(data: str, found: dict) -> str:
+    masked = data
+    lookup = {}
+    for name, items in found.items():
+        for i, item in enumerate(items):
+            lookup_name = f"<{name}_{i+1}>"
+            lookup[lookup_name] = item
+            masked = masked.replace(item, lookup_name)
+    for k, v in lookup.items():
+        masked = masked.replace(k, v)
+    return masked
+
+
+def single_join(data: str, spans: list) -> str:
+    masked, lookup, _ = substitute(data, settle_overlaps([spans]))
+    return unmask(masked, lookup)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-kb", type=float, default=200)
+    args = parser.parse_args()
+
+    data = telecom_log(int(args.size_kb * 1e3))
+    scanner = Scanner(REGEX_MASKS)
+    spans = list(scanner.scan(data))
+    found = scanner.find_all(data)
+    print(f"payload: {len(data) / 1e3:.0f} KB, {len(spans)} hits")
+    start = time.perf_counter()
+    replace_loop(data, found)
+    print(f"replace loop: {(time.perf_counter() - start) * 1e3:10.1f} ms")
+    start = time.perf_counter()
+    single_join(data, spans)
+    print(f"single join:  {(time.perf_counter() - start) * 1e3:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
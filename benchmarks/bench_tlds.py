@@ -0,0 +1,69 @@
+"""LinkMask with the trie compiled top level domains against the longest first alternation it replaced
+
+    python -m benchmarks.bench_tlds --size-kb 100 --extra-tlds 1500
+    python -m benchmarks.bench_tlds --public-suffix-list public_suffix_list.dat
+
+The adversarial dataset (long dotted strings with no valid domain) used to backtrack
+quadratically, the trie pattern only tries a dotted string from its first character.
+"""
+import argparse
+import random
+import re
+import string
+import time
+from typing import List
+
+from benchmarks.data import adversarial, telecom_log, tickets
+from masked_ai.core.tlds import TLDS, link_pattern, read_public_suffix_list
+
+_OLD_START = r"(?:https?://|www\d{0,3}[.])?"
+_PATH = r"""(?:/[^\s()<>]+[^\s`!()\[\]{};:\'".,<>?\xab\xbb“”‘’])?"""
+
+
+def alternation_pattern(tlds: List[str]) -> str:
+    """The previous LinkMask pattern, every domain tried in turn, longest first
+    """
+    ordered = sorted(tlds, key=lambda tld: (-len(tld), tld))
+    return rf"({_OLD_START}[a-z0-9.\-]+[.](?:{'|'.join(f'(?:{re.escape(tld)})' for tld in ordered)}){_PATH})"
+
+
+def best_ms(regex: "re.Pattern[str]", data: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in regex.finditer(data):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-kb", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--extra-tlds", type=int, default=1500, help="Random domains added for the large list")
+    parser.add_argument("--public-suffix-list", default=None, help="Use the domains of this file as the large list")
+    args = parser.parse_args()
+
+    if args.public_suffix_list:
+        large = read_public_suffix_list(args.public_suffix_list)
+    else:
+        rnd = random.Random(0)
+        large = list(TLDS) + ["".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(4, 12))) for _ in range(args.extra_tlds)]
+    size = int(args.size_kb * 1e3)
+    datasets = {"logs": telecom_log(size), "tickets": tickets(size), "adversarial": adversarial(size)}
+    for name, tlds in (("default", list(TLDS)), ("large", large)):
+        patterns = {
+            "alternation": re.compile(alternation_pattern(tlds), re.IGNORECASE),
+            "trie": re.compile(link_pattern(tlds), re.IGNORECASE),
+        }
+        for dataset, data in datasets.items():
+            timings = {kind: best_ms(regex, data, args.repeat) for kind, regex in patterns.items()}
+            print(
+                f"{name:8s} {len(tlds):5d} tlds  {dataset:12s} alternation {timings['alternation']:10.2f} ms  "
+                f"trie {timings['trie']:8.2f} ms  speedup {timings['alternation'] / timings['trie']:8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
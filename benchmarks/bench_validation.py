@@ -0,0 +1,70 @@
+"""IPMask and CreditCardMask with and without their validation, time and hits, each on its own
+
+    python -m benchmarks.bench_validation --size-kb 100
+
+The near misses (octets above 255, 13 to 19 digit ids failing the Luhn checksum) are what the
+validation rejects, it runs once per hit so its cost follows the number of candidates.
+"""
+import argparse
+import random
+import time
+from typing import Any, Callable, List
+
+from benchmarks.data import telecom_log, tickets
+from masked_ai.core.masks import CreditCardMask, IPMask
+
+
+def near_misses(size: int, seed: int = 0) -> str:
+    """Numbers shaped like IP addresses and card numbers, about half of them valid
+    """
+    rnd = random.Random(seed)
+    makers: List[Callable[[], str]] = [
+        lambda: ".".join(str(rnd.randint(0, 999)) for _ in range(4)),
+        lambda: f"{rnd.randint(1, 223)}.{rnd.randint(0, 255)}.0.0/{rnd.randint(8, 32)}",
+        lambda: f"2001:db8::{rnd.randint(0, 0xffff):x}",
+        lambda: "".join(str(rnd.randint(0, 9)) for _ in range(rnd.randint(13, 19))),
+        lambda: "4012-8888-8888-1881",
+    ]
+    parts: List[str] = []
+    length = 0
+    while length < size:
+        part = f"event {rnd.randint(100, 999)} value {rnd.choice(makers)()} done\n"
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:size]
+
+
+def best_ms(mask: Any, data: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        mask.find_spans(data)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-kb", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    size = int(args.size_kb * 1e3)
+    datasets = {"logs": telecom_log(size), "tickets": tickets(size), "near misses": near_misses(size)}
+    masks: List[Any] = [IPMask, CreditCardMask]
+    for mask in masks:
+        for dataset, data in datasets.items():
+            results = []
+            for validate in (False, True):
+                mask.validate = validate
+                results.append((best_ms(mask, data, args.repeat), len(mask.find_spans(data))))
+            mask.validate = False
+            (off_ms, off_hits), (on_ms, on_hits) = results
+            print(
+                f"{mask.__name__:15s} {dataset:12s} off {off_ms:8.2f} ms {off_hits:6d} hits  "
+                f"on {on_ms:8.2f} ms {on_hits:6d} hits  overhead {(on_ms / off_ms - 1) * 100:6.1f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Synthetic, reproducible inputs for the benchmarks: logs, emails, support tickets and adversarial text
+"""
+import random
+from typing import Callable, Dict
+
+LOG_LINES = (
+    "2023-04-11T10:22:{s:02d}Z eNB-{n} ALARM 7653 cell {n} degraded, peer {ip} unreachable",
+    "2023-04-11T10:23:{s:02d}Z NetAct CM upload from {ip} to https://oss{n}.operator.net/cm/upload ok",
+    "2023-04-11T10:24:{s:02d}Z ticket updated by noc{n}@operator.com , callback 555 {n:03d} 4567 ",
+    "2023-04-11T10:25:{s:02d}Z S1 link reset on site {n}, rrc attempts {n} failures 0 rx 1200 tx 1180",
+    "2023-04-11T10:26:{s:02d}Z billing ref 4012-8888-8882-1881 account {n} transport plane normal",
+)
+
+FIRST_NAMES = ("John", "Maria", "Ahmed", "Yuki", "Olga", "Pierre", "Amara", "Lucas")
+LAST_NAMES = ("Smith", "Garcia", "Khan", "Tanaka", "Petrova", "Dubois", "Okafor", "Silva")
+
+EMAIL_SENTENCES = (
+    "Thanks for the quick answer on the outage at site {n}.",
+    "The router at {ip} was rebooted at 10:{s:02d} and is back online.",
+    "You can reach me on 555 {n:03d} 4567 until the end of the day.",
+    "I attached the logs, the full trace is on https://files.operator.com/traces/{n}.",
+    "Please charge the card 4012 8888 8882 1881 for the upgrade.",
+    "Let me know if anything else is needed from our side.",
+)
+
+TICKET_FIELDS = (
+    "Summary: {kind} on eNB-{n} since 10:{s:02d}",
+    "Reporter: {first} {last} <{first_lower}.{last_lower}@operator.com>",
+    "Affected hosts: {ip}, 10.{a}.{b}.1",
+    "Serial: 555 {n:03d} 4567",
+    "Description: customer {first} {last} says the link to {ip} drops every {a} minutes, see https://status.operator.com/incident/{n}",
+)
+
+TICKET_KINDS = ("packet loss", "S1 link reset", "alarm 7653", "degraded throughput", "failed upgrade")
+
+
+def _fields(rnd: random.Random) -> Dict[str, object]:
+    first = rnd.choice(FIRST_NAMES)
+    last = rnd.choice(LAST_NAMES)
+    return {
+        "s": rnd.randint(0, 59),
+        "n": rnd.randint(100, 999),
+        "a": rnd.randint(0, 254),
+        "b": rnd.randint(0, 254),
+        "ip": ".".join(str(rnd.randint(1, 254)) for _ in range(4)),
+        "first": first,
+        "last": last,
+        "first_lower": first.lower(),
+        "last_lower": last.lower(),
+        "kind": rnd.choice(TICKET_KINDS),
+    }
+
+
+def telecom_log(size: int, seed: int = 0) -> str:
+    """Generate about ``size`` characters of telecom style log lines
+    """
+    rnd = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        ip = ".".join(str(rnd.randint(1, 254)) for _ in range(4))
+        line = rnd.choice(LOG_LINES).format(s=rnd.randint(0, 59), n=rnd.randint(100, 999), ip=ip)
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def emails(size: int, seed: int = 0) -> str:
+    """Generate about ``size`` characters of an email thread
+    """
+    rnd = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size:
+        fields = _fields(rnd)
+        body = " ".join(rnd.choice(EMAIL_SENTENCES).format(**fields) for _ in range(rnd.randint(2, 5)))
+        part = "From: {first} {last} <{first_lower}.{last_lower}@operator.com>\nHi team,\n".format(**fields) + body + "\n\nRegards, {first}\n".format(**fields)
+        parts.append(part)
+        total += len(part) + 1
+    return "\n".join(parts)
+
+
+def tickets(size: int, seed: int = 0) -> str:
+    """Generate about ``size`` characters of support tickets
+    """
+    rnd = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size:
+        fields = _fields(rnd)
+        part = "\n".join(field.format(**fields) for field in TICKET_FIELDS) + "\n"
+        parts.append(part)
+        total += len(part) + 1
+    return "\n".join(parts)
+
+
+def adversarial(size: int, seed: int = 0) -> str:
+    """Generate about ``size`` characters of near misses: long dotted strings, digit runs and broken addresses
+    """
+    rnd = random.Random(seed)
+    patterns = (
+        lambda: ".".join("a" * rnd.randint(1, 3) for _ in range(rnd.randint(20, 200))),
+        lambda: "".join(rnd.choice("0123456789 -") for _ in range(rnd.randint(50, 500))),
+        lambda: "@".join("x." * rnd.randint(5, 50) for _ in range(3)),
+        lambda: ".".join(str(rnd.randint(0, 999)) for _ in range(rnd.randint(5, 100))),
+        lambda: "http://" + "-" * rnd.randint(50, 500),
+    )
+    parts = []
+    total = 0
+    while total < size:
+        part = rnd.choice(patterns)()
+        parts.append(part)
+        total += len(part) + 1
+    return " ".join(parts)
+
+
+GENERATORS: Dict[str, Callable[[int, int], str]] = {
+    "logs": telecom_log,
+    "emails": emails,
+    "tickets": tickets,
+    "adversarial": adversarial,
+}
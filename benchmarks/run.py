@@ -0,0 +1,122 @@
+"""Regression harness: per mask and end to end `Masker` throughput and latency on every dataset of `benchmarks.data`
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline results.json --threshold 1.25
+
+Results are written as JSON, so runs can be compared. With ``--baseline``, the run fails (exit
+status 1) if any case got slower than ``threshold`` times its baseline median. Compare runs made
+on the same machine, nothing is downloaded so it runs offline once the models are cached.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.data import GENERATORS
+from masked_ai.core import registry
+from masked_ai.masker import Masker
+
+Results = Dict[str, Dict[str, float]]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest rank percentile, ``q`` between 0 and 100
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def measure(func: Callable[[], Any], size: int, repeat: int) -> Dict[str, float]:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1e3)
+    p50 = percentile(latencies, 50)
+    return {
+        "size": size,
+        "p50_ms": p50,
+        "p95_ms": percentile(latencies, 95),
+        "mb_s": size / 1e3 / p50 if p50 else float("inf"),
+    }
+
+
+def cases(data: str, skip: List) -> Dict[str, Callable[[], Any]]:
+    """Every mask on its own, and the whole `Masker`
+    """
+    result: Dict[str, Callable[[], Any]] = {}
+    pipeline = registry.pipeline(skip=skip)
+    for mask in pipeline.masks:
+        runner = pipeline.runners.get(mask.__name__, mask)
+        result[mask.__name__] = lambda runner=runner: runner.find_spans(data)  # type: ignore[misc]
+    result["Masker"] = lambda: Masker(data, pipeline=pipeline)
+    return result
+
+
+def run(datasets: List[str], sizes: List[int], skip: List, repeat: int) -> Results:
+    results: Results = {}
+    for dataset in datasets:
+        for size in sizes:
+            data = GENERATORS[dataset](size, 0)
+            for name, func in cases(data, skip).items():
+                func()  # warm up, models and vocabularies are loaded here
+                case = f"{dataset}/{size}/{name}"
+                results[case] = measure(func, len(data), repeat)
+                print(f"{case:40s} p50 {results[case]['p50_ms']:10.3f} ms  p95 {results[case]['p95_ms']:10.3f} ms  {results[case]['mb_s']:8.2f} MB/s")
+    return results
+
+
+def compare(results: Results, baseline: Results, threshold: float, min_ms: float = 0.5) -> List[str]:
+    """
+    :param min_ms: Slowdowns smaller than this are noise, whatever the ratio
+
+    :return: A line per case slower than ``threshold`` times its baseline
+    """
+    regressions = []
+    for case, result in results.items():
+        before = baseline.get(case)
+        if before is None:
+            continue
+        ratio = result["p50_ms"] / before["p50_ms"] if before["p50_ms"] else float("inf")
+        if ratio > threshold and result["p50_ms"] - before["p50_ms"] > min_ms:
+            regressions.append(f"{case}: {before['p50_ms']:.3f} ms -> {result['p50_ms']:.3f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cado Security Masked-AI, benchmarks")
+    parser.add_argument("--datasets", nargs="+", default=sorted(GENERATORS), choices=sorted(GENERATORS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Characters per document")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip", action="append", default=None, help="NamesMask and NERNamesMASK by default")
+    parser.add_argument("--output", action="store", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", action="store", default=None, help="Results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Fail if a case is slower than this times the baseline")
+    parser.add_argument("--min-ms", dest="min_ms", type=float, default=0.5, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+    args.skip = args.skip or ["NamesMask", "NERNamesMASK"]
+
+    results = run(args.datasets, args.sizes, args.skip, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {"python": platform.python_version(), "platform": platform.platform(), "skip": args.skip, "time": time.time()},
+                "results": results,
+            }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"no regression above {args.threshold}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
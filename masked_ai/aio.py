@@ -0,0 +1,130 @@
+"""Asyncio interface, masking runs on a bounded executor so the event loop is never blocked
+
+    async_masker = AsyncMasker(max_workers=4)
+    masker = await async_masker.mask("My name is Adam and my IP address is 8.8.8.8")
+    output = await run_command(masker, ["curl", "...", "-d", '{"prompt": "{prompt_placeholder}"}'])
+"""
+import argparse
+import asyncio
+import functools
+import subprocess
+import sys
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, List, Optional, TypeVar
+
+from masked_ai.core import registry
+from masked_ai.masker import Masker
+
+if TYPE_CHECKING:
+    import torch
+
+T = TypeVar("T")
+
+PROMPT_PLACEHOLDER = "{prompt_placeholder}"
+
+
+class AsyncMasker:
+    """Creates `Masker` instances without blocking the event loop
+    """
+    def __init__(
+        self,
+        skip: Optional[List] = None,
+        debug: bool = False,
+        pipel: Optional["torch.nn.Module"] = None,
+        max_workers: int = 4,
+        max_pending: int = 256,
+        executor: Optional[Executor] = None,
+        profile: str = registry.DEFAULT_PROFILE,
+    ) -> None:
+        """
+        :param max_workers: Size of the thread pool running the masks, if no ``executor`` is given
+        :param max_pending: Most masking requests queued or running at once, others wait their turn
+        :param profile: Which masks to run, see `masked_ai.core.registry`
+        """
+        self.skip = skip
+        self.debug = debug
+        self.pipel = pipel
+        self.pipeline = registry.pipeline(profile, skip=skip, pipel=pipel)
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="masked-ai")
+        self._max_pending = max_pending
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def mask(self, data: str) -> Masker:
+        return await self._run(functools.partial(Masker, data, debug=self.debug, pipeline=self.pipeline))
+
+    async def mask_many(self, texts: List[str], batch_size: int = 8) -> List[Masker]:
+        """`Masker.mask_many` on the executor, the NER model runs over all the texts in batches
+        """
+        return await self._run(functools.partial(
+            Masker.mask_many, texts, debug=self.debug, batch_size=batch_size, pipeline=self.pipeline,
+        ))
+
+    async def close(self) -> None:
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncMasker":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    async def _run(self, func: Callable[[], T]) -> T:
+        if self._semaphore is None:
+            # created lazily, it must belong to the running loop
+            self._semaphore = asyncio.Semaphore(self._max_pending)
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func)
+
+
+async def run_command(masker: Masker, command: List[str], placeholder: str = PROMPT_PLACEHOLDER) -> str:
+    """Run ``command`` with ``placeholder`` replaced by the masked data, and unmask its output
+
+    The command is executed directly, without a shell, so its arguments need no quoting.
+
+    :raises subprocess.CalledProcessError: If the command fails
+    """
+    args = [arg.replace(placeholder, masker.masked_data) for arg in command]
+    process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+    output_bytes, _ = await process.communicate()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args, output_bytes)
+    return masker.unmask_data(output_bytes.decode("utf-8").strip())
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with AsyncMasker(profile=args.profile) as async_masker:
+        masker = await async_masker.mask(args.prompt)
+    command = [args.command] + args.args
+
+    if args.debug:
+        print("************ DEBUG MODE ************")
+        print(" - Before masking: ", args.prompt)
+        print(" - After masking: ", masker.masked_data)
+        print(" - Lookup: ", masker.get_lookup())
+        print(" - COMMAND: ", command)
+
+    unmasked = await run_command(masker, command)
+
+    if args.debug:
+        print(" - Unmask output: ", unmasked)
+        print("************************************")
+    else:
+        sys.stdout.write(unmasked)
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cado Security Masked-AI, asyncio runner")
+    parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    parser.add_argument("--prompt", action="store", dest="prompt", help="The prompt to mask", default=None)
+    parser.add_argument("--profile", action="store", default=registry.DEFAULT_PROFILE, help=f"Masks to run, one of {', '.join(registry.profiles())}")
+    parser.add_argument("command", help="The command to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="The arguments for the command, make sure to unclde {prompt_placeholder} somewhere, this will be replaced with the masked prompt")
+    args = parser.parse_args()
+
+    if not args.prompt:
+        raise SystemExit("--prompt must be provided. Make sure to add it before the command")
+
+    asyncio.run(main(args))
@@ -0,0 +1,124 @@
+"""Mask many documents in parallel, one `Masker` per document, on a pool of worker processes
+
+    for result in mask_corpus(texts, workers=8):
+        print(result.masked_data, result.lookup)
+
+    python -m masked_ai.bulk --workers 8 --output-dir masked/ logs/*.txt
+    python -m masked_ai.bulk --workers 8 --jsonl masked.jsonl logs/*.txt
+
+Every worker loads the vocabulary, the NLTK corpora and the NER model once, when it starts.
+Results come back in the same order as the input.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Mapping, NamedTuple, Optional
+
+from masked_ai.core import registry
+from masked_ai.core.registry import Pipeline
+from masked_ai.masker import Masker
+
+
+class MaskResult(NamedTuple):
+    masked_data: str
+    lookup: Mapping[str, str]
+
+
+_pipeline: Optional[Pipeline] = None
+
+
+def _init_worker(skip: Optional[List], profile: str) -> None:
+    """Compile the masks and load everything they need once per worker, not once per document
+    """
+    global _pipeline
+    _pipeline = registry.pipeline(profile, skip=skip)
+    _pipeline.warm_up()
+
+
+def _mask(text: str) -> MaskResult:
+    masker = Masker(text, pipeline=_pipeline)
+    return MaskResult(masker.masked_data, masker.get_lookup())
+
+
+def _mask_path(path: str) -> MaskResult:
+    # read by the worker, so the parent never holds the whole corpus
+    with open(path, encoding="utf-8") as f:
+        return _mask(f.read())
+
+
+def mask_corpus(
+    texts: Iterable[str],
+    skip: Optional[List] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 4,
+    profile: str = registry.DEFAULT_PROFILE,
+) -> Iterator[MaskResult]:
+    """Mask every text of ``texts`` on ``workers`` processes (one per core by default)
+
+    :param profile: Which masks to run, see `masked_ai.core.registry`
+
+    :return: The results, in the same order as ``texts``
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(skip, profile)) as executor:
+        yield from executor.map(_mask, texts, chunksize=chunksize)
+
+
+def _output_names(paths: List[str], output_dir: str) -> List[str]:
+    """Where the masked ``paths`` are written, at the same place relative to the directory they all
+    are in, so files with the same name in different directories never overwrite each other
+    """
+    if not paths:
+        return []
+    paths = [os.path.abspath(path) for path in paths]
+    common = os.path.commonpath([os.path.dirname(path) for path in paths])
+    return [os.path.join(output_dir, os.path.relpath(path, common)) for path in paths]
+
+
+def mask_files(
+    paths: List[str],
+    output_dir: Optional[str] = None,
+    jsonl: Optional[str] = None,
+    skip: Optional[List] = None,
+    workers: Optional[int] = None,
+    profile: str = registry.DEFAULT_PROFILE,
+) -> None:
+    """Mask files, writing ``<name>`` and ``<name>.lookup.json`` to ``output_dir`` and/or one line per file to ``jsonl``
+
+    Files from different directories keep their path relative to the directory they share, i.e.
+    ``a/x.log`` and ``b/x.log`` are written to ``<output_dir>/a/x.log`` and ``<output_dir>/b/x.log``.
+    """
+    if output_dir is None and jsonl is None:
+        raise ValueError("Either output_dir or jsonl must be given")
+    names = _output_names(paths, output_dir) if output_dir is not None else [None] * len(paths)
+    jsonl_file = open(jsonl, "w", encoding="utf-8") if jsonl is not None else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(skip, profile)) as executor:
+            for path, name, result in zip(paths, names, executor.map(_mask_path, paths)):
+                if name is not None:
+                    os.makedirs(os.path.dirname(name), exist_ok=True)
+                    with open(name, "w", encoding="utf-8") as f:
+                        f.write(result.masked_data)
+                    with open(f"{name}.lookup.json", "w", encoding="utf-8") as f:
+                        json.dump(result.lookup, f)
+                if jsonl_file is not None:
+                    jsonl_file.write(json.dumps({"path": path, "masked": result.masked_data, "lookup": result.lookup}) + "\n")
+    finally:
+        if jsonl_file is not None:
+            jsonl_file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cado Security Masked-AI, bulk masking")
+    parser.add_argument("--workers", action="store", type=int, default=None, help="Number of worker processes, one per core by default")
+    parser.add_argument("--output-dir", action="store", dest="output_dir", default=None, help="Write the masked files and their lookup tables here")
+    parser.add_argument("--jsonl", action="store", default=None, help="Write one JSON line per file here")
+    parser.add_argument("--skip", action="append", default=None, help="Mask to skip, can be given more than once")
+    parser.add_argument("--profile", action="store", default=registry.DEFAULT_PROFILE, help=f"Masks to run, one of {', '.join(registry.profiles())}")
+    parser.add_argument("paths", nargs="+", help="Files to mask")
+    args = parser.parse_args()
+
+    if not args.output_dir and not args.jsonl:
+        raise SystemExit("--output-dir or --jsonl must be provided")
+
+    mask_files(args.paths, output_dir=args.output_dir, jsonl=args.jsonl, skip=args.skip, workers=args.workers, profile=args.profile)
@@ -0,0 +1,113 @@
+"""What the masks know about a document, every analysis is computed once, and only when a mask uses it
+
+    analysis = Analysis(data)
+    analysis.tokens, analysis.offsets   # NLTK word tokens, and their (start, end) in ``data``
+    analysis.pos_tags                   # [(token, tag)]
+    analysis.chunks                     # NLTK named entity tree
+    analysis.get(key, compute)          # anything else, i.e. the NER model output
+
+`Masker` builds one per document and hands it to every mask that is not a regex mask. Masks list
+the analyses they use in ``needs``, so a pipeline only loads the resources these need.
+"""
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+from masked_ai.core import chunking, resources
+
+if TYPE_CHECKING:
+    from masked_ai.core.masks import Span
+
+T = TypeVar("T")
+
+TOKENS = "tokens"
+POS_TAGS = "pos_tags"
+CHUNKS = "chunks"
+NER = "ner"
+
+# the analyses done with NLTK
+NLTK_ANALYSES = frozenset((TOKENS, POS_TAGS, CHUNKS))
+
+
+def align_tokens(tokens: List[str], data: str) -> List[Optional[Tuple[int, int]]]:
+    """Offsets of ``tokens`` in ``data``, in a single left to right pass
+
+    ``word_tokenize`` turns double quotes into ``` `` ``` and ``''``, these are matched back to
+    the original quotes. Tokens that can't be found are None.
+    """
+    offsets: List[Optional[Tuple[int, int]]] = []
+    position = 0
+    for token in tokens:
+        candidates = [token, '"'] if token in ('``', "''") else [token]
+        best = None
+        for candidate in candidates:
+            start = data.find(candidate, position)
+            if start != -1 and (best is None or start < best[0]):
+                best = (start, start + len(candidate))
+        offsets.append(best)
+        if best is not None:
+            position = best[1]
+    return offsets
+
+
+class Analysis:
+    """Lazily computed analyses of ``data``, shared by the masks running over it
+    """
+    def __init__(self, data: str) -> None:
+        self.data = data
+        self._results: Dict[Hashable, Any] = {}
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        return resources.nltk().tokenize.word_tokenize(self.data)
+
+    @cached_property
+    def offsets(self) -> List[Optional[Tuple[int, int]]]:
+        return align_tokens(self.tokens, self.data)
+
+    @cached_property
+    def pos_tags(self) -> List[Tuple[str, str]]:
+        return resources.nltk().pos_tag(self.tokens)
+
+    @cached_property
+    def chunks(self) -> Any:
+        return resources.nltk().ne_chunk(self.pos_tags, binary=False)
+
+    def get(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """``compute()``, called the first time ``key`` is asked for
+        """
+        if key not in self._results:
+            self._results[key] = compute()
+        return self._results[key]
+
+    def windows(
+        self,
+        size: int,
+        overlap: int = 0,
+        count_tokens: Optional[Callable[[str], int]] = None,
+        max_tokens: int = 0,
+    ) -> List[Tuple[chunking.Window, "Analysis"]]:
+        """The analyses of the windows of ``data``, see `chunking.token_windows`. A window covering all
+        of ``data`` shares this analysis
+        """
+        return self.get(
+            ("windows", size, overlap, count_tokens, max_tokens),
+            lambda: [
+                (window, self if len(window.text) == len(self.data) else Analysis(window.text))
+                for window in chunking.token_windows(self.data, size, overlap, count_tokens, max_tokens)
+            ],
+        )
+
+    def windowed_spans(
+        self,
+        find_spans: Callable[["Analysis"], Iterable["Span"]],
+        size: int,
+        overlap: int = 0,
+        count_tokens: Optional[Callable[[str], int]] = None,
+        max_tokens: int = 0,
+    ) -> List["Span"]:
+        """Run ``find_spans`` on the analysis of every window, the spans are shifted back to ``data`` offsets and merged
+        """
+        return sorted(chunking.merge(
+            chunking.shift(find_spans(analysis), window.start)
+            for window, analysis in self.windows(size, overlap, count_tokens, max_tokens)
+        ))
@@ -0,0 +1,84 @@
+"""Detection results per paragraph, keyed by a hash of its content
+
+Templated prompts repeat most of their paragraphs verbatim, only the paragraphs that changed
+since they were last seen go through the masks again.
+
+    cache = DetectionCache(max_size=4096)
+    masker = Masker(prompt, cache=cache)
+
+The spans are stored relative to the paragraph, so a paragraph is found again wherever it moves
+in the document. Call `DetectionCache.clear` after changing what the masks find (i.e. `add_vocabulary`).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, NamedTuple, Optional, Tuple
+
+from masked_ai.core.masks import Span
+
+Key = Tuple[Hashable, bytes]
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+
+class DetectionCache:
+    """Bounded LRU of the spans found in a paragraph, thread safe
+    """
+    def __init__(self, max_size: int = 4096) -> None:
+        """
+        :param max_size: Most paragraphs kept
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self._entries: "OrderedDict[Key, Tuple[Span, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def key(config: Hashable, segment: str) -> Key:
+        """
+        :param config: What else changes the spans found, i.e. the skipped masks
+        """
+        return config, hashlib.blake2b(segment.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+
+    def get(self, key: Key) -> Optional[Tuple[Span, ...]]:
+        with self._lock:
+            spans = self._entries.get(key)
+            if spans is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return spans
+
+    def put(self, key: Key, spans: Iterable[Span]) -> Tuple[Span, ...]:
+        """
+        :return: The spans, as stored
+        """
+        stored = tuple(spans)
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return stored
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
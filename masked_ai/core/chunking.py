@@ -0,0 +1,114 @@
+"""Split long documents into overlapping windows for the masks that can't take them whole (NLTK, NER)
+
+Windows end on a sentence boundary if possible, or else on whitespace, and the next window starts
+``overlap`` characters before the previous one ended, so an entity cut by one window edge is
+found whole in the next window.
+"""
+import re
+from typing import TYPE_CHECKING, Callable, Iterable, List, NamedTuple, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from masked_ai.core.masks import Span
+
+T = TypeVar("T")
+
+_SENTENCE_END_RE = re.compile(r"[.!?]\s|\n")
+_WHITESPACE_RE = re.compile(r"\s")
+_PARAGRAPH_END_RE = re.compile(r"\n[ \t]*\n\s*")
+
+
+class Window(NamedTuple):
+    """``text`` is ``data[start:start + len(text)]``
+    """
+    start: int
+    text: str
+
+
+def _boundary(data: str, start: int, end: int) -> int:
+    """Best place to end a window within ``data[start:end]``, preferring sentence ends in its second half
+    """
+    low = start + (end - start) // 2
+    for regex in (_SENTENCE_END_RE, _WHITESPACE_RE):
+        last = None
+        for last in regex.finditer(data, low, end):
+            pass
+        if last is not None:
+            return last.end()
+    return end
+
+
+def windows(data: str, size: int, overlap: int = 0) -> List[Window]:
+    """Split ``data`` into windows of at most ``size`` characters overlapping by about ``overlap`` characters
+    """
+    if size <= 0:
+        raise ValueError("size must be positive")
+    if overlap >= size // 2:
+        raise ValueError("overlap must be smaller than half of size")
+    if len(data) <= size:
+        return [Window(0, data)]
+
+    result = []
+    start = 0
+    while True:
+        if start + size >= len(data):
+            result.append(Window(start, data[start:]))
+            return result
+        end = _boundary(data, start, start + size)
+        result.append(Window(start, data[start:end]))
+        # start the next window on a word boundary, ``overlap`` characters back
+        next_start = end - overlap
+        if overlap:
+            match = _WHITESPACE_RE.search(data, next_start, end)
+            next_start = match.end() if match else end
+        start = max(next_start, start + 1)
+
+
+def token_windows(
+    data: str,
+    size: int,
+    overlap: int = 0,
+    count_tokens: Optional[Callable[[str], int]] = None,
+    max_tokens: int = 0,
+) -> List[Window]:
+    """`windows`, the ones with more than ``max_tokens`` tokens (i.e. dense IPs and ids) are split again
+
+    :param count_tokens: Number of tokens of a text for the model, without its special tokens
+    """
+    if count_tokens is None or max_tokens <= 0:
+        return windows(data, size, overlap)
+    result = []
+    for window in windows(data, size, overlap):
+        tokens = count_tokens(window.text)
+        if tokens <= max_tokens or len(window.text) <= 2:
+            result.append(window)
+            continue
+        # as many characters as fit in ``max_tokens`` at the density of this window
+        smaller = max(2, len(window.text) * max_tokens // tokens)
+        parts = token_windows(window.text, smaller, min(overlap, max(0, smaller // 2 - 1)), count_tokens, max_tokens)
+        result.extend(Window(part.start + window.start, part.text) for part in parts)
+    return result
+
+
+def paragraphs(data: str) -> List[Window]:
+    """Split ``data`` after every blank line, the windows don't overlap and cover all of ``data``
+    """
+    result = []
+    start = 0
+    for match in _PARAGRAPH_END_RE.finditer(data):
+        result.append(Window(start, data[start:match.end()]))
+        start = match.end()
+    if start < len(data) or not result:
+        result.append(Window(start, data[start:]))
+    return result
+
+
+def merge(results: Iterable[Iterable[T]]) -> List[T]:
+    """Merge the per window results, dropping the duplicates found in the overlaps
+    """
+    return list(dict.fromkeys(item for result in results for item in result))
+
+
+def shift(spans: Iterable["Span"], offset: int) -> List["Span"]:
+    """Spans found in a window, moved to the offsets of the whole document
+    """
+    return [span._replace(start=span.start + offset, end=span.end + offset) for span in spans]
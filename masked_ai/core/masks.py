@@ -1,265 +1,22 @@
 """
 """
+import ipaddress
 import re
+import time
 from abc import ABC, abstractmethod
-from typing import Any, List
-
-from english_words import get_english_words_set
-
-import nltk
-
-nltk.download('punkt', quiet=True)
-nltk.download('averaged_perceptron_tagger', quiet=True)
-nltk.download('maxent_ne_chunker', quiet=True)
-nltk.download('words', quiet=True)
-
-__allowed_names__ = list(get_english_words_set(['web2'], lower=True))
-__allowed_names__ += [
-    "NetAct",
-    "cell",
-    "support",
-    "backup",
-    "restore",
-    "case",
-    "Java",
-    "basic",
-    "issue",
-    "Once",
-    "feature",
-    "enabled",
-    "helpful",
-    "failure",
-    "set",
-    "resolved",
-    "button",
-    "monitor",
-    "follow",
-    "up",
-    "PM",
-    "CM",
-    "FM",
-    "need",
-    "node",
-    "startup",
-    "dump",
-    "site",
-    "check",
-    "checked",
-    "serial",
-    "sleep",
-    "silent",
-    "config",
-    "change",
-    "changes",
-    "normal",
-    "operations",
-    "operation",
-    "upgrade",
-    "traffic",
-    "title",
-    "control",
-    "network",
-    "plane",
-    "snapshot",
-    "installation",
-    "unknown",
-    "release",
-    "software",
-    "transport",
-    "alarm",
-    "alarms",
-    "time",
-    "lte",
-    "attempts",
-    "setup",
-    "degraded",
-    "detection",
-    "sleeping",
-    "due",
-    "reset",
-    "recovery",
-    "manual",
-    "manager",
-    "download",
-    "suspect",
-    "clear",
-    "power",
-    "setting",
-    "settings",
-    "confirm",
-    "fix",
-    "correction",
-    "top",
-    "reference",
-    "capture",
-    "debug",
-    "rf",
-    "recovered",
-    "cells",
-    "logs",
-    "log",
-    "seconds",
-    "antennas",
-    "issues",
-    "labs",
-    "details",
-    "monitoring",
-    "behaviour",
-    "timestamp",
-    "wireshark",
-    "attempted",
-    "apears",
-    "info",
-    "delivered",
-    "workaround",
-    "seems",
-    "modulename",
-    "steps",
-    "updates",
-    "jamming",
-    "scheduler",
-    "slices",
-    "stat",
-    "teams",
-    "dedicated",
-    "values",
-    "failures",
-    "email",
-    "errors",
-    "syslog",
-    "snapshots",
-    "modules",
-    "msg",
-    "algo",
-    "networks",
-    "support",
-    "cleared",
-    "ip",
-    "online",
-    "markets",
-    "Reestablishment",
-    "pls",
-    "jan",
-    "feb",
-    "mar",
-    "apr",
-    "may",
-    "jun",
-    "jul",
-    "aug",
-    "sep",
-    "oct",
-    "nov",
-    "dec",
-    "timezone",
-    "managed",
-    "calls",
-    "files",
-    "units",
-    "apears",
-    "sites",
-    "handover",
-    "needed",
-    "Reconfiguration",
-    "blocks",
-    "detected",
-    "Exceeded",
-    "Traafic",
-    "newer",
-    "requested",
-    "answered",
-    "freq",
-    "hours",
-    "traces",
-    "measurements",
-    "rejects",
-    "avg",
-    "waveform",
-    "roots",
-    "groups",
-    "cables",
-    "segments",
-    "intra",
-    "fourier",
-    "earlier",
-    "configurations"
-    "Served",
-    "multi",
-    "ids",
-    "completed",
-    "acustic",
-    "specifications",
-    "expired",
-    "muted",
-    "drops",
-    "proactive",
-    "scheduling",
-    "looks",
-    "findings",
-    "observed",
-    "improvements",
-    "workflow",
-    "enabling",
-    "subnet",
-    "embedded",
-    "regards",
-    "problems",
-    "dependencies",
-    "preambles",
-    "optimized",
-    "mutes",
-    "discarded",
-    "neighbour",
-    "affirmed",
-    "guaranteed",
-    "customized",
-    "stats",
-    "availabilty",
-    "counters",
-    "reached",
-    "ipv4",
-    "ipv6",
-    "levels",
-    "ports",
-    "resources",
-    "cpu",
-    "transmitted",
-    "app",
-    "configuring",
-    "optimizer",
-    "relations",
-    "radios",
-    "packets",
-    "ethernet",
-    "codec",
-    "offline",
-    "standalone",
-    "bandwidth",
-    "rollout",
-    "oriented",
-    "sharing",
-    "thresholds",
-    "firmware",
-    "backed",
-    "shared",
-    "initializing",
-    "outages",
-    "handovers",
-    "requests",
-    "screenshot",
-    "improved",
-    "runtime",
-    "allocation",
-    "channels",
-    "workorder",
-    "delayed",
-    "dropped",
-    "aggregated",
-    "configurations",
-    "jira",
-    "labels",
-    "managing",
-]
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+
+from masked_ai.core import chunking, models, resources, tlds, vocabulary
+from masked_ai.core.analysis import CHUNKS, NER, POS_TAGS, TOKENS, Analysis
+
+
+def __getattr__(name: str) -> Any:
+    # `__allowed_names__` is kept for backward compatibility, it is the case folded index
+    if name == "__allowed_names__":
+        return vocabulary.allowed_names()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __extensions__ =[
     "exe",
     "yml",
@@ -269,9 +26,73 @@ __extensions__ =[
 __punctuation__ = ".,;:'"
 
 
+class Span(NamedTuple):
+    """A positioned hit, ``data[start:end]`` was found by the mask ``label``
+    """
+    start: int
+    end: int
+    label: str
+
+
 class MaskBase(ABC):
-    """Abstract class, how to implement new mask
+    """Abstract class, how to implement new mask, then add it with `masked_ai.core.registry.register`
+
+    Regex based masks should also set ``pattern`` (and ``flags`` if needed), these are merged
+    into a single pattern by :class:`masked_ai.core.scanner.Scanner` so the data is only scanned once.
+
+    Masks telling apart the hits of the same pattern set ``detected_by`` to the mask with the
+    ``pattern``, whose `classify` decides which of them every hit belongs to.
+
+    Masks that can tell cheaply that a document has nothing for them (i.e. no ``@`` for emails)
+    implement `prefilter`, the pipeline doesn't run them on that document at all.
+
+    Masks with class attributes changing what they find (i.e. ``validate``) list them in
+    ``settings``, cached detections are not reused once they change.
     """
+    pattern: Optional[str] = None
+    flags: int = 0
+    detected_by: Optional[Type["MaskBase"]] = None
+    # the `masked_ai.core.analysis` analyses of the document the mask uses, i.e. ``TOKENS``
+    needs: Tuple[str, ...] = ()
+    # names of the class attributes tuning the mask, part of `masked_ai.core.registry.Pipeline.key`
+    settings: Tuple[str, ...] = ()
+
+    @classmethod
+    def regex_based(cls) -> bool:
+        return cls.pattern is not None or cls.detected_by is not None
+
+    @classmethod
+    def prefilter(cls, data: str) -> bool:
+        """Cheap check run before the mask, it must never rule out a document the mask finds something in
+
+        :return: False if the mask can't find anything in ``data``
+        """
+        return True
+
+    @classmethod
+    def accept(cls, data: str, start: int, end: int) -> bool:
+        """Post filter for a single regex hit found at ``data[start:end]``
+
+        :return: True if the hit should be masked
+        """
+        return True
+
+    @classmethod
+    def classify(cls, data: str, start: int, end: int) -> str:
+        """Which mask an accepted hit belongs to, this one or one ``detected_by`` it
+
+        :return: The mask name
+        """
+        return cls.__name__
+
+    @classmethod
+    def bind(cls, pipel: Any = None) -> Any:
+        """What runs the mask, its ``find_spans`` is called for every document. Built once per
+        `masked_ai.core.registry.Pipeline`, masks with state return an instance
+
+        :param pipel: The NER pipeline to use, if any
+        """
+        return cls
 
     @staticmethod
     @abstractmethod
@@ -284,13 +105,114 @@ class MaskBase(ABC):
         """
         return NotImplemented
 
+    @classmethod
+    def find_spans(cls, data: str) -> List[Span]:
+        """Positioned version of `find`, this is what `Masker` uses
+
+        Regex masks get it for free from ``pattern`` and ``accept``. Masks that only implement
+        `find` get every occurrence of what they found.
+        """
+        detector = cls.detected_by or cls
+        if detector.pattern is not None:
+            return [
+                Span(m.start(), m.end(), cls.__name__)
+                for m in re.finditer(detector.pattern, data, detector.flags)
+                if detector.accept(data, m.start(), m.end()) and detector.classify(data, m.start(), m.end()) == cls.__name__
+            ]
+        spans: List[Span] = []
+        for item in set(cls.find(data)):
+            if item:
+                spans.extend(Span(m.start(), m.end(), cls.__name__) for m in re.finditer(re.escape(item), data))
+        return sorted(spans)
+
+    @classmethod
+    def find_spans_in(cls, analysis: Analysis) -> List[Span]:
+        """`find_spans` of ``analysis.data``, for masks using what other masks computed (``needs``)
+        """
+        return cls.find_spans(analysis.data)
+
+
+def _space_before(data: str, start: int) -> bool:
+    return start == 0 or data[start - 1] == ' '
+
+
+def _space_after(data: str, end: int) -> bool:
+    return end == len(data) or data[end] == ' '
+
+
+def _quoted(data: str, start: int, end: int) -> bool:
+    return (start > 0 and data[start - 1] == '"') or (end < len(data) and data[end] == '"')
+
+
+def _luhn(digits: str) -> bool:
+    """Luhn checksum of a card number
+    """
+    numbers = [ord(c) - 48 for c in reversed(digits)]
+    return (sum(numbers[0::2]) + sum(_LUHN_DOUBLED[n] for n in numbers[1::2])) % 10 == 0
+
+
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+# `prefilter` probes, what every hit of a mask contains
+_DIGIT_RE = re.compile(r"\d")
+_FOUR_DIGITS_RE = re.compile(r"\d{4}")
+_CARD_DIGITS_RE = re.compile(r"\d{4}[\d-]{9}")
+
+
+def _ipv4(text: str) -> bool:
+    """Every octet is at most 255
+    """
+    return all(int(octet) <= 255 for octet in text.partition("/")[0].split("."))
+
+
+def _ipv6(text: str) -> bool:
+    """A valid IPv6 address shaped like one, compressed forms made of letters or single digits
+    (``a::b``, ``be::ef``, i.e. scope operators and log keys) are not
+    """
+    try:
+        ipaddress.IPv6Interface(text)
+    except ValueError:
+        return False
+    address = text.partition("/")[0]
+    if "::" not in address:
+        # all the 8 groups
+        return True
+    groups = [group for group in address.split(":") if group]
+    if groups and "." in groups[-1]:
+        # an IPv4 address in IPv6, i.e. ::ffff:10.0.0.1
+        return True
+    if not any(c.isdigit() for group in groups for c in group):
+        return False
+    return address.startswith("::") or any(len(group) >= 2 for group in groups)
+
 
 class IPMask(MaskBase):
-    """IP addresses
+    """IP addresses, IPv4 and IPv6, with their CIDR prefix length if any
     """
+    pattern = (
+        r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}(?:/(?:3[0-2]|[12]?\d)(?![\d.]))?\b"
+        # IPv6 candidates, at least two colons and a hex digit, validated and checked for the shape of an address by `accept`
+        r"|(?<![\w:.])(?=[0-9A-Fa-f:]*[0-9A-Fa-f])(?:[0-9A-Fa-f]{0,4}:){2,7}(?:\d{1,3}(?:\.\d{1,3}){3}|[0-9A-Fa-f]{0,4})(?:/\d{1,3})?(?![\w:.])"
+    )
+    # set to reject the IPv4 addresses with octets above 255, i.e. counters such as 999.999.999.999
+    validate = False
+    settings = ("validate",)
+
+    @classmethod
+    def prefilter(cls, data: str) -> bool:
+        # three dots and digits for IPv4, two colons for IPv6
+        return (data.count(".") >= 3 and _DIGIT_RE.search(data) is not None) or data.count(":") >= 2
+
+    @classmethod
+    def accept(cls, data: str, start: int, end: int) -> bool:
+        text = data[start:end]
+        if ":" in text:
+            return _ipv6(text)
+        return not cls.validate or _ipv4(text)
+
     @staticmethod
     def find(data: str) -> List[Any]:
-        return re.findall(r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b", data)
+        return [data[span.start:span.end] for span in IPMask.find_spans(data)]
     
 ## skip for the time being
 # class NETParMask(MaskBase):
@@ -314,135 +236,231 @@ class IPMask(MaskBase):
 class NamesMask(MaskBase):
     """Persons names
     """
+    # long documents are chunked, see `masked_ai.core.chunking`
+    window_size = 5000
+    window_overlap = 200
+    needs = (TOKENS, POS_TAGS, CHUNKS)
+
     @staticmethod
     def find(data: str) -> List[Any]:
-        sentt = nltk.ne_chunk(nltk.pos_tag(nltk.tokenize.word_tokenize(data)), binary=False)
-        person_list = []
-        person = []
-        name = ""
-        for subtree in sentt.subtrees(filter=lambda t: t.label() == 'PERSON'):
-            for leaf in subtree.leaves():
-                person.append(leaf[0])
-            for part in person:
-                name += part + ' '
-            if name[:-1] not in person_list:
-                person_list.append(name[:-1])
-            name = ''
-            person = []
-            
-        # if there is a picked word that has multiple names in it, add each individual to the person_list
-        new_person_list = person_list
-        for name in person_list: 
-            start, end = data.find(name), data.find(name) + len(name)   
-            start = max(0, start)
-            end = min(len(data) - 1, end)
-            if len(name.split(' ')) > 1 and data[max(0, start - 1)] != '''"''' and data[end] != '''"''':
-                new_person_list.extend(name.split(' '))
-        person_list = new_person_list
-            
+        return list(dict.fromkeys(data[span.start:span.end] for span in NamesMask.find_spans(data)))
+
+    @classmethod
+    def prefilter(cls, data: str) -> bool:
+        # names are capitalised, no upper case letter at all means no name
+        return not data.islower()
+
+    @classmethod
+    def find_spans(cls, data: str) -> List[Span]:
+        return cls.find_spans_in(Analysis(data))
+
+    @classmethod
+    def find_spans_in(cls, analysis: Analysis) -> List[Span]:
+        return analysis.windowed_spans(cls.find_window_in, cls.window_size, cls.window_overlap)
+
+    @staticmethod
+    def find_window_in(analysis: Analysis) -> List[Span]:
+        nltk = resources.nltk()
+        data = analysis.data
+        offsets = analysis.offsets
+        sentt = analysis.chunks
+
+        # offsets of the tokens of every person, the tree leaves are the tokens in order
+        persons = []
+        index = 0
+        for child in sentt:
+            if isinstance(child, nltk.Tree):
+                size = len(child.leaves())
+                if child.label() == 'PERSON':
+                    persons.append(offsets[index:index + size])
+                index += size
+            else:
+                index += 1
+
+        # if there is a picked word that has multiple names in it, use each individual word
+        candidates: List[Tuple[int, int]] = []
+        for tokens in persons:
+            person = [offset for offset in tokens if offset is not None]
+            if len(person) != len(tokens):
+                continue
+            if len(person) == 1:
+                candidates.append(person[0])
+            elif not _quoted(data, person[0][0], person[-1][1]):
+                candidates.extend(person)
+
         # make sure the person's name is a single word and doesn not have " in the begining of end of it
-        new_person_list = []
-        for name in person_list:
-            start, end = data.find(name), data.find(name) + len(name)
-            start = max(0, start)
-            end = min(len(data) - 1, end)
+        spans = []
+        for start, end in candidates:
+            name = data[start:end]
             # make sure the entity is not in the allowed_names. also avoid names here with all capital letters
-            if len(name.split(' ') ) > 1 or \
-                data[max(0, start - 1)] == '''"''' or data[end] == '''"''' or \
-                any([name.lower() == x.lower() for x in __allowed_names__]) or \
-                data[max(0, start - 1)] != ' ' or \
-                (data[end] != ' ' and data[end] not in __punctuation__) or \
+            if ' ' in name or \
+                _quoted(data, start, end) or \
+                vocabulary.is_allowed(name) or \
+                not _space_before(data, start) or \
+                (not _space_after(data, end) and data[end] not in __punctuation__) or \
                 name.isupper() or \
                 len([x for x in name if x.isdigit()]) > 1 or \
                 "_" in name or \
                 "/" in name or \
                 len(name) == 1:
                 continue
-            new_person_list.append(name)
-            
-        new_person_list = list(set(new_person_list))
-        
-        return new_person_list
+            spans.append(Span(start, end, 'NamesMask'))
+        return spans
 
 
 class LinkMask(MaskBase):
     """Web links
     """
+    pattern = tlds.link_pattern()
+    flags = re.IGNORECASE
+
+    @classmethod
+    def prefilter(cls, data: str) -> bool:
+        # the dot before the top level domain
+        return "." in data
+
     @staticmethod
     def find(data: str) -> List[Any]:
-        return re.findall(r'(?i)((?:https?://|www\d{0,3}[.])?[a-z0-9.\-]+[.](?:(?:international)|(?:construction)|(?:contractors)|(?:enterprises)|(?:photography)|(?:immobilien)|(?:management)|(?:technology)|(?:directory)|(?:education)|(?:equipment)|(?:institute)|(?:marketing)|(?:solutions)|(?:builders)|(?:clothing)|(?:computer)|(?:democrat)|(?:diamonds)|(?:graphics)|(?:holdings)|(?:lighting)|(?:plumbing)|(?:training)|(?:ventures)|(?:academy)|(?:careers)|(?:company)|(?:domains)|(?:florist)|(?:gallery)|(?:guitars)|(?:holiday)|(?:kitchen)|(?:recipes)|(?:shiksha)|(?:singles)|(?:support)|(?:systems)|(?:agency)|(?:berlin)|(?:camera)|(?:center)|(?:coffee)|(?:estate)|(?:kaufen)|(?:luxury)|(?:monash)|(?:museum)|(?:photos)|(?:repair)|(?:social)|(?:tattoo)|(?:travel)|(?:viajes)|(?:voyage)|(?:build)|(?:cheap)|(?:codes)|(?:dance)|(?:email)|(?:glass)|(?:house)|(?:ninja)|(?:photo)|(?:shoes)|(?:solar)|(?:today)|(?:aero)|(?:arpa)|(?:asia)|(?:bike)|(?:buzz)|(?:camp)|(?:club)|(?:coop)|(?:farm)|(?:gift)|(?:guru)|(?:info)|(?:jobs)|(?:kiwi)|(?:land)|(?:limo)|(?:link)|(?:menu)|(?:mobi)|(?:moda)|(?:name)|(?:pics)|(?:pink)|(?:post)|(?:rich)|(?:ruhr)|(?:sexy)|(?:tips)|(?:wang)|(?:wien)|(?:zone)|(?:biz)|(?:cab)|(?:cat)|(?:ceo)|(?:com)|(?:edu)|(?:gov)|(?:int)|(?:mil)|(?:net)|(?:onl)|(?:org)|(?:pro)|(?:red)|(?:tel)|(?:uno)|(?:xxx)|(?:ac)|(?:ad)|(?:ae)|(?:af)|(?:ag)|(?:ai)|(?:al)|(?:am)|(?:an)|(?:ao)|(?:aq)|(?:ar)|(?:as)|(?:at)|(?:au)|(?:aw)|(?:ax)|(?:az)|(?:ba)|(?:bb)|(?:bd)|(?:be)|(?:bf)|(?:bg)|(?:bh)|(?:bi)|(?:bj)|(?:bm)|(?:bn)|(?:bo)|(?:br)|(?:bs)|(?:bt)|(?:bv)|(?:bw)|(?:by)|(?:bz)|(?:ca)|(?:cc)|(?:cd)|(?:cf)|(?:cg)|(?:ch)|(?:ci)|(?:ck)|(?:cl)|(?:cm)|(?:cn)|(?:co)|(?:cr)|(?:cu)|(?:cv)|(?:cw)|(?:cx)|(?:cy)|(?:cz)|(?:de)|(?:dj)|(?:dk)|(?:dm)|(?:do)|(?:dz)|(?:ec)|(?:ee)|(?:eg)|(?:er)|(?:es)|(?:et)|(?:eu)|(?:fi)|(?:fj)|(?:fk)|(?:fm)|(?:fo)|(?:fr)|(?:ga)|(?:gb)|(?:gd)|(?:ge)|(?:gf)|(?:gg)|(?:gh)|(?:gi)|(?:gl)|(?:gm)|(?:gn)|(?:gp)|(?:gq)|(?:gr)|(?:gs)|(?:gt)|(?:gu)|(?:gw)|(?:gy)|(?:hk)|(?:hm)|(?:hn)|(?:hr)|(?:ht)|(?:hu)|(?:id)|(?:ie)|(?:il)|(?:im)|(?:in)|(?:io)|(?:iq)|(?:ir)|(?:is)|(?:it)|(?:je)|(?:jm)|(?:jo)|(?:jp)|(?:ke)|(?:kg)|(?:kh)|(?:ki)|(?:km)|(?:kn)|(?:kp)|(?:kr)|(?:kw)|(?:ky)|(?:kz)|(?:la)|(?:lb)|(?:lc)|(?:li)|(?:lk)|(?:lr)|(?:ls)|(?:lt)|(?:lu)|(?:lv)|(?:ly)|(?:ma)|(?:mc)|(?:md)|(?:me)|(?:mg)|(?:mh)|(?:mk)|(?:ml)|(?:mm)|(?:mn)|(?:mo)|(?:mp)|(?:mq)|(?:mr)|(?:ms)|(?:mt)|(?:mu)|(?:mv)|(?:mw)|(?:mx)|(?:my)|(?:mz)|(?:na)|(?:nc)|(?:ne)|(?:nf)|(?:ng)|(?:ni)|(?:nl)|(?:no)|(?:np)|(?:nr)|(?:nu)|(?:nz)|(?:om)|(?:pa)|(?:pe)|(?:pf)|(?:pg)|(?:ph)|(?:pk)|(?:pl)|(?:pm)|(?:pn)|(?:pr)|(?:ps)|(?:pt)|(?:pw)|(?:py)|(?:qa)|(?:re)|(?:ro)|(?:rs)|(?:ru)|(?:rw)|(?:sa)|(?:sb)|(?:sc)|(?:sd)|(?:se)|(?:sg)|(?:sh)|(?:si)|(?:sj)|(?:sk)|(?:sl)|(?:sm)|(?:sn)|(?:so)|(?:sr)|(?:st)|(?:su)|(?:sv)|(?:sx)|(?:sy)|(?:sz)|(?:tc)|(?:td)|(?:tf)|(?:tg)|(?:th)|(?:tj)|(?:tk)|(?:tl)|(?:tm)|(?:tn)|(?:to)|(?:tp)|(?:tr)|(?:tt)|(?:tv)|(?:tw)|(?:tz)|(?:ua)|(?:ug)|(?:uk)|(?:us)|(?:uy)|(?:uz)|(?:va)|(?:vc)|(?:ve)|(?:vg)|(?:vi)|(?:vn)|(?:vu)|(?:wf)|(?:ws)|(?:ye)|(?:yt)|(?:za)|(?:zm)|(?:zw))(?:/[^\s()<>]+[^\s`!()\[\]{};:\'".,<>?\xab\xbb\u201c\u201d\u2018\u2019])?)', data)
+        return re.findall(LinkMask.pattern, data, LinkMask.flags)
+
+# the closest of these words before a number tells a phone number from a serial number
+_PHONE_OR_SERIAL_RE = re.compile(
+    r"\b(?:(?P<PhoneMask>call\w*|phone\w*|tel|mobile|cell|fax|sms|text|whatsapp|contact\w*|dial\w*|ring)"
+    r"|(?P<SerialNumMask>serial|s/n|sn|id|ref|reference|order|invoice|ticket|account|acct|model|part|imei|device|licen[cs]e|key))\b",
+    re.IGNORECASE,
+)
+
+
+def _phone_or_serial(data: str, start: int) -> str:
+    """Phone number, unless the words right before it say otherwise
+    """
+    if data[start] in "+(":
+        return "PhoneMask"
+    # only the words since the previous number or line
+    window = data[max(0, start - 32):start]
+    cut = len(window)
+    while cut and not (window[cut - 1].isdigit() or window[cut - 1] == "\n"):
+        cut -= 1
+    window = window[cut:]
+    label = "PhoneMask"
+    for match in _PHONE_OR_SERIAL_RE.finditer(window):
+        label = str(match.lastgroup)
+    return label
+
 
 class SerialNumMask(MaskBase):
-    """Serial numbers (duplicate of PhoneMask)
+    """Serial numbers, the same pattern as phone numbers, told apart by `classify`
     """
+    # every number starts with one of these, the lookahead rules out the other positions at once
+    pattern = r'''(?=[+(\d])((?:(?<![\d-])(?:\+?\d{1,3}[-.\s*]?)?(?:\(?\d{3}\)?[-.\s*]?)?\d{3}[-.\s*]?\d{4}(?![\d-]))|(?:(?<![\d-])(?:(?:\(\+?\d{2}\))|(?:\+?\d{2}))\s*\d{2}\s*\d{3}\s*\d{4}(?![\d-])))'''
+    # user supplied rule, (data, start, end) -> "PhoneMask", "SerialNumMask", or None to go by the context
+    rule: Optional[Callable[[str, int, int], Optional[str]]] = None
+    settings = ("rule",)
+
+    @classmethod
+    def prefilter(cls, data: str) -> bool:
+        # both forms end with 4 digits
+        return _FOUR_DIGITS_RE.search(data) is not None
+
+    @classmethod
+    def accept(cls, data: str, start: int, end: int) -> bool:
+        # make sure that before and after there is a space
+        return _space_before(data, start) and _space_after(data, end)
+
+    @classmethod
+    def classify(cls, data: str, start: int, end: int) -> str:
+        label = cls.rule(data, start, end) if cls.rule is not None else None
+        return label or _phone_or_serial(data, start)
+
     @staticmethod
     def find(data: str) -> List[Any]:
-        candidate = re.findall(r'''((?:(?<![\d-])(?:\+?\d{1,3}[-.\s*]?)?(?:\(?\d{3}\)?[-.\s*]?)?\d{3}[-.\s*]?\d{4}(?![\d-]))|(?:(?<![\d-])(?:(?:\(\+?\d{2}\))|(?:\+?\d{2}))\s*\d{2}\s*\d{3}\s*\d{4}(?![\d-])))''', data)
-        # make sure that before and after there is a space
-        new_candidate = []
-        for x in candidate:
-            start, end = data.find(x), data.find(x) + len(x)
-            start = max(0, start)
-            end = min(len(data) - 1, end)
-            if data[max(0, start - 1)] != ' ' or data[end] != ' ':
-                continue
-            new_candidate.append(x)
-        return new_candidate
+        return [data[span.start:span.end] for span in SerialNumMask.find_spans(data)]
+
 
 class PhoneMask(MaskBase):
-    """Phone numbers
+    """Phone numbers, found along with the serial numbers
     """
+    detected_by = SerialNumMask
+
     @staticmethod
     def find(data: str) -> List[Any]:
-        candidate = re.findall(r'''((?:(?<![\d-])(?:\+?\d{1,3}[-.\s*]?)?(?:\(?\d{3}\)?[-.\s*]?)?\d{3}[-.\s*]?\d{4}(?![\d-]))|(?:(?<![\d-])(?:(?:\(\+?\d{2}\))|(?:\+?\d{2}))\s*\d{2}\s*\d{3}\s*\d{4}(?![\d-])))''', data)
-        # make sure that before and after there is a space
-        new_candidate = []
-        for x in candidate:
-            start, end = data.find(x), data.find(x) + len(x)
-            start = max(0, start)
-            end = min(len(data) - 1, end)
-            if data[max(0, start - 1)] != ' ' or data[end] != ' ':
-                continue
-            new_candidate.append(x)
-        return new_candidate
+        return [data[span.start:span.end] for span in PhoneMask.find_spans(data)]
 
 
 class EmailMask(MaskBase):
     """Email addresses
     """
+    pattern = r"([a-z0-9!#$%&'*+\/=?^_`{|.}~-]+@(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z0-9](?:[a-z0-9-]*[a-z0-9])?)"
+
+    @classmethod
+    def prefilter(cls, data: str) -> bool:
+        return "@" in data
+
     @staticmethod
     def find(data: str) -> List[Any]:
-        return re.findall(r"([a-z0-9!#$%&'*+\/=?^_`{|.}~-]+@(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z0-9](?:[a-z0-9-]*[a-z0-9])?)", data)
+        return re.findall(EmailMask.pattern, data)
 
 
 class CreditCardMask(MaskBase):
     """Credit Card
+
+    16 digits, contiguous or in groups of 4. With ``validate`` set, any issuer length (13 to 19
+    digits, i.e. 4-6-5 for Amex) passing the Luhn checksum.
     """
+    pattern = r'\b(?:\d{4}-){3}\d{4}(?:-\d{1,3})?\b|\b\d{4}-\d{6}-\d{4,5}\b|\b\d{13,19}\b'
+    # set to reject the numbers failing the Luhn checksum, i.e. ids and counters
+    validate = False
+    settings = ("validate",)
+
+    @classmethod
+    def prefilter(cls, data: str) -> bool:
+        # 13 digits at least, the first 4 in a row
+        return _CARD_DIGITS_RE.search(data) is not None
+
+    @classmethod
+    def accept(cls, data: str, start: int, end: int) -> bool:
+        text = data[start:end]
+        if cls.validate:
+            return _luhn(text.replace("-", ""))
+        return len(text) == 16 or (len(text) == 19 and text[4] == text[9] == text[14] == "-")
+
     @staticmethod
     def find(data: str) -> List[Any]:
-        return re.findall(r'\b(?:\d{4}-){3}\d{4}|\b\d{16}\b', data)
+        return [data[span.start:span.end] for span in CreditCardMask.find_spans(data)]
     
 
 class NERNamesMASK(MaskBase):
     """Named Entity Recognition using big NLP models
     
     """
-    def __init__(self, model_name='dslim/distilbert-NER', pipel=None, min_score=0.5):
-        if pipel is None:
-            from transformers import AutoTokenizer, AutoModelForTokenClassification
-            from transformers import pipeline
-
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForTokenClassification.from_pretrained(model_name)
-            self.nlp = pipeline("ner", model=self.model, tokenizer=self.tokenizer)
-        else:
-            self.nlp = pipel
-        
-        
-        
+    needs = (NER,)
+
+    def __init__(
+        self,
+        model_name: str = 'dslim/distilbert-NER',
+        pipel: Any = None,
+        min_score: float = 0.5,
+        window_size: int = 1000,
+        window_overlap: int = 100,
+        max_tokens: int = 510,
+    ) -> None:
+        """
+        :param window_size: Most characters sent to the model at once
+        :param max_tokens: Most tokens sent to the model at once, without its special tokens (512 for DistilBERT)
+        """
+        self.model_name = model_name
+        self.pipel = pipel
+        self._model_key = models.registry.key(model_name)
+
         self.__name__ = 'NERNamesMASK'
         self.min_score = min_score
-        
+        # the model truncates long inputs, so these are chunked, see `masked_ai.core.chunking`. Windows
+        # dense in tokens (IPs, hex, ids) are cut again to fit in ``max_tokens``
+        self.window_size = window_size
+        self.window_overlap = window_overlap
+        self.max_tokens = max_tokens
+        self.tag2name: Dict[str, str]
+
         # mapping of NER tags to their descriptions
         if model_name == 'dslim/distilbert-NER':
             self.tag2name = {
@@ -465,29 +483,132 @@ class NERNamesMASK(MaskBase):
                 "LABEL_8": "LocationMASK",    # Location
             }
         else:
-            raise NotImplementedError(f"Mapping for model {model} not implemented!")
-        
-    def find(self, data: str) -> List[Any]:
-        ner_results = self.nlp(data)
-        # only return the entities
-        selected_entities = [(entity['word'], self.tag2name[entity['entity']]) for entity in ner_results if (entity['entity'] == 'LABEL_3' or entity['entity'] == 'LABEL_5' or entity['entity'] == 'LABEL_6') and entity['score'] > self.min_score]
-        
-        # make sure the selected entities are a single word, not a subword --> check there is a space before and after
-        new_selected_entities = []
-        for (entity, label) in selected_entities:
-            start, end = data.find(entity), data.find(entity) + len(entity)
-            start = max(0, start)
-            end = min(len(data) - 1, end)
+            raise NotImplementedError(f"Mapping for model {model_name} not implemented!")
+
+    @classmethod
+    def bind(cls, pipel: Any = None) -> Any:
+        return cls(pipel=pipel)
+
+    @property
+    def nlp(self) -> Any:
+        if self.pipel is not None:
+            return self.pipel
+        # shared by every instance in the process, see `masked_ai.core.models`. Looked up on every
+        # use, so an instance kept by a `masked_ai.core.registry.Pipeline` follows evictions
+        return models.registry.get(self.model_name)
+
+    @property
+    def tokenizer(self) -> Any:
+        return getattr(self.nlp, 'tokenizer', None)
+
+    @property
+    def model(self) -> Any:
+        return getattr(self.nlp, 'model', None)
+
+    def count_tokens(self) -> Optional[Callable[[str], int]]:
+        """How many tokens the model sees in a text, None without a tokenizer (i.e. a custom pipeline)
+        """
+        tokenizer = self.tokenizer
+        if tokenizer is None:
+            return None
+        return _TokenCounter(tokenizer)
+
+    def find(self, data: str) -> List[Any]:  # type: ignore[override]
+        return list(dict.fromkeys((span.label, data[span.start:span.end]) for span in self.find_spans(data)))
+
+    def find_spans(self, data: str) -> List[Span]:  # type: ignore[override]
+        return self.find_spans_in(Analysis(data))
+
+    def find_spans_in(self, analysis: Analysis) -> List[Span]:  # type: ignore[override]
+        return analysis.windowed_spans(self.find_window_in, self.window_size, self.window_overlap, self.count_tokens(), self.max_tokens)
+
+    def find_window_in(self, analysis: Analysis) -> List[Span]:
+        return self.select(analysis.data, self.entities(analysis))
+
+    def entities(self, analysis: Analysis) -> List[dict]:
+        """The raw pipeline output over ``analysis.data``, run once per document and model, every
+        entity type (i.e. locations) is there for other masks to use
+        """
+        def run() -> List[dict]:
+            start = time.perf_counter()
+            ner_results = self.nlp(analysis.data)
+            models.registry.emit("inference", self._model_key, time.perf_counter() - start)
+            return ner_results
+
+        return analysis.get((NER, self._model_key, id(self.pipel)), run)
+
+    def find_many(self, data: List[str], batch_size: int = 8) -> List[List[Any]]:
+        """Same as `find` for many documents
+        """
+        return [
+            list(dict.fromkeys((span.label, document[span.start:span.end]) for span in spans))
+            for document, spans in zip(data, self.find_spans_many(data, batch_size=batch_size))
+        ]
+
+    def find_spans_many(self, data: List[str], batch_size: int = 8) -> List[List[Span]]:
+        """Same as `find_spans` for many documents, the windows of all of them are sent through the pipeline in padded batches
+
+        :return: The found entities of each document, in the same order as ``data``
+        """
+        windows = []
+        owners = []
+        for i, document in enumerate(data):
+            for window in chunking.token_windows(document, self.window_size, self.window_overlap, self.count_tokens(), self.max_tokens):
+                windows.append(window)
+                owners.append(i)
+        if not windows:
+            return [[] for _ in data]
+        start = time.perf_counter()
+        ner_results = self.nlp([window.text for window in windows], batch_size=batch_size)
+        models.registry.emit("inference", self._model_key, time.perf_counter() - start)
+
+        found: List[List[List[Span]]] = [[] for _ in data]
+        for owner, window, results in zip(owners, windows, ner_results):
+            found[owner].append(chunking.shift(self.select(window.text, results), window.start))
+        return [sorted(chunking.merge(results)) for results in found]
+
+    def select(self, data: str, ner_results: List[dict]) -> List[Span]:
+        """Filter the raw pipeline output of ``data`` to the entities to mask
+        """
+        spans = []
+        position = 0
+        for entity in ner_results:
+            # only return the entities
+            if entity['entity'] not in ('LABEL_3', 'LABEL_5', 'LABEL_6') or entity['score'] <= self.min_score:
+                continue
+            word = entity['word']
+            start, end = entity.get('start'), entity.get('end')
+            if start is None or end is None:
+                # slow tokenizers don't return offsets
+                start = data.find(word, position)
+                if start == -1:
+                    continue
+                end = start + len(word)
+            position = end
+
+            # make sure the selected entities are a single word, not a subword --> check there is a space before and after
             # make sure the entity is not in the allowed_names
-            if data[max(0, start - 1)] != ' ' or \
-                (data[end] != ' ' and data[end] not in __punctuation__) or \
-                len(entity) == 1 or \
-                '#' in entity or \
-                any([entity.lower() == x.lower() for x in __allowed_names__]):
+            if not _space_before(data, start) or \
+                (not _space_after(data, end) and data[end] not in __punctuation__) or \
+                len(word) == 1 or \
+                '#' in word or \
+                vocabulary.is_allowed(word):
                 continue
-            new_selected_entities.append((label, entity))
-            
-        # remove duplicates
-        new_selected_entities = list(set(new_selected_entities))
-                
-        return new_selected_entities
+            spans.append(Span(start, end, self.tag2name[entity['entity']]))
+        return spans
+
+
+class _TokenCounter:
+    """Tokens of a text for ``tokenizer``, equal for the same tokenizer so the windows are cached once per model
+    """
+    def __init__(self, tokenizer: Any) -> None:
+        self.tokenizer = tokenizer
+
+    def __call__(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _TokenCounter) and other.tokenizer is self.tokenizer
+
+    def __hash__(self) -> int:
+        return id(self.tokenizer)
@@ -0,0 +1,105 @@
+"""Process wide registry of the NER models, so every `NERNamesMASK` shares one loaded pipeline
+
+    from masked_ai.core.models import registry
+
+    registry.preload("dslim/distilbert-NER")            # i.e. at worker startup
+    registry.subscribe(lambda event, key, seconds: ...)  # "load", "inference" and "evict" timings
+    registry.evict("dslim/distilbert-NER")
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from masked_ai.core import resources
+
+DEFAULT_MODEL = 'dslim/distilbert-NER'
+
+# (model name, sorted settings)
+ModelKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+Hook = Callable[[str, ModelKey, float], None]
+
+
+def load_ner_pipeline(model_name: str, **settings: Any) -> Any:
+    """Default loader, a transformers token classification pipeline, in offline mode (see
+    `resources.set_offline`) the model must already be in the local cache
+    """
+    from transformers import AutoTokenizer, AutoModelForTokenClassification
+    from transformers import pipeline
+
+    offline = resources.is_offline()
+    tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=offline)
+    model = AutoModelForTokenClassification.from_pretrained(model_name, local_files_only=offline)
+    return pipeline("ner", model=model, tokenizer=tokenizer, **settings)
+
+
+class ModelRegistry:
+    """Lazily loaded models, keyed by model name and settings
+
+    Loading is thread safe, concurrent callers of `get` for the same key wait for a single load.
+    """
+    def __init__(self, loader: Callable[..., Any] = load_ner_pipeline) -> None:
+        self.loader = loader
+        self._models: Dict[ModelKey, Any] = {}
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._hooks: List[Hook] = []
+
+    @staticmethod
+    def key(model_name: str, **settings: Any) -> ModelKey:
+        return model_name, tuple(sorted(settings.items()))
+
+    def get(self, model_name: str = DEFAULT_MODEL, **settings: Any) -> Any:
+        """The loaded model, loading it on first use
+        """
+        key = self.key(model_name, **settings)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            model = self._models.get(key)
+            if model is None:
+                start = time.perf_counter()
+                model = self.loader(model_name, **settings)
+                self._models[key] = model
+                self.emit("load", key, time.perf_counter() - start)
+        return model
+
+    def preload(self, model_name: str = DEFAULT_MODEL, **settings: Any) -> None:
+        self.get(model_name, **settings)
+
+    def register(self, model: Any, model_name: str = DEFAULT_MODEL, **settings: Any) -> None:
+        """Use an already loaded model for this key
+        """
+        self._models[self.key(model_name, **settings)] = model
+
+    def evict(self, model_name: Optional[str] = None, **settings: Any) -> None:
+        """Drop a loaded model, or all of them if no model name is given
+        """
+        with self._lock:
+            if model_name is None:
+                keys = list(self._models)
+            else:
+                keys = [self.key(model_name, **settings)]
+            for key in keys:
+                if self._models.pop(key, None) is not None:
+                    self.emit("evict", key, 0.0)
+
+    def loaded(self) -> List[ModelKey]:
+        return list(self._models)
+
+    def subscribe(self, hook: Hook) -> None:
+        """Call ``hook(event, key, seconds)`` on every "load", "inference" and "evict"
+        """
+        self._hooks.append(hook)
+
+    def unsubscribe(self, hook: Hook) -> None:
+        self._hooks.remove(hook)
+
+    def emit(self, event: str, key: ModelKey, seconds: float) -> None:
+        for hook in self._hooks:
+            hook(event, key, seconds)
+
+
+registry = ModelRegistry()
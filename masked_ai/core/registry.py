@@ -0,0 +1,237 @@
+"""Which masks run and in which order, as named profiles compiled once into a `Pipeline`
+
+    pipeline = registry.pipeline("fast-regex-only")
+    masker = Masker(prompt, pipeline=pipeline)
+
+    registry.register(MyMask)
+    registry.add_profile("logs", ["IPMask", "LinkMask", "EmailMask"])
+
+Masks from other packages are registered through the ``masked_ai.masks`` entry point group, i.e.
+``my_mask = my_package.masks:MyMask``, they are loaded the first time the registry is used.
+
+Compiled pipelines are cached per profile, skipped masks and NER pipeline. Registering a mask or
+a profile drops them, they are compiled again on next use.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from importlib import metadata
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from masked_ai.core import models, resources, vocabulary
+from masked_ai.core.analysis import NER, NLTK_ANALYSES
+from masked_ai.core.masks import (
+    CreditCardMask,
+    EmailMask,
+    IPMask,
+    LinkMask,
+    MaskBase,
+    NamesMask,
+    NERNamesMASK,
+    PhoneMask,
+    SerialNumMask,
+)
+from masked_ai.core.scanner import Scanner, get_scanner
+
+ENTRY_POINT_GROUP = "masked_ai.masks"
+
+DEFAULT_PROFILE = "default"
+
+# earlier masks win when two masks find overlapping values
+BUILTIN_MASKS = (IPMask, NamesMask, LinkMask, SerialNumMask, PhoneMask, EmailMask, CreditCardMask, NERNamesMASK)
+
+ProfileRule = Callable[[Type[MaskBase]], bool]
+
+_lock = threading.RLock()
+_masks: "OrderedDict[str, Type[MaskBase]]" = OrderedDict((mask.__name__, mask) for mask in BUILTIN_MASKS)
+_entry_points_loaded = False
+_profiles: Dict[str, ProfileRule] = {
+    DEFAULT_PROFILE: lambda mask: True,
+    "full-ner": lambda mask: True,
+    "no-ner": lambda mask: mask is not NERNamesMASK,
+    "fast-regex-only": lambda mask: mask.regex_based(),
+}
+
+
+class Pipeline:
+    """The masks of a profile, in execution order, ready to run
+
+    Holds the compiled scanner of the regex masks and what runs every other mask (i.e. the NER
+    mask and its pipeline). It is never modified once built, share it across threads and `Masker`s.
+    """
+    def __init__(self, masks: Sequence[Type[MaskBase]], pipel: Any = None, name: str = "custom", prefilter: bool = True) -> None:
+        """
+        :param masks: In order, earlier masks win on overlaps
+        :param pipel: The NER pipeline, the process wide model by default
+        :param prefilter: Skip the masks their `MaskBase.prefilter` rules out for a document
+        """
+        self.name = name
+        self.prefilter = prefilter
+        self.masks: Tuple[Type[MaskBase], ...] = tuple(masks)
+        self.names: Tuple[str, ...] = tuple(mask.__name__ for mask in self.masks)
+        self.pipel = pipel
+        self.scanner: Scanner = get_scanner(tuple(mask for mask in self.masks if mask.regex_based()))
+        # mask name -> what runs it, for the masks that are not in the scanner
+        self.runners: Dict[str, Any] = {mask.__name__: mask.bind(pipel) for mask in self.masks if not mask.regex_based()}
+        # the analyses of the document the masks use, see `masked_ai.core.analysis`
+        self.needs = frozenset(need for mask in self.masks for need in mask.needs)
+        # the masks whose ``settings`` change what the pipeline finds, a mask and the one it is detected by
+        self._tuned = tuple(dict.fromkeys(
+            tuned for mask in self.masks for tuned in (mask, mask.detected_by) if tuned is not None and tuned.settings
+        ))
+
+    @property
+    def key(self) -> Tuple[Hashable, ...]:
+        """What else than the data changes the spans found, see `masked_ai.core.cache.DetectionCache`.
+        Read at every use, the mask ``settings`` can change after the pipeline is built
+        """
+        settings = tuple(getattr(mask, name) for mask in self._tuned for name in mask.settings)
+        return self.names, id(self.pipel) if self.pipel is not None else None, settings
+
+    def ruled_out(self, data: str, names: Optional[Iterable[str]] = None) -> FrozenSet[str]:
+        """The masks that can't find anything in ``data``, see `MaskBase.prefilter`. Masks ``detected_by``
+        another mask go by the prefilter of that one
+
+        :param names: Only check these masks, all of them by default
+        """
+        if not self.prefilter:
+            return frozenset()
+        wanted = None if names is None else frozenset(names)
+        return frozenset(
+            mask.__name__ for mask in self.masks
+            if (wanted is None or mask.__name__ in wanted) and not (mask.detected_by or mask).prefilter(data)
+        )
+
+    def scanner_without(self, names: FrozenSet[str]) -> Scanner:
+        """The scanner of the regex masks but ``names``, compiled once per combination
+        """
+        if not any(mask.__name__ in names for mask in self.scanner.masks):
+            return self.scanner
+        return get_scanner(tuple(mask for mask in self.scanner.masks if mask.__name__ not in names))
+
+    def warm_up(self) -> None:
+        """Load everything the analyses the masks need use, i.e. when a worker or a server starts
+        """
+        if self.needs:
+            # the masks working on words check them against the vocabulary
+            vocabulary.allowed_names()
+        if self.needs & NLTK_ANALYSES:
+            resources.nltk()
+        if NER in self.needs and self.pipel is None:
+            models.registry.preload()
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.names
+
+    def __repr__(self) -> str:
+        return f"Pipeline({self.name!r}, {list(self.names)})"
+
+
+def _load_entry_points() -> None:
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    try:
+        found: Iterable[Any] = metadata.entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:
+        # before Python 3.10
+        found = metadata.entry_points().get(ENTRY_POINT_GROUP, [])  # type: ignore[attr-defined]
+    for entry_point in found:
+        try:
+            register(entry_point.load())
+        except Exception as e:
+            logging.warning(f"Failed to load the mask {entry_point.name}: {e}")
+
+
+def register(mask: Type[MaskBase], before: Optional[str] = None) -> Type[MaskBase]:
+    """Add ``mask`` to every profile that selects it, usable as a class decorator
+
+    :param before: Name of the mask it should run before, last by default
+    """
+    if not (isinstance(mask, type) and issubclass(mask, MaskBase)):
+        raise TypeError(f"{mask!r} is not a MaskBase subclass")
+    with _lock:
+        if before is not None and (before not in _masks or before == mask.__name__):
+            raise ValueError(f"Unknown mask {before}")
+        _masks.pop(mask.__name__, None)
+        names = list(_masks)
+        names.insert(names.index(before) if before is not None else len(names), mask.__name__)
+        _masks[mask.__name__] = mask
+        for name in names:
+            _masks.move_to_end(name)
+        _compile.cache_clear()
+    return mask
+
+
+def unregister(name: str) -> None:
+    with _lock:
+        _masks.pop(name, None)
+        _compile.cache_clear()
+
+
+def available() -> List[Type[MaskBase]]:
+    """Every registered mask, in execution order
+    """
+    with _lock:
+        _load_entry_points()
+        return list(_masks.values())
+
+
+def add_profile(name: str, masks: Union[Iterable[str], ProfileRule]) -> None:
+    """
+    :param masks: The names of the masks to run, or a function selecting them among the registered masks
+    """
+    if callable(masks):
+        rule = masks
+    else:
+        names = frozenset(masks)
+        rule = lambda mask: mask.__name__ in names  # noqa: E731
+    with _lock:
+        _profiles[name] = rule
+        _compile.cache_clear()
+
+
+def remove_profile(name: str) -> None:
+    with _lock:
+        _profiles.pop(name, None)
+        _compile.cache_clear()
+
+
+def profiles() -> List[str]:
+    return list(_profiles)
+
+
+def resolve(profile: str = DEFAULT_PROFILE, skip: Optional[Iterable[str]] = None) -> List[Type[MaskBase]]:
+    """The masks of ``profile`` without the ``skip`` ones, in execution order
+    """
+    with _lock:
+        rule = _profiles.get(profile)
+        if rule is None:
+            raise ValueError(f"Unknown profile {profile}, one of {', '.join(_profiles)}")
+        skipped = frozenset(skip or ())
+        return [mask for mask in available() if rule(mask) and mask.__name__ not in skipped]
+
+
+def recompile() -> None:
+    """Drop the compiled pipelines and scanners, i.e. after changing the ``pattern`` of a mask
+    """
+    _compile.cache_clear()
+    get_scanner.cache_clear()
+
+
+def pipeline(profile: str = DEFAULT_PROFILE, skip: Optional[Iterable[str]] = None, pipel: Any = None) -> Pipeline:
+    """The compiled pipeline of ``profile``, built once and cached
+
+    :param skip: Names of masks of the profile not to run
+    :param pipel: The NER pipeline, the process wide model by default
+    """
+    return _compile(profile, tuple(sorted(set(skip or ()))), pipel)
+
+
+@lru_cache(maxsize=64)
+def _compile(profile: str, skip: Tuple[str, ...], pipel: Any) -> Pipeline:
+    compiled = Pipeline(resolve(profile, skip), pipel=pipel, name=profile)
+    logging.debug(f"Compiled {compiled!r}")
+    return compiled
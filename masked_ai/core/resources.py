@@ -0,0 +1,60 @@
+"""Lazy loading of the heavy resources (NLTK and its corpora)
+
+Nothing here is imported or downloaded until a mask that needs it runs. In offline mode
+(`set_offline` or ``MASKED_AI_OFFLINE=1``) missing corpora are never downloaded, a ``LookupError``
+is raised instead, and the NER models are only loaded from the local cache.
+"""
+import os
+import threading
+from types import ModuleType
+from typing import Optional
+
+OFFLINE_ENV = "MASKED_AI_OFFLINE"
+
+# resource name -> path used by `nltk.data.find`
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger',
+    'maxent_ne_chunker': 'chunkers/maxent_ne_chunker',
+    'words': 'corpora/words',
+}
+
+_lock = threading.Lock()
+_offline: Optional[bool] = None
+_nltk: Optional[ModuleType] = None
+
+
+def set_offline(offline: Optional[bool] = True) -> None:
+    """Never download anything, fail fast if a resource is missing
+
+    :param offline: None to fall back to the ``MASKED_AI_OFFLINE`` environment variable
+    """
+    global _offline
+    _offline = offline
+
+
+def is_offline() -> bool:
+    if _offline is not None:
+        return _offline
+    return os.environ.get(OFFLINE_ENV, "").lower() in ("1", "true", "yes")
+
+
+def nltk() -> ModuleType:
+    """The nltk module, with all the corpora the masks need, loaded once per process
+    """
+    global _nltk
+    if _nltk is None:
+        with _lock:
+            if _nltk is None:
+                import nltk as _module
+
+                for name, path in NLTK_RESOURCES.items():
+                    try:
+                        _module.data.find(path)
+                    except LookupError:
+                        if is_offline():
+                            raise LookupError(f"NLTK resource '{name}' is missing and offline mode is enabled, "
+                                              f"run `python -m nltk.downloader {name}` first")
+                        _module.download(name, quiet=True)
+                _nltk = _module
+    return _nltk
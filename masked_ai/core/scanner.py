@@ -0,0 +1,155 @@
+"""Single pass scanning over all the regex based masks
+"""
+import mmap
+import re
+from collections import Counter
+from functools import cached_property, lru_cache
+from typing import Dict, Iterator, List, Optional, Pattern, Sequence, Tuple, Type, Union
+
+from masked_ai.core.masks import MaskBase, Span
+
+_INLINE_FLAGS = (
+    (re.IGNORECASE, "i"),
+    (re.MULTILINE, "m"),
+    (re.DOTALL, "s"),
+    (re.VERBOSE, "x"),
+)
+
+
+class Scanner:
+    """Merge the ``pattern`` of every regex mask into one pattern with a named group per mask
+
+    The data is scanned once, left to right, and the hit starting first wins: a value is masked
+    whole by the mask finding it from its beginning, even if a later piece of it is found by an
+    earlier mask (``john@example.com`` is an email, not ``john@`` and a link). Masks order only
+    decides between hits starting at the same position, the first one in ``masks`` wins.
+
+    Masks ``detected_by`` the same mask share its group, every hit is labelled by its `MaskBase.classify`.
+    A hit classified to a mask that is not in ``masks`` goes to the first mask of its group that is.
+
+    `scan_bytes` runs the same pattern over UTF-8 encoded data, without decoding it.
+    """
+    def __init__(self, masks: Sequence[Type[MaskBase]]) -> None:
+        self.masks = [mask for mask in masks if mask.regex_based()]
+        self._names = {mask.__name__ for mask in self.masks}
+        # the masks with a pattern, once each, and the mask their unclassified hits go to
+        detectors: List[Type[MaskBase]] = list(dict.fromkeys(mask.detected_by or mask for mask in self.masks))
+        self._by_name: Dict[str, Type[MaskBase]] = {mask.__name__: mask for mask in detectors}
+        self._fallback: Dict[str, str] = {}
+        for mask in self.masks:
+            self._fallback.setdefault((mask.detected_by or mask).__name__, mask.__name__)
+        parts = []
+        for mask in detectors:
+            pattern = str(mask.pattern)
+            inline = "".join(letter for flag, letter in _INLINE_FLAGS if mask.flags & flag)
+            if inline:
+                pattern = f"(?{inline}:{pattern})"
+            parts.append(f"(?P<{mask.__name__}>{pattern})")
+        self._pattern = "|".join(parts)
+        self.regex = re.compile(self._pattern) if parts else None
+
+    def scan(self, data: str, candidates: Optional[Counter] = None) -> Iterator[Span]:
+        """Yield the accepted hits of all the masks, in order of appearance
+
+        :param candidates: Count the raw hits per mask name, before `MaskBase.accept`, here. The hits
+            of a group are counted once, for its first mask
+        """
+        if self.regex is None:
+            return
+        for match in self.regex.finditer(data):
+            mask = self._by_name[str(match.lastgroup)]
+            fallback = self._fallback[mask.__name__]
+            if candidates is not None:
+                candidates[fallback] += 1
+            start, end = match.span()
+            if mask.accept(data, start, end):
+                label = mask.classify(data, start, end)
+                yield Span(start, end, label if label in self._names else fallback)
+
+    @cached_property
+    def bytes_regex(self) -> Optional[Pattern[bytes]]:
+        """The pattern compiled for bytes, ``\\d``, ``\\w``, ``\\b`` and case folding only know ASCII there
+        """
+        return re.compile(_bytes_pattern(self._pattern)) if self.regex is not None else None
+
+    def scan_bytes(
+        self,
+        data: Union[bytes, bytearray, memoryview, "mmap.mmap"],
+        pos: int = 0,
+        endpos: Optional[int] = None,
+        candidates: Optional[Counter] = None,
+    ) -> Iterator[Span]:
+        """`scan` of UTF-8 encoded ``data`` (i.e. a memory mapped file) from ``pos`` to ``endpos``, the
+        spans are byte offsets
+
+        `MaskBase.accept` and `MaskBase.classify` get the hit decoded, along with the ``_CONTEXT``
+        bytes around it.
+        """
+        regex = self.bytes_regex
+        if regex is None:
+            return
+        size = len(data)
+        endpos = size if endpos is None else endpos
+        for match in regex.finditer(data, pos, endpos):  # type: ignore[arg-type]
+            mask = self._by_name[str(match.lastgroup)]
+            fallback = self._fallback[mask.__name__]
+            if candidates is not None:
+                candidates[fallback] += 1
+            start, end = _char_boundaries(data, *match.span())
+            if start >= end:
+                continue
+            before = str(data[max(0, start - _CONTEXT):start], "utf-8", "replace")
+            value = str(data[start:end], "utf-8", "replace")
+            text = before + value + str(data[end:min(size, end + _CONTEXT)], "utf-8", "replace")
+            local_start, local_end = len(before), len(before) + len(value)
+            if mask.accept(text, local_start, local_end):
+                label = mask.classify(text, local_start, local_end)
+                yield Span(start, end, label if label in self._names else fallback)
+
+    def find_all(self, data: str) -> Dict[str, List[str]]:
+        """Same as calling ``find`` on every mask, but with a single pass over the data
+
+        :return: Mapping of mask name to the items it found
+        """
+        found: Dict[str, List[str]] = {mask.__name__: [] for mask in self.masks}
+        for span in self.scan(data):
+            found[span.label].append(data[span.start:span.end])
+        return found
+
+
+# escapes bytes patterns don't have, any other escape is matched too so that ``\\u`` is left alone
+_ESCAPE_RE = re.compile(r"\\(?:u([0-9a-fA-F]{4})|U([0-9a-fA-F]{8})|x([0-9a-fA-F]{2}))|\\.", re.DOTALL)
+
+
+def _bytes_pattern(pattern: str) -> bytes:
+    """``pattern`` for UTF-8 encoded data, the non ASCII characters it escapes are written as
+    their UTF-8 bytes
+    """
+    def unescape(match: "re.Match[str]") -> str:
+        code = match.group(1) or match.group(2) or match.group(3)
+        if code is None or int(code, 16) < 0x80:
+            return match.group()
+        return chr(int(code, 16))
+    return _ESCAPE_RE.sub(unescape, pattern).encode("utf-8")
+
+
+# bytes decoded on each side of a hit found by `Scanner.scan_bytes`, for the masks looking around it
+_CONTEXT = 128
+
+
+def _char_boundaries(data: Union[bytes, bytearray, memoryview, "mmap.mmap"], start: int, end: int) -> Tuple[int, int]:
+    """Shrink ``data[start:end]`` to whole UTF-8 characters. A character class of a pattern matches
+    the bytes of a multi-byte character one at a time, so a hit can start or end inside one
+    """
+    while start < end and data[start] & 0xC0 == 0x80:
+        start += 1
+    while end > start and end < len(data) and data[end] & 0xC0 == 0x80:
+        end -= 1
+    return start, end
+
+
+@lru_cache(maxsize=None)
+def get_scanner(masks: Tuple[Type[MaskBase], ...]) -> Scanner:
+    """Compiled scanners are cached per masks combination
+    """
+    return Scanner(masks)
@@ -0,0 +1,176 @@
+"""Where the time goes when masking: per mask timings and hit counts
+
+    masker = Masker(prompt, instrument=True)
+    print(format_stats(masker.get_stats()))
+
+    stats.subscribe(log_stats)          # every `Masker` reports to the hooks
+    collector = PrometheusCollector()
+    stats.subscribe(collector)
+    collector.render()                  # text exposition format
+
+Nothing is measured unless ``instrument`` is set or a hook is subscribed. The regex masks share
+a single scanner pass, its time is reported once as the ``scanner`` stage, see ``benchmarks.run``
+for the cost of each of them on its own.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from masked_ai.core.masks import Span
+
+
+class Timing(NamedTuple):
+    """Seconds, ``cpu`` is the CPU time of the calling thread
+    """
+    wall: float
+    cpu: float
+
+
+class MaskStats(NamedTuple):
+    """``candidates`` are the raw hits, ``accepted`` the ones left after the mask's own filters,
+    and ``kept`` the ones masked, after overlaps with earlier masks were dropped
+    """
+    name: str
+    timing: Timing
+    candidates: int
+    accepted: int
+    kept: int
+
+
+class MaskerStats(NamedTuple):
+    """``stages`` are ``prefilter`` (see `MaskBase.prefilter`), ``scanner`` (all the regex masks), every
+    other mask, ``overlaps`` and ``substitution``
+    """
+    size: int
+    masks: Tuple[MaskStats, ...]
+    stages: Dict[str, Timing]
+    total: Timing
+
+
+StatsHook = Callable[[MaskerStats], None]
+
+_hooks: List[StatsHook] = []
+
+
+def subscribe(hook: StatsHook) -> None:
+    """Call ``hook`` with the stats of every `Masker` from now on
+    """
+    _hooks.append(hook)
+
+
+def unsubscribe(hook: StatsHook) -> None:
+    _hooks.remove(hook)
+
+
+def enabled() -> bool:
+    return bool(_hooks)
+
+
+def emit(stats: MaskerStats) -> None:
+    for hook in list(_hooks):
+        try:
+            hook(stats)
+        except Exception as e:
+            logging.warning(f"Stats hook failed: {e}")
+
+
+class Recorder:
+    """Collects the timings and counts of one `Masker`
+    """
+    def __init__(self) -> None:
+        self._start = Timing(time.perf_counter(), time.thread_time())
+        self._stages: Dict[str, Timing] = {}
+        self._candidates: Counter = Counter()
+        self._accepted: Counter = Counter()
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            before = self._stages.get(stage, Timing(0.0, 0.0))
+            self._stages[stage] = Timing(before.wall + time.perf_counter() - wall, before.cpu + time.thread_time() - cpu)
+
+    def count(self, name: str, candidates: int, accepted: int) -> None:
+        self._candidates[name] += candidates
+        self._accepted[name] += accepted
+
+    def result(self, size: int, names: Iterable[str], spans: Iterable[Span]) -> MaskerStats:
+        """
+        :param names: The masks that ran, in order
+        :param spans: The spans that were masked
+        """
+        kept = Counter(span.label for span in spans)
+        masks = tuple(
+            MaskStats(name, self._stages.get(name, Timing(0.0, 0.0)), self._candidates[name], self._accepted[name], kept[name])
+            for name in names
+        )
+        total = Timing(time.perf_counter() - self._start.wall, time.thread_time() - self._start.cpu)
+        return MaskerStats(size, masks, dict(self._stages), total)
+
+
+def timer(recorder: Optional[Recorder], stage: str) -> ContextManager[None]:
+    """``recorder.time(stage)``, or nothing if there is no recorder
+    """
+    return recorder.time(stage) if recorder is not None else nullcontext()
+
+
+def format_stats(stats: MaskerStats) -> str:
+    """Human readable table, i.e. for ``--debug``
+    """
+    lines = [f"{stats.size} characters in {stats.total.wall * 1e3:.2f} ms (cpu {stats.total.cpu * 1e3:.2f} ms)"]
+    for stage, timing in stats.stages.items():
+        lines.append(f"  {stage:16s} {timing.wall * 1e3:10.3f} ms  cpu {timing.cpu * 1e3:10.3f} ms")
+    lines.append(f"  {'mask':16s} {'candidates':>10s} {'accepted':>10s} {'kept':>10s}")
+    for mask in stats.masks:
+        lines.append(f"  {mask.name:16s} {mask.candidates:10d} {mask.accepted:10d} {mask.kept:10d}")
+    return "\n".join(lines)
+
+
+def log_stats(stats: MaskerStats) -> None:
+    """Hook logging the stats of every `Masker` at debug level
+    """
+    logging.debug(format_stats(stats))
+
+
+class PrometheusCollector:
+    """Hook aggregating the stats of every `Masker`, `render` returns them in the Prometheus text format
+    """
+    def __init__(self, prefix: str = "masked_ai") -> None:
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._documents = 0
+        self._characters = 0
+        self._seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._hits: Counter = Counter()
+
+    def __call__(self, stats: MaskerStats) -> None:
+        with self._lock:
+            self._documents += 1
+            self._characters += stats.size
+            for stage, timing in stats.stages.items():
+                self._seconds[(stage, "wall")] += timing.wall
+                self._seconds[(stage, "cpu")] += timing.cpu
+            for mask in stats.masks:
+                self._hits[(mask.name, "candidates")] += mask.candidates
+                self._hits[(mask.name, "accepted")] += mask.accepted
+                self._hits[(mask.name, "kept")] += mask.kept
+
+    def render(self) -> str:
+        p = self.prefix
+        with self._lock:
+            lines = [
+                f"# TYPE {p}_documents_total counter",
+                f"{p}_documents_total {self._documents}",
+                f"# TYPE {p}_characters_total counter",
+                f"{p}_characters_total {self._characters}",
+                f"# TYPE {p}_stage_seconds_total counter",
+            ]
+            lines.extend(f'{p}_stage_seconds_total{{stage="{stage}",clock="{clock}"}} {seconds:.6f}' for (stage, clock), seconds in sorted(self._seconds.items()))
+            lines.append(f"# TYPE {p}_mask_hits_total counter")
+            lines.extend(f'{p}_mask_hits_total{{mask="{mask}",step="{step}"}} {count}' for (mask, step), count in sorted(self._hits.items()))
+        return "\n".join(lines) + "\n"
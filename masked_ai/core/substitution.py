@@ -0,0 +1,255 @@
+"""Span based masking and unmasking, the text is rebuilt once instead of calling ``str.replace`` per hit
+"""
+import re
+from array import array
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union, overload
+
+from masked_ai.core.masks import Span
+
+# any placeholder produced by `substitute`, i.e. <IPMask_12>
+PLACEHOLDER_RE = re.compile(r"<\w+?_\d+>")
+
+
+def settle_overlaps(groups: Sequence[Iterable[Span]]) -> List[Span]:
+    """Drop overlapping spans, a span from an earlier group always wins over a later one
+
+    Every group is merged into the spans kept so far in a single walk, linear in the number of spans.
+
+    :param groups: Spans per mask, in masks order
+
+    :return: Non overlapping spans sorted by position
+    """
+    kept: List[Span] = []
+    for group in groups:
+        merged: List[Span] = []
+        i = 0
+        for span in sorted(group):
+            if span.end <= span.start:
+                continue
+            # the spans kept before this one come first
+            while i < len(kept) and kept[i].start < span.start:
+                merged.append(kept[i])
+                i += 1
+            # must start after the previous one ends, and end before the next kept span starts
+            if merged and merged[-1].end > span.start:
+                continue
+            if i < len(kept) and kept[i].start < span.end:
+                continue
+            merged.append(span)
+        merged.extend(kept[i:])
+        kept = merged
+    return kept
+
+
+class Placeholders:
+    """The value <-> placeholder table, the same value always gets the same placeholder
+
+    Placeholders are numbered per label in order of appearance, i.e. ``<IPMask_1>``. One table
+    can be shared by many calls to `substitute` (i.e. all the chunks of a stream).
+    """
+    # `substitute` returns `lookup` itself and array backed offsets, see `CompactPlaceholders`
+    compact = False
+
+    def __init__(self) -> None:
+        self.lookup: Dict[str, str] = {}
+        self._placeholders: Dict[Tuple[str, str], str] = {}
+        self._counters: Dict[str, int] = {}
+
+    def placeholder(self, label: str, item: str) -> str:
+        placeholder = self._placeholders.get((label, item))
+        if placeholder is None:
+            placeholder = f"<{label}_{self._next_number(label)}>"
+            self._placeholders[(label, item)] = placeholder
+            self.lookup[placeholder] = item
+        return placeholder
+
+    def placeholder_at(self, data: str, start: int, end: int, label: str) -> str:
+        """`placeholder` of the value ``data[start:end]``
+        """
+        return self.placeholder(label, data[start:end])
+
+    def value(self, placeholder: str) -> Optional[str]:
+        """The value behind ``placeholder``, if it is known
+        """
+        return self.lookup.get(placeholder)
+
+    def unmask(self, data: str) -> str:
+        """Replace back every known placeholder in ``data``
+        """
+        def replace(match: "re.Match[str]") -> str:
+            value = self.value(match.group())
+            return match.group() if value is None else value
+        return PLACEHOLDER_RE.sub(replace, data)
+
+    def _next_number(self, label: str) -> int:
+        self._counters[label] = self._counters.get(label, 0) + 1
+        return self._counters[label]
+
+
+class _Values:
+    """The values of one label of `CompactPlaceholders`, value ``n`` is ``data[starts[n - 1]:starts[n - 1] + lengths[n - 1]]``
+    """
+    __slots__ = ("starts", "lengths", "numbers", "collisions")
+
+    def __init__(self) -> None:
+        self.starts = array("q")
+        self.lengths = array("q")
+        # hash of a value -> its number, the values whose hash was taken by another value are in ``collisions``
+        self.numbers: Dict[int, int] = {}
+        self.collisions: Dict[str, int] = {}
+
+    def add(self, start: int, end: int) -> int:
+        self.starts.append(start)
+        self.lengths.append(end - start)
+        return len(self.starts)
+
+
+class CompactLookup(Mapping[str, str]):
+    """Read only ``placeholder -> value`` view of `CompactPlaceholders`, a value is sliced from the
+    document when it is asked for. Iterates label by label
+    """
+    def __init__(self, placeholders: "CompactPlaceholders") -> None:
+        self._placeholders = placeholders
+
+    def __getitem__(self, placeholder: str) -> str:
+        value = self._placeholders.value(placeholder)
+        if value is None:
+            raise KeyError(placeholder)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        for label, values in list(self._placeholders._values.items()):
+            for number in range(1, len(values.starts) + 1):
+                yield f"<{label}_{number}>"
+
+    def __len__(self) -> int:
+        return sum(len(values.starts) for values in self._placeholders._values.values())
+
+
+class CompactPlaceholders(Placeholders):
+    """Placeholders of a single huge document, for millions of hits
+
+    The values are not copied, they are kept as (start, length) slices of ``data`` in arrays, one
+    pair per placeholder number and label. `lookup` is a `CompactLookup` view, and the offsets
+    `substitute` returns are `CompactOffsets`.
+    """
+    compact = True
+
+    def __init__(self, data: str) -> None:
+        super().__init__()
+        self.data = data
+        self._values: Dict[str, _Values] = {}
+        # read only, computed from the arrays
+        self.lookup = CompactLookup(self)  # type: ignore[assignment]
+
+    def placeholder(self, label: str, item: str) -> str:
+        start = self.data.find(item)
+        if start == -1:
+            raise ValueError("Compact placeholders only take values of their document")
+        return self.placeholder_at(self.data, start, start + len(item), label)
+
+    def placeholder_at(self, data: str, start: int, end: int, label: str) -> str:
+        if data is not self.data:
+            return self.placeholder(label, data[start:end])
+        values = self._values.get(label)
+        if values is None:
+            values = self._values[label] = _Values()
+        item = data[start:end]
+        key = hash(item)
+        number = values.numbers.get(key)
+        if number is None:
+            number = values.numbers[key] = values.add(start, end)
+        elif self._slice(values, number) != item:
+            # another value has the same hash
+            number = values.collisions.get(item, 0)
+            if not number:
+                number = values.collisions[item] = values.add(start, end)
+        return f"<{label}_{number}>"
+
+    def value(self, placeholder: str) -> Optional[str]:
+        label, _, number = placeholder[1:-1].rpartition("_")
+        values = self._values.get(label)
+        if values is None or not placeholder.startswith("<") or not placeholder.endswith(">") or not number.isdigit():
+            return None
+        if not 0 < int(number) <= len(values.starts):
+            return None
+        return self._slice(values, int(number))
+
+    def _slice(self, values: _Values, number: int) -> str:
+        start = values.starts[number - 1]
+        return self.data[start:start + values.lengths[number - 1]]
+
+
+Offset = Tuple[int, int, int, int]
+
+
+class CompactOffsets(Sequence[Offset]):
+    """The offsets map of `substitute` in a flat array, 4 integers per placeholder
+    """
+    def __init__(self) -> None:
+        self._values = array("q")
+
+    def append(self, offset: Offset) -> None:
+        self._values.extend(offset)
+
+    @overload
+    def __getitem__(self, index: int) -> Offset: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Offset]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Offset, Sequence[Offset]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        a, b, c, d = self._values[4 * index:4 * index + 4]
+        return a, b, c, d
+
+    def __len__(self) -> int:
+        return len(self._values) // 4
+
+
+def substitute(
+    data: str,
+    spans: Sequence[Span],
+    placeholders: Optional[Placeholders] = None,
+) -> Tuple[str, Mapping[str, str], Sequence[Offset]]:
+    """Build the masked data with a single join
+
+    :param spans: Non overlapping spans sorted by position, see `settle_overlaps`
+    :param placeholders: Table to take the placeholders from, a new one by default
+
+    :return: The masked data, the lookup table to reconstruct it (only the placeholders it contains, or the
+        whole table of compact placeholders) and the offsets map, (masked start, masked end, original start,
+        original end) per placeholder
+    """
+    if placeholders is None:
+        placeholders = Placeholders()
+    lookup: Dict[str, str] = {}
+    offsets: Union[List[Offset], CompactOffsets] = CompactOffsets() if placeholders.compact else []
+    parts = []
+    position = 0
+    length = 0
+    for start, end, label in spans:
+        placeholder = placeholders.placeholder_at(data, start, end, label)
+        if not placeholders.compact:
+            lookup[placeholder] = data[start:end]
+        parts.append(data[position:start])
+        length += start - position
+        parts.append(placeholder)
+        offsets.append((length, length + len(placeholder), start, end))
+        length += len(placeholder)
+        position = end
+    parts.append(data[position:])
+    return "".join(parts), placeholders.lookup if placeholders.compact else lookup, offsets
+
+
+def unmask(data: str, lookup: Mapping[str, str]) -> str:
+    """Replace back every known placeholder in ``data`` with a single pass
+    """
+    if not lookup:
+        return data
+    return PLACEHOLDER_RE.sub(lambda m: lookup.get(m.group(), m.group()), data)
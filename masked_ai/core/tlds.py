@@ -0,0 +1,122 @@
+"""Top level domains recognised by `LinkMask`, compiled into a trie shaped regex
+
+    from masked_ai.core import tlds
+    tlds.set_tlds(tlds.read_public_suffix_list("public_suffix_list.dat"))
+
+The regex tries the first letter of the top level domain once instead of every alternative in
+turn, so its cost does not grow with the number of domains. Longer domains are still preferred
+over their prefixes (``.community`` over ``.com``), the same as the longest first alternation.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+# the defaults, longest first
+TLDS: Tuple[str, ...] = (
+    "international", "construction", "contractors", "enterprises", "photography", "immobilien",
+    "management", "technology", "directory", "education", "equipment", "institute", "marketing",
+    "solutions", "builders", "clothing", "computer", "democrat", "diamonds", "graphics", "holdings",
+    "lighting", "plumbing", "training", "ventures", "academy", "careers", "company", "domains",
+    "florist", "gallery", "guitars", "holiday", "kitchen", "recipes", "shiksha", "singles",
+    "support", "systems", "agency", "berlin", "camera", "center", "coffee", "estate", "kaufen",
+    "luxury", "monash", "museum", "photos", "repair", "social", "tattoo", "travel", "viajes",
+    "voyage", "build", "cheap", "codes", "dance", "email", "glass", "house", "ninja", "photo",
+    "shoes", "solar", "today", "aero", "arpa", "asia", "bike", "buzz", "camp", "club", "coop",
+    "farm", "gift", "guru", "info", "jobs", "kiwi", "land", "limo", "link", "menu", "mobi", "moda",
+    "name", "pics", "pink", "post", "rich", "ruhr", "sexy", "tips", "wang", "wien", "zone", "biz",
+    "cab", "cat", "ceo", "com", "edu", "gov", "int", "mil", "net", "onl", "org", "pro", "red",
+    "tel", "uno", "xxx", "ac", "ad", "ae", "af", "ag", "ai", "al", "am", "an", "ao", "aq", "ar",
+    "as", "at", "au", "aw", "ax", "az", "ba", "bb", "bd", "be", "bf", "bg", "bh", "bi", "bj", "bm",
+    "bn", "bo", "br", "bs", "bt", "bv", "bw", "by", "bz", "ca", "cc", "cd", "cf", "cg", "ch", "ci",
+    "ck", "cl", "cm", "cn", "co", "cr", "cu", "cv", "cw", "cx", "cy", "cz", "de", "dj", "dk", "dm",
+    "do", "dz", "ec", "ee", "eg", "er", "es", "et", "eu", "fi", "fj", "fk", "fm", "fo", "fr", "ga",
+    "gb", "gd", "ge", "gf", "gg", "gh", "gi", "gl", "gm", "gn", "gp", "gq", "gr", "gs", "gt", "gu",
+    "gw", "gy", "hk", "hm", "hn", "hr", "ht", "hu", "id", "ie", "il", "im", "in", "io", "iq", "ir",
+    "is", "it", "je", "jm", "jo", "jp", "ke", "kg", "kh", "ki", "km", "kn", "kp", "kr", "kw", "ky",
+    "kz", "la", "lb", "lc", "li", "lk", "lr", "ls", "lt", "lu", "lv", "ly", "ma", "mc", "md", "me",
+    "mg", "mh", "mk", "ml", "mm", "mn", "mo", "mp", "mq", "mr", "ms", "mt", "mu", "mv", "mw", "mx",
+    "my", "mz", "na", "nc", "ne", "nf", "ng", "ni", "nl", "no", "np", "nr", "nu", "nz", "om", "pa",
+    "pe", "pf", "pg", "ph", "pk", "pl", "pm", "pn", "pr", "ps", "pt", "pw", "py", "qa", "re", "ro",
+    "rs", "ru", "rw", "sa", "sb", "sc", "sd", "se", "sg", "sh", "si", "sj", "sk", "sl", "sm", "sn",
+    "so", "sr", "st", "su", "sv", "sx", "sy", "sz", "tc", "td", "tf", "tg", "th", "tj", "tk", "tl",
+    "tm", "tn", "to", "tp", "tr", "tt", "tv", "tw", "tz", "ua", "ug", "uk", "us", "uy", "uz", "va",
+    "vc", "ve", "vg", "vi", "vn", "vu", "wf", "ws", "ye", "yt", "za", "zm", "zw",
+)
+
+# a link starts with a scheme, ``www.``, or a host that isn't the continuation of a longer one, so
+# a long dotted string is only tried from its first character
+_LINK_START = r"(?:https?://|www\d{0,3}[.]|(?<![a-z0-9.\-]))"
+_LINK_PATH = r"""(?:/[^\s()<>]+[^\s`!()\[\]{};:\'".,<>?\xab\xbb\u201c\u201d\u2018\u2019])?"""
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """A regex matching any of ``words``, the longest one when several match
+
+    Words sharing a prefix share the regex for it, i.e. ``co(?:m(?:pany)?)?``.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word.lower():
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [_escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1:
+            alternatives = branches[0]
+            atom = len(_unescape(alternatives)) == 1
+        elif all(len(_unescape(branch)) == 1 for branch in branches):
+            alternatives, atom = "[" + "".join(branches) + "]", True
+        else:
+            alternatives, atom = "(?:" + "|".join(branches) + ")", True
+        if "" not in node:
+            return alternatives
+        # greedy, the longer words are tried first
+        return f"{alternatives}?" if atom else f"(?:{alternatives})?"
+
+    return build(trie)
+
+
+def _escape(char: str) -> str:
+    return "\\" + char if char in "-.\\^[]" else char
+
+
+def _unescape(branch: str) -> str:
+    return branch[1:] if branch.startswith("\\") and len(branch) == 2 else branch
+
+
+def link_pattern(tlds: Iterable[str] = TLDS) -> str:
+    """The `LinkMask` pattern for these top level domains
+    """
+    return rf"({_LINK_START}[a-z0-9.\-]+[.](?:{trie_pattern(tlds)}){_LINK_PATH})"
+
+
+def read_public_suffix_list(path: str) -> List[str]:
+    """The top level domains of a local copy of https://publicsuffix.org/list/public_suffix_list.dat
+
+    Internationalized domains are converted to their ``xn--`` form, the only one `LinkMask` matches.
+    """
+    tlds = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            rule = line.split()[0] if line.strip() else ""
+            if not rule or rule.startswith("//"):
+                continue
+            label = rule.lstrip("!").rsplit(".", 1)[-1]
+            try:
+                tlds.add(label.encode("idna").decode("ascii").lower())
+            except UnicodeError:
+                continue
+    return sorted(tlds, key=lambda tld: (-len(tld), tld))
+
+
+def set_tlds(tlds: Iterable[str]) -> None:
+    """Make `LinkMask` match these top level domains from now on
+    """
+    from masked_ai.core import registry
+    from masked_ai.core.masks import LinkMask
+
+    LinkMask.pattern = link_pattern(tlds)
+    # the merged patterns are compiled again with the new one
+    registry.recompile()
@@ -0,0 +1,266 @@
+"""Placeholders shared across requests and conversations, the same value keeps the same placeholder
+
+    vault = Vault(max_size=100_000, ttl=24 * 3600, store=SQLiteStore("placeholders.db"))
+    masker = Masker(prompt, placeholders=vault)
+    vault.unmask(completion)
+
+The most recently used mappings are kept in memory, the least recently used ones are dropped
+past ``max_size``, and every mapping is forgotten ``ttl`` seconds after it was created. With a
+store, mappings dropped from memory are read back from it and survive a restart, so a value keeps
+its placeholder as long as it is not expired. Placeholder numbers are never reused.
+"""
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Callable, Deque, NamedTuple, Optional, Tuple
+
+from masked_ai.core.substitution import Placeholders
+
+
+class VaultStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+
+
+class VaultStore(ABC):
+    """Where a `Vault` keeps its mappings beyond memory
+    """
+    @abstractmethod
+    def get(self, label: str, item: str, now: float) -> Optional[Tuple[str, Optional[float]]]:
+        """
+        :return: The placeholder of ``item`` and when it expires, unless it is unknown or expired
+        """
+        pass
+
+    @abstractmethod
+    def value(self, placeholder: str, now: float) -> Optional[Tuple[str, str, Optional[float]]]:
+        """
+        :return: The label and value behind ``placeholder`` and when it expires, unless it is unknown or expired
+        """
+        pass
+
+    @abstractmethod
+    def add(self, label: str, item: str, expires: Optional[float], now: float) -> Tuple[str, Optional[float]]:
+        """Number and store a new placeholder for ``item``, unless another process just did
+
+        :return: The placeholder and when it expires
+        """
+        pass
+
+    @abstractmethod
+    def purge(self, now: float) -> int:
+        """Delete the expired mappings
+
+        :return: How many were deleted
+        """
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStore(VaultStore):
+    """Mappings in a SQLite database, it can be shared by many processes
+    """
+    def __init__(self, path: str) -> None:
+        # autocommit, transactions are explicit
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS placeholders (
+                placeholder TEXT PRIMARY KEY,
+                label TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires REAL,
+                UNIQUE (label, value)
+            );
+            CREATE INDEX IF NOT EXISTS placeholders_expires ON placeholders (expires);
+            CREATE TABLE IF NOT EXISTS counters (label TEXT PRIMARY KEY, number INTEGER NOT NULL);
+        """)
+
+    def get(self, label: str, item: str, now: float) -> Optional[Tuple[str, Optional[float]]]:
+        with self._lock:
+            return self._get(label, item, now)
+
+    def _get(self, label: str, item: str, now: float) -> Optional[Tuple[str, Optional[float]]]:
+        return self._connection.execute(
+            "SELECT placeholder, expires FROM placeholders WHERE label = ? AND value = ? AND (expires IS NULL OR expires > ?)",
+            (label, item, now),
+        ).fetchone()
+
+    def value(self, placeholder: str, now: float) -> Optional[Tuple[str, str, Optional[float]]]:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT label, value, expires FROM placeholders WHERE placeholder = ? AND (expires IS NULL OR expires > ?)",
+                (placeholder, now),
+            ).fetchone()
+
+    def add(self, label: str, item: str, expires: Optional[float], now: float) -> Tuple[str, Optional[float]]:
+        with self._lock:
+            # the write lock is taken right away, the number and the row are added atomically
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                found = self._get(label, item, now)
+                if found is None:
+                    self._connection.execute(
+                        "INSERT INTO counters (label, number) VALUES (?, 1) ON CONFLICT (label) DO UPDATE SET number = number + 1",
+                        (label,),
+                    )
+                    number, = self._connection.execute("SELECT number FROM counters WHERE label = ?", (label,)).fetchone()
+                    found = (f"<{label}_{number}>", expires)
+                    # an expired mapping of the same value is replaced
+                    self._connection.execute("DELETE FROM placeholders WHERE label = ? AND value = ?", (label, item))
+                    self._connection.execute("INSERT INTO placeholders VALUES (?, ?, ?, ?)", (found[0], label, item, expires))
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        return found
+
+    def purge(self, now: float) -> int:
+        with self._lock:
+            return self._connection.execute("DELETE FROM placeholders WHERE expires <= ?", (now,)).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class Vault(Placeholders):
+    """`Placeholders` that outlive a single `Masker`, thread safe
+
+    Both directions (value -> placeholder and placeholder -> value) are dict lookups, the store
+    is only read on a memory miss.
+    """
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl: Optional[float] = None,
+        store: Optional[VaultStore] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        :param max_size: Most mappings kept in memory, unbounded by default
+        :param ttl: Seconds a mapping lives after it was created, forever by default
+        :param store: Where mappings are kept beyond memory, i.e. `SQLiteStore`
+        """
+        super().__init__()
+        if max_size is not None and max_size <= 0:
+            raise ValueError("max_size must be positive")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.store = store
+        self._clock = clock
+        self._lock = threading.RLock()
+        # placeholder -> (label, value, expires), least recently used first
+        self._entries: "OrderedDict[str, Tuple[str, str, Optional[float]]]" = OrderedDict()
+        # (expires, placeholder) in creation order, so expired entries are dropped without a full scan
+        self._expiry: Deque[Tuple[float, str]] = deque()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def placeholder(self, label: str, item: str) -> str:
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            placeholder = self._placeholders.get((label, item))
+            if placeholder is not None and self._alive(placeholder, now):
+                self._entries.move_to_end(placeholder)
+                self._hits += 1
+                return placeholder
+
+            expires = now + self.ttl if self.ttl is not None else None
+            found = self.store.get(label, item, now) if self.store is not None else None
+            if found is not None:
+                self._hits += 1
+                placeholder, expires = found
+            else:
+                self._misses += 1
+                if self.store is not None:
+                    placeholder, expires = self.store.add(label, item, expires, now)
+                else:
+                    placeholder = f"<{label}_{self._next_number(label)}>"
+            self._remember(placeholder, label, item, expires)
+            return placeholder
+
+    def value(self, placeholder: str) -> Optional[str]:
+        with self._lock:
+            now = self._clock()
+            if placeholder in self._entries:
+                if not self._alive(placeholder, now):
+                    return None
+                self._entries.move_to_end(placeholder)
+                return self._entries[placeholder][1]
+            found = self.store.value(placeholder, now) if self.store is not None else None
+            if found is None:
+                return None
+            label, item, expires = found
+            self._remember(placeholder, label, item, expires)
+            return item
+
+    def purge(self) -> None:
+        """Drop every expired mapping, from memory and from the store
+        """
+        with self._lock:
+            now = self._clock()
+            for placeholder in [p for p, (_, _, expires) in self._entries.items() if expires is not None and expires <= now]:
+                self._forget(placeholder)
+                self._expirations += 1
+            if self.store is not None:
+                self.store.purge(now)
+
+    def stats(self) -> VaultStats:
+        """Hits and misses count the values given a placeholder, ``size`` is the mappings in memory
+        """
+        with self._lock:
+            return VaultStats(self._hits, self._misses, self._evictions, self._expirations, len(self._entries))
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _alive(self, placeholder: str, now: float) -> bool:
+        expires = self._entries[placeholder][2]
+        if expires is not None and expires <= now:
+            self._forget(placeholder)
+            self._expirations += 1
+            return False
+        return True
+
+    def _expire(self, now: float) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            _, placeholder = self._expiry.popleft()
+            entry = self._entries.get(placeholder)
+            if entry is not None and entry[2] is not None and entry[2] <= now:
+                self._forget(placeholder)
+                self._expirations += 1
+
+    def _remember(self, placeholder: str, label: str, item: str, expires: Optional[float]) -> None:
+        self._entries[placeholder] = (label, item, expires)
+        self._placeholders[(label, item)] = placeholder
+        self.lookup[placeholder] = item
+        if expires is not None:
+            self._expiry.append((expires, placeholder))
+        if self.max_size is not None:
+            while len(self._entries) > self.max_size:
+                self._forget(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _forget(self, placeholder: str) -> None:
+        label, item, _ = self._entries.pop(placeholder)
+        self._placeholders.pop((label, item), None)
+        self.lookup.pop(placeholder, None)
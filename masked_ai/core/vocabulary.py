@@ -0,0 +1,361 @@
+"""Words that are never masked as names, i.e. the english dictionary and our domain vocabulary
+
+The index is a case folded frozenset, built once per process on first use, so checking a candidate is O(1).
+Extra vocabularies (one word per line, ``#`` for comments) can be added with `add_vocabulary`,
+or listed in the ``MASKED_AI_VOCABULARY`` environment variable (separated by ``os.pathsep``).
+
+Building the dictionary part is slow, so it is pickled once to ``MASKED_AI_CACHE_DIR``
+(``~/.cache/masked_ai`` by default) and later processes only load it.
+"""
+import hashlib
+import os
+import pickle
+import threading
+from typing import FrozenSet, Iterable, List, Optional, Set
+
+VOCABULARY_ENV = "MASKED_AI_VOCABULARY"
+CACHE_ENV = "MASKED_AI_CACHE_DIR"
+
+DOMAIN_WORDS = (
+    "NetAct",
+    "cell",
+    "support",
+    "backup",
+    "restore",
+    "case",
+    "Java",
+    "basic",
+    "issue",
+    "Once",
+    "feature",
+    "enabled",
+    "helpful",
+    "failure",
+    "set",
+    "resolved",
+    "button",
+    "monitor",
+    "follow",
+    "up",
+    "PM",
+    "CM",
+    "FM",
+    "need",
+    "node",
+    "startup",
+    "dump",
+    "site",
+    "check",
+    "checked",
+    "serial",
+    "sleep",
+    "silent",
+    "config",
+    "change",
+    "changes",
+    "normal",
+    "operations",
+    "operation",
+    "upgrade",
+    "traffic",
+    "title",
+    "control",
+    "network",
+    "plane",
+    "snapshot",
+    "installation",
+    "unknown",
+    "release",
+    "software",
+    "transport",
+    "alarm",
+    "alarms",
+    "time",
+    "lte",
+    "attempts",
+    "setup",
+    "degraded",
+    "detection",
+    "sleeping",
+    "due",
+    "reset",
+    "recovery",
+    "manual",
+    "manager",
+    "download",
+    "suspect",
+    "clear",
+    "power",
+    "setting",
+    "settings",
+    "confirm",
+    "fix",
+    "correction",
+    "top",
+    "reference",
+    "capture",
+    "debug",
+    "rf",
+    "recovered",
+    "cells",
+    "logs",
+    "log",
+    "seconds",
+    "antennas",
+    "issues",
+    "labs",
+    "details",
+    "monitoring",
+    "behaviour",
+    "timestamp",
+    "wireshark",
+    "attempted",
+    "apears",
+    "info",
+    "delivered",
+    "workaround",
+    "seems",
+    "modulename",
+    "steps",
+    "updates",
+    "jamming",
+    "scheduler",
+    "slices",
+    "stat",
+    "teams",
+    "dedicated",
+    "values",
+    "failures",
+    "email",
+    "errors",
+    "syslog",
+    "snapshots",
+    "modules",
+    "msg",
+    "algo",
+    "networks",
+    "support",
+    "cleared",
+    "ip",
+    "online",
+    "markets",
+    "Reestablishment",
+    "pls",
+    "jan",
+    "feb",
+    "mar",
+    "apr",
+    "may",
+    "jun",
+    "jul",
+    "aug",
+    "sep",
+    "oct",
+    "nov",
+    "dec",
+    "timezone",
+    "managed",
+    "calls",
+    "files",
+    "units",
+    "apears",
+    "sites",
+    "handover",
+    "needed",
+    "Reconfiguration",
+    "blocks",
+    "detected",
+    "Exceeded",
+    "Traafic",
+    "newer",
+    "requested",
+    "answered",
+    "freq",
+    "hours",
+    "traces",
+    "measurements",
+    "rejects",
+    "avg",
+    "waveform",
+    "roots",
+    "groups",
+    "cables",
+    "segments",
+    "intra",
+    "fourier",
+    "earlier",
+    "configurations"
+    "Served",
+    "multi",
+    "ids",
+    "completed",
+    "acustic",
+    "specifications",
+    "expired",
+    "muted",
+    "drops",
+    "proactive",
+    "scheduling",
+    "looks",
+    "findings",
+    "observed",
+    "improvements",
+    "workflow",
+    "enabling",
+    "subnet",
+    "embedded",
+    "regards",
+    "problems",
+    "dependencies",
+    "preambles",
+    "optimized",
+    "mutes",
+    "discarded",
+    "neighbour",
+    "affirmed",
+    "guaranteed",
+    "customized",
+    "stats",
+    "availabilty",
+    "counters",
+    "reached",
+    "ipv4",
+    "ipv6",
+    "levels",
+    "ports",
+    "resources",
+    "cpu",
+    "transmitted",
+    "app",
+    "configuring",
+    "optimizer",
+    "relations",
+    "radios",
+    "packets",
+    "ethernet",
+    "codec",
+    "offline",
+    "standalone",
+    "bandwidth",
+    "rollout",
+    "oriented",
+    "sharing",
+    "thresholds",
+    "firmware",
+    "backed",
+    "shared",
+    "initializing",
+    "outages",
+    "handovers",
+    "requests",
+    "screenshot",
+    "improved",
+    "runtime",
+    "allocation",
+    "channels",
+    "workorder",
+    "delayed",
+    "dropped",
+    "aggregated",
+    "configurations",
+    "jira",
+    "labels",
+    "managing",
+)
+
+_lock = threading.Lock()
+_allowed_names: Optional[FrozenSet[str]] = None
+_extra_words: Set[str] = set()
+
+
+def read_vocabulary(path: str) -> List[str]:
+    """Words from a vocabulary file, one word per line
+    """
+    with open(path, encoding="utf-8") as f:
+        words = [line.strip() for line in f]
+    return [word for word in words if word and not word.startswith("#")]
+
+
+def cache_path() -> str:
+    """Where the dictionary part of the index is cached, keyed by the english_words version and the domain words
+    """
+    from importlib import metadata
+
+    directory = os.environ.get(CACHE_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "masked_ai")
+    try:
+        version = metadata.version("english-words")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    key = hashlib.sha1("\n".join((version,) + DOMAIN_WORDS).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(directory, f"allowed_names-{key}.pickle")
+
+
+def _base_names() -> FrozenSet[str]:
+    """The english dictionary and the domain words, loaded from the cache if possible
+    """
+    path = cache_path()
+    try:
+        with open(path, "rb") as f:
+            names = pickle.load(f)
+        if isinstance(names, frozenset):
+            return names
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+
+    from english_words import get_english_words_set
+
+    words = set(get_english_words_set(['web2'], lower=True))
+    words.update(DOMAIN_WORDS)
+    names = frozenset(word.casefold() for word in words)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(names, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        # read only home directory, keep it in memory only
+        pass
+    return names
+
+
+def build_allowed_names(extra_words: Iterable[str] = ()) -> FrozenSet[str]:
+    """Build the case folded index from the english dictionary, the domain words and ``extra_words``
+    """
+    words = set(extra_words)
+    for path in os.environ.get(VOCABULARY_ENV, "").split(os.pathsep):
+        if path:
+            words.update(read_vocabulary(path))
+    words.update(_extra_words)
+    names = _base_names()
+    if words:
+        names = names | frozenset(word.casefold() for word in words)
+    return names
+
+
+def allowed_names() -> FrozenSet[str]:
+    """The process wide index, built on first use
+    """
+    global _allowed_names
+    if _allowed_names is None:
+        with _lock:
+            if _allowed_names is None:
+                _allowed_names = build_allowed_names()
+    return _allowed_names
+
+
+def add_vocabulary(path: str) -> None:
+    """Add the words of a vocabulary file to the process wide index
+    """
+    global _allowed_names
+    words = read_vocabulary(path)
+    with _lock:
+        _extra_words.update(words)
+        if _allowed_names is not None:
+            _allowed_names = _allowed_names | frozenset(word.casefold() for word in words)
+
+
+def is_allowed(word: str) -> bool:
+    """True if ``word`` is a known word, and should not be masked as a name
+    """
+    return word.casefold() in allowed_names()
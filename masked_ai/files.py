@@ -0,0 +1,180 @@
+"""Masking of files as bytes, the file is memory mapped and never decoded whole
+
+    lookup = mask_path("syslog", "syslog.masked", profile="fast-regex-only")
+
+    python -m masked_ai.files --profile fast-regex-only --lookup lookup.json syslog > syslog.masked
+
+The regex masks run on the bytes of the file (UTF-8 or ASCII), see `Scanner.scan_bytes`. Only
+the masks that are not regex masks (NLTK names, NER) get the text decoded, one segment at a time.
+Segments end after a newline, a value is never found across two of them. The output is written
+through a buffered writer, straight from the memory map.
+
+Patterns work on bytes as on ASCII text, ``\\d``, ``\\w`` and ``\\b`` don't know the other
+characters, i.e. an IP address right after an accented letter is still masked.
+"""
+import argparse
+import io
+import json
+import mmap
+import sys
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from masked_ai.core import registry
+from masked_ai.core.analysis import Analysis
+from masked_ai.core.masks import Span
+from masked_ai.core.registry import Pipeline
+from masked_ai.core.substitution import Placeholders, settle_overlaps
+
+if TYPE_CHECKING:
+    import torch
+
+
+def _byte_spans(text: str, spans: Iterable[Span], offset: int) -> List[Span]:
+    """``spans`` of ``text`` as byte offsets of the file, ``text`` starting at byte ``offset``
+    """
+    spans = sorted(spans)
+    if text.isascii():
+        return [Span(span.start + offset, span.end + offset, span.label) for span in spans]
+    positions = sorted({position for span in spans for position in (span.start, span.end)})
+    # one pass, every piece between two positions is encoded once
+    bytes_at: Dict[int, int] = {}
+    char = byte = 0
+    for position in positions:
+        byte += len(text[char:position].encode("utf-8", "surrogateescape"))
+        char = position
+        bytes_at[position] = byte
+    return [Span(bytes_at[span.start] + offset, bytes_at[span.end] + offset, span.label) for span in spans]
+
+
+class FileMasker:
+    """Mask files with the same masks as `Masker`, from their bytes, the lookup table is shared by
+    every file masked
+    """
+    def __init__(
+        self,
+        skip: Optional[List] = None,
+        pipel: Optional["torch.nn.Module"] = None,
+        profile: str = registry.DEFAULT_PROFILE,
+        pipeline: Optional[Pipeline] = None,
+        placeholders: Optional[Placeholders] = None,
+        segment_size: int = 1 << 20,
+        buffer_size: int = 1 << 20,
+    ) -> None:
+        """
+        :param profile: Which masks to run, see `masked_ai.core.registry`
+        :param pipeline: The compiled masks to run, replaces ``profile``, ``skip`` and ``pipel``
+        :param segment_size: Bytes scanned at once, and decoded for the masks that are not regex masks
+        :param buffer_size: Bytes buffered before a write to the output
+        """
+        if segment_size <= 0:
+            raise ValueError("segment_size must be positive")
+        self.pipeline = pipeline if pipeline is not None else registry.pipeline(profile, skip=skip, pipel=pipel)
+        self.placeholders = placeholders if placeholders is not None else Placeholders()
+        self.segment_size = segment_size
+        self.buffer_size = buffer_size
+        # (label, value) -> encoded placeholder, values already seen are never decoded again
+        self._encoded: Dict[Tuple[str, bytes], bytes] = {}
+
+    def mask_path(self, path: str, output: Union[str, BinaryIO]) -> int:
+        """Write ``path`` masked to ``output``
+
+        :param output: File path, or binary file object (i.e. ``sys.stdout.buffer``), left open
+        :return: Bytes read
+        """
+        with ExitStack() as stack:
+            out = stack.enter_context(open(output, "wb", buffering=self.buffer_size)) if isinstance(output, str) else output
+            f = stack.enter_context(open(path, "rb"))
+            size = self._size(f)
+            if size == 0:
+                return 0
+            data = stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            view = memoryview(data)
+            # registered last, released first, the map can't close while a view is exported
+            stack.callback(view.release)
+            position = 0
+            for start, end in self._segments(data):
+                for span in self._detect(data, view, start, end):
+                    out.write(view[position:span.start])
+                    out.write(self._placeholder(data, span))
+                    position = span.end
+            out.write(view[position:])
+        return size
+
+    def get_lookup(self) -> Mapping[str, str]:
+        return self.placeholders.lookup
+
+    @staticmethod
+    def _size(f: BinaryIO) -> int:
+        f.seek(0, io.SEEK_END)
+        size = f.tell()
+        f.seek(0)
+        return size
+
+    def _segments(self, data: mmap.mmap) -> Iterable[Tuple[int, int]]:
+        size = len(data)
+        start = 0
+        while start < size:
+            end = min(start + self.segment_size, size)
+            if end < size:
+                newline = data.rfind(b"\n", start, end)
+                if newline != -1:
+                    end = newline + 1
+                else:
+                    # a single line longer than a segment, at least cut between two characters
+                    while end < size and data[end] & 0xC0 == 0x80:
+                        end += 1
+            yield start, end
+            start = end
+
+    def _detect(self, data: mmap.mmap, view: memoryview, start: int, end: int) -> List[Span]:
+        pipeline = self.pipeline
+        scanned: Dict[str, List[Span]] = {mask.__name__: [] for mask in pipeline.scanner.masks}
+        for span in pipeline.scanner.scan_bytes(data, start, end):
+            scanned[span.label].append(span)
+        document = Analysis(str(view[start:end], "utf-8", "surrogateescape")) if pipeline.runners else None
+        # the decoded masks skip the segments their prefilter rules out, the regex masks run over all of them
+        ruled_out = pipeline.ruled_out(document.data, pipeline.runners) if document is not None else frozenset()
+        groups: List[List[Span]] = []
+        for name in pipeline.names:
+            if name in scanned:
+                groups.append(scanned[name])
+            elif document is not None and name not in ruled_out:
+                groups.append(_byte_spans(document.data, pipeline.runners[name].find_spans_in(document), start))
+        return settle_overlaps(groups)
+
+    def _placeholder(self, data: mmap.mmap, span: Span) -> bytes:
+        value = data[span.start:span.end]
+        encoded = self._encoded.get((span.label, value))
+        if encoded is None:
+            placeholder = self.placeholders.placeholder(span.label, value.decode("utf-8", "replace"))
+            encoded = self._encoded[(span.label, value)] = placeholder.encode("utf-8")
+        return encoded
+
+
+def mask_path(path: str, output: Union[str, BinaryIO], **kwargs: Any) -> Mapping[str, str]:
+    """Write the file at ``path`` masked to ``output``, see `FileMasker`
+
+    :return: The lookup table
+    """
+    masker = FileMasker(**kwargs)
+    masker.mask_path(path, output)
+    return masker.get_lookup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cado Security Masked-AI, files")
+    parser.add_argument("--lookup", action="store", dest="lookup", help="Write the lookup table to this JSON file", default=None)
+    parser.add_argument("--output", action="store", dest="output", help="Write the masked file here, stdout by default", default=None)
+    parser.add_argument("--profile", action="store", default=registry.DEFAULT_PROFILE, help=f"Masks to run, one of {', '.join(registry.profiles())}")
+    parser.add_argument("--segment-size", action="store", type=int, default=1 << 20, help="Bytes scanned at once")
+    parser.add_argument("path", help="File to mask")
+    args = parser.parse_args()
+
+    masker = FileMasker(profile=args.profile, segment_size=args.segment_size)
+    masker.mask_path(args.path, args.output or sys.stdout.buffer)
+    sys.stdout.flush()
+
+    if args.lookup:
+        with open(args.lookup, "w") as f:
+            json.dump(dict(masker.get_lookup()), f)
@@ -2,13 +2,21 @@
 """
 import sys
 import logging
-from typing import Optional, List
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, List, Sequence
 import argparse
 import subprocess
+from collections import Counter
 
-import torch
+from masked_ai.core import chunking, registry, stats
+from masked_ai.core.analysis import Analysis
+from masked_ai.core.cache import DetectionCache
+from masked_ai.core.masks import Span
+from masked_ai.core.registry import Pipeline
+from masked_ai.core.stats import MaskerStats, Recorder, format_stats, timer
+from masked_ai.core.substitution import CompactPlaceholders, Offset, Placeholders, settle_overlaps, substitute, unmask
 
-from masked_ai.core.masks import MaskBase
+if TYPE_CHECKING:
+    import torch
 
 
 class Masker:
@@ -19,53 +27,169 @@ class Masker:
         data: str,
         skip: Optional[List] = None,
         debug: bool = False,
-        pipel: Optional[torch.nn.Module] = None,
+        pipel: Optional["torch.nn.Module"] = None,
+        precomputed: Optional[Dict[str, List[Span]]] = None,
+        placeholders: Optional[Placeholders] = None,
+        cache: Optional[DetectionCache] = None,
+        instrument: bool = False,
+        profile: str = registry.DEFAULT_PROFILE,
+        pipeline: Optional[Pipeline] = None,
+        compact: bool = False,
     ) -> None:
         """
+        :param precomputed: Spans per mask name, found beforehand (i.e. batched by `mask_many`)
+        :param placeholders: Placeholders table shared with other maskers (i.e. all the fields of one request),
+            or a `masked_ai.core.vault.Vault` to keep placeholders stable across requests
+        :param cache: Reuse the spans found in paragraphs seen before
+        :param instrument: Time every mask and count its hits, see `get_stats`. Always on when a
+            `masked_ai.core.stats` hook is subscribed
+        :param profile: Which masks to run, see `masked_ai.core.registry`
+        :param pipeline: The compiled masks to run, replaces ``profile``, ``skip`` and ``pipel``
+        :param compact: Keep the values as slices of ``data`` instead of copies, for huge documents with
+            millions of hits, see `masked_ai.core.substitution.CompactPlaceholders`. Unless ``placeholders`` is given
         """
         self.original_data = data
-        self.masked_data = data
-        self._mask_lookup = {}
-        for mask in MaskBase.__subclasses__():
-            if skip and mask.__name__ in skip:
-                if debug:
-                    logging.info(f"Skipping mask {mask.__name__}")
-                continue
-
-            if mask.__name__ == "NERNamesMASK":
-                # instantiate the NERNamesMASK class
-                mask = mask(pipel=pipel)
-                to_mask = mask.find(self.masked_data)
-                for i, (name, item) in enumerate(to_mask):
-                    lookup_name = f"<{name}_{i+1}>"
-                    self._mask_lookup[lookup_name] = item
-                    self.masked_data = self.masked_data.replace(item, lookup_name)
-            else: 
-                to_mask = mask.find(self.masked_data)
-                for i, item in enumerate(to_mask):
-                    lookup_name = f"<{mask.__name__}_{i+1}>"
-                    self._mask_lookup[lookup_name] = item
-                    self.masked_data = self.masked_data.replace(item, lookup_name)
+        if compact and placeholders is None:
+            placeholders = CompactPlaceholders(data)
+        self._stats: Optional[MaskerStats] = None
+        if pipeline is None:
+            pipeline = registry.pipeline(profile, skip=skip, pipel=pipel)
+        recorder = Recorder() if instrument or stats.enabled() else None
+        spans = self.detect(data, debug=debug, precomputed=precomputed, cache=cache, recorder=recorder, pipeline=pipeline)
+        with timer(recorder, "substitution"):
+            self.masked_data, self._mask_lookup, self._offsets = substitute(data, spans, placeholders)
+        if recorder is not None:
+            self._stats = recorder.result(len(data), pipeline.names, spans)
+            stats.emit(self._stats)
+
+    @staticmethod
+    def detect(
+        data: str,
+        skip: Optional[List] = None,
+        debug: bool = False,
+        pipel: Optional["torch.nn.Module"] = None,
+        precomputed: Optional[Dict[str, List[Span]]] = None,
+        cache: Optional[DetectionCache] = None,
+        recorder: Optional[Recorder] = None,
+        profile: str = registry.DEFAULT_PROFILE,
+        pipeline: Optional[Pipeline] = None,
+    ) -> List[Span]:
+        """Run all the masks over ``data``
+
+        :param cache: Run the masks only over the paragraphs that are not in ``cache``
+        :param recorder: Collects the timings and hit counts
+        :param pipeline: The compiled masks to run, replaces ``profile``, ``skip`` and ``pipel``
+
+        :return: The spans to mask, without overlaps and sorted by position
+        """
+        if pipeline is None:
+            pipeline = registry.pipeline(profile, skip=skip, pipel=pipel)
+        if cache is not None and not precomputed:
+            return Masker._detect_cached(data, cache, pipeline, debug=debug, recorder=recorder)
+        if debug:
+            logging.info(f"Running {pipeline!r}")
+        precomputed = precomputed or {}
+
+        # the masks that can't find anything in the data don't run at all
+        with timer(recorder, "prefilter"):
+            ruled_out = pipeline.ruled_out(data)
+
+        # all the regex based masks are found with a single pass over the data
+        scanned: Dict[str, List[Span]] = {mask.__name__: [] for mask in pipeline.scanner.masks}
+        candidates: Optional[Counter] = Counter() if recorder is not None else None
+        with timer(recorder, "scanner"):
+            for span in pipeline.scanner_without(ruled_out).scan(data, candidates):
+                scanned[span.label].append(span)
+
+        # spans per mask, in masks order, earlier masks win on overlaps. The other masks share
+        # the analyses of the document (tokens, tags...), each is only computed once
+        document = Analysis(data)
+        groups: List[List[Span]] = []
+        for name in pipeline.names:
+            if name in scanned:
+                groups.append(scanned[name])
+            elif name in precomputed:
+                groups.append(precomputed[name])
+            elif name in ruled_out:
+                groups.append([])
+            else:
+                with timer(recorder, name):
+                    groups.append(pipeline.runners[name].find_spans_in(document))
+            if recorder is not None and candidates is not None:
+                # regex masks count their raw hits in the scanner, the others only report what they kept
+                found = len(groups[-1])
+                recorder.count(name, candidates[name] if name in scanned else found, found)
+        with timer(recorder, "overlaps"):
+            return settle_overlaps(groups)
+
+    @staticmethod
+    def _detect_cached(
+        data: str,
+        cache: DetectionCache,
+        pipeline: Pipeline,
+        debug: bool = False,
+        recorder: Optional[Recorder] = None,
+    ) -> List[Span]:
+        spans: List[Span] = []
+        for paragraph in chunking.paragraphs(data):
+            key = cache.key(pipeline.key, paragraph.text)
+            found = cache.get(key)
+            if found is None:
+                found = cache.put(key, Masker.detect(paragraph.text, debug=debug, recorder=recorder, pipeline=pipeline))
+            spans.extend(chunking.shift(found, paragraph.start))
+        return spans
+
+    @classmethod
+    def mask_many(
+        cls,
+        texts: List[str],
+        skip: Optional[List] = None,
+        debug: bool = False,
+        pipel: Optional["torch.nn.Module"] = None,
+        batch_size: int = 8,
+        profile: str = registry.DEFAULT_PROFILE,
+        pipeline: Optional[Pipeline] = None,
+    ) -> List["Masker"]:
+        """Mask many texts, the masks that can (i.e. the NER model) run over all of them in batches of ``batch_size``
+
+        :return: One `Masker` per text, in the same order
+        """
+        if pipeline is None:
+            pipeline = registry.pipeline(profile, skip=skip, pipel=pipel)
+        precomputed: List[Dict[str, List[Span]]] = [{} for _ in texts]
+        for name, runner in pipeline.runners.items():
+            if hasattr(runner, "find_spans_many"):
+                for i, spans in enumerate(runner.find_spans_many(texts, batch_size=batch_size)):
+                    precomputed[i][name] = spans
+        return [cls(text, debug=debug, precomputed=found, pipeline=pipeline) for text, found in zip(texts, precomputed)]
 
     def list_masks(self) -> List[str]:
-        return [mask.__name__ for mask in MaskBase.__subclasses__()]
+        return [mask.__name__ for mask in registry.available()]
+
+    def get_stats(self) -> Optional[MaskerStats]:
+        """Timings and hit counts, if the masker was instrumented
+        """
+        return self._stats
 
-    def get_lookup(self) -> dict:
+    def get_lookup(self) -> Mapping[str, str]:
         return self._mask_lookup
 
+    def get_offsets(self) -> Sequence[Offset]:
+        """(masked start, masked end, original start, original end) of every placeholder in `masked_data`
+        """
+        return self._offsets
+
     def unmask_data(self, data: str) -> str:
         """
         """
-        unmasked = data
-        for k, v in self._mask_lookup.items():
-            unmasked = unmasked.replace(k, v)
-        return unmasked
+        return unmask(data, self._mask_lookup)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Cado Security Masked-AI")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
     parser.add_argument("--prompt", action="store", dest="prompt", help="The prompt to mask", default=None)
+    parser.add_argument("--profile", action="store", default=registry.DEFAULT_PROFILE, help=f"Masks to run, one of {', '.join(registry.profiles())}")
     parser.add_argument("command", help="The command to run")
     parser.add_argument("args", nargs=argparse.REMAINDER, help="The arguments for the command, make sure to unclde {prompt_placeholder} somewhere, this will be replaced with the masked prompt")
     args = parser.parse_args()
@@ -77,7 +201,7 @@ if __name__ == "__main__":
         raise SystemExit("No command was found, make sure to add it after the --prompt argument (i.e. masker --prompt bla bla echo '{prompt_placeholder}')")
 
     command = " ".join([args.command] + ["'" + arg + "'" if not arg.startswith("-") else arg for arg in args.args])
-    masker = Masker(args.prompt)
+    masker = Masker(args.prompt, instrument=args.debug, profile=args.profile)
     cleaned_command = command.replace("{prompt_placeholder}", masker.masked_data)
 
     if args.debug:
@@ -85,17 +209,20 @@ if __name__ == "__main__":
         print(" - Before masking: ", args.prompt)
         print(" - After masking: ", masker.masked_data)
         print(" - Lookup: ", masker.get_lookup())
+        masker_stats = masker.get_stats()
+        if masker_stats is not None:
+            print(" - Stats: ", format_stats(masker_stats))
         print(" - COMMAND: ", "".join(cleaned_command))
 
     output_bytes = subprocess.check_output(cleaned_command, stderr=subprocess.STDOUT, shell=True)
     output = output_bytes.decode("utf-8").strip()
-    unmask = masker.unmask_data(output)
+    unmasked = masker.unmask_data(output)
 
     if args.debug:
         print(" - Raw output: ", output)
         print('-------')
-        print(" - Unmask output: ", unmask)
+        print(" - Unmask output: ", unmasked)
         print("************************************")
     else:
-        sys.stdout.write(unmask)
+        sys.stdout.write(unmasked)
         sys.stdout.flush()
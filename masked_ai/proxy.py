@@ -0,0 +1,378 @@
+"""Local masking proxy for OpenAI style completion/chat APIs
+
+    python -m masked_ai.proxy --upstream https://api.openai.com --port 8080
+    curl http://127.0.0.1:8080/v1/chat/completions -H "Authorization: Bearer ..." -d '{"model": ..., "messages": [...]}'
+
+The ``prompt`` and ``messages`` fields of every JSON request are masked before being forwarded
+upstream, over a pool of kept alive connections, and the response is unmasked before it is returned.
+Streamed (server-sent events) responses are unmasked and forwarded chunk by chunk.
+The models and vocabularies are loaded once, when the proxy starts.
+"""
+import argparse
+import http.client
+import json
+import logging
+import queue
+import threading
+import urllib.parse
+from contextlib import ExitStack, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+from masked_ai.core import registry
+from masked_ai.core.cache import DetectionCache
+from masked_ai.core.registry import Pipeline
+from masked_ai.core.substitution import Placeholders, unmask
+from masked_ai.core.vault import SQLiteStore, Vault
+from masked_ai.masker import Masker
+from masked_ai.streaming import unmask_sse
+
+Headers = List[Tuple[str, str]]
+
+# never forwarded, in either direction
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "host", "content-length", "accept-encoding", "content-encoding",
+}
+
+
+# a kept alive connection the upstream closed, before any response
+STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class ConnectionPool:
+    """Kept alive connections to a single upstream, at most ``size`` of them in use at once
+    """
+    def __init__(self, url: str, size: int = 8, timeout: float = 60.0) -> None:
+        parsed = urllib.parse.urlsplit(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Invalid upstream url {url}")
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.base_path = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _send(
+        self, method: str, path: str, body: Optional[bytes], headers: Dict[str, str],
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        try:
+            connection = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            connection = self._connect()
+            reused = False
+        try:
+            connection.request(method, self.base_path + path, body=body, headers=headers)
+            return connection, connection.getresponse()
+        except STALE_ERRORS:
+            connection.close()
+            if not reused:
+                raise
+        except BaseException:
+            # i.e. a timeout, the upstream may be handling the request, never send it twice
+            connection.close()
+            raise
+        # the upstream closed a kept alive connection before answering, retry once on a new one
+        connection = self._connect()
+        connection.request(method, self.base_path + path, body=body, headers=headers)
+        return connection, connection.getresponse()
+
+    @contextmanager
+    def open(self, method: str, path: str, body: Optional[bytes], headers: Dict[str, str]) -> Iterator[http.client.HTTPResponse]:
+        """Send a request, the response can be read incrementally until the context exits
+        """
+        with self._slots:
+            connection, response = self._send(method, path, body, headers)
+            try:
+                yield response
+            finally:
+                # only connections whose response was read completely can be reused
+                if response.will_close or not response.isclosed():
+                    connection.close()
+                else:
+                    self._idle.put(connection)
+
+    def request(self, method: str, path: str, body: Optional[bytes], headers: Dict[str, str]) -> Tuple[int, Headers, bytes]:
+        with self.open(method, path, body, headers) as response:
+            return response.status, response.getheaders(), response.read()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def mask_payload(
+    payload: Dict[str, Any],
+    skip: Optional[List] = None,
+    placeholders: Optional[Placeholders] = None,
+    cache: Optional[DetectionCache] = None,
+    pipeline: Optional[Pipeline] = None,
+) -> Dict[str, str]:
+    """Mask the ``prompt`` and ``messages`` fields of a completion/chat request, and the ``input`` of
+    an embeddings request, in place
+
+    :param placeholders: Table shared by all the fields, i.e. a `Vault` shared by all the requests
+    :param cache: Spans of the paragraphs seen in previous requests
+    :param pipeline: The compiled masks to run, replaces ``skip``
+
+    :return: The lookup table of every placeholder in the request
+    """
+    if placeholders is None:
+        placeholders = Placeholders()
+    lookup: Dict[str, str] = {}
+
+    def mask(text: Any) -> Any:
+        if not isinstance(text, str):
+            return text
+        masker = Masker(text, skip=skip, placeholders=placeholders, cache=cache, pipeline=pipeline)
+        lookup.update(masker.get_lookup())
+        return masker.masked_data
+
+    for field in ("prompt", "input"):
+        # a string or a list of them, lists of token ids are left as they are
+        value = payload.get(field)
+        if isinstance(value, list):
+            payload[field] = [mask(x) for x in value]
+        elif value is not None:
+            payload[field] = mask(value)
+    for message in payload.get("messages") or []:
+        if not isinstance(message, dict):
+            continue
+        content = message.get("content")
+        if isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    part["text"] = mask(part.get("text"))
+        else:
+            message["content"] = mask(content)
+    return lookup
+
+
+def unmask_payload(obj: Any, lookup: Dict[str, str]) -> Any:
+    """Unmask every string in a decoded JSON document
+    """
+    if isinstance(obj, str):
+        return unmask(obj, lookup)
+    if isinstance(obj, list):
+        return [unmask_payload(x, lookup) for x in obj]
+    if isinstance(obj, dict):
+        return {k: unmask_payload(v, lookup) for k, v in obj.items()}
+    return obj
+
+
+def unmask_body(data: bytes, content_type: str, lookup: Dict[str, str]) -> bytes:
+    """Unmask a response body, JSON documents are unmasked value by value so the result stays valid JSON
+    """
+    text = data.decode("utf-8", errors="replace")
+    if "json" in content_type:
+        try:
+            return json.dumps(unmask_payload(json.loads(text), lookup)).encode("utf-8")
+        except ValueError:
+            pass
+    if "event-stream" in content_type:
+        return "".join(unmask_sse(text.splitlines(keepends=True), lookup)).encode("utf-8")
+    return unmask(text, lookup).encode("utf-8")
+
+
+class EventStream:
+    """Chunks of a server-sent events response, unmasked as they arrive
+
+    Holds a concurrency slot and the upstream connection until it is exhausted or closed, `close`
+    it even when it is never iterated.
+    """
+    def __init__(self, response: http.client.HTTPResponse, lookup: Dict[str, str], stack: ExitStack) -> None:
+        self._stack = stack
+        lines: Iterator[str] = (line.decode("utf-8", errors="replace") for line in iter(response.readline, b""))
+        if lookup:
+            lines = unmask_sse(lines, lookup)
+        self._lines = lines
+
+    def __iter__(self) -> "EventStream":
+        return self
+
+    def __next__(self) -> bytes:
+        try:
+            return next(self._lines).encode("utf-8")
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self._stack.close()
+
+
+class MaskingProxy:
+    """Mask requests, forward them upstream and unmask the responses
+    """
+    def __init__(
+        self,
+        upstream: str,
+        skip: Optional[List] = None,
+        max_concurrency: int = 16,
+        pool_size: int = 8,
+        timeout: float = 60.0,
+        vault: Optional[Vault] = None,
+        cache: Optional[DetectionCache] = None,
+        profile: str = registry.DEFAULT_PROFILE,
+        routes: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        :param max_concurrency: Requests handled at once, others wait up to ``timeout`` and then get a 503
+        :param pool_size: Most connections opened to the upstream
+        :param vault: Keep the placeholders stable across requests and conversations
+        :param cache: Reuse the spans found in the paragraphs repeated across requests (i.e. prompt templates)
+        :param profile: Which masks to run, see `masked_ai.core.registry`
+        :param routes: Profile per path prefix, i.e. ``{"/v1/embeddings": "fast-regex-only"}``, the longest prefix wins
+        """
+        self.skip = skip
+        self.pipeline = registry.pipeline(profile, skip=skip)
+        self.routes = [
+            (prefix, registry.pipeline(name, skip=skip))
+            for prefix, name in sorted((routes or {}).items(), key=lambda route: -len(route[0]))
+        ]
+        self.vault = vault
+        self.cache = cache
+        self.timeout = timeout
+        self.pool = ConnectionPool(upstream, size=pool_size, timeout=timeout)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def warm_up(self) -> None:
+        for pipeline in [self.pipeline] + [pipeline for _, pipeline in self.routes]:
+            pipeline.warm_up()
+
+    def pipeline_for(self, path: str) -> Pipeline:
+        return next((pipeline for prefix, pipeline in self.routes if path.startswith(prefix)), self.pipeline)
+
+    def handle(
+        self, method: str, path: str, headers: Dict[str, str], body: Optional[bytes],
+    ) -> Tuple[int, Headers, Union[bytes, "EventStream"]]:
+        """Proxy a single request
+
+        :return: The status, headers and body to send back. Server-sent events are returned as
+            an `EventStream`, unmasked as they arrive, it must be closed
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            return 503, [("Content-Type", "application/json")], b'{"error": "masking proxy is busy"}'
+        with ExitStack() as stack:
+            stack.callback(self._slots.release)
+            lookup: Dict[str, str] = {}
+            content_type = next((v for k, v in headers.items() if k.lower() == "content-type"), "")
+            if body and "json" in content_type:
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    return 400, [("Content-Type", "application/json")], b'{"error": "invalid JSON body"}'
+                if isinstance(payload, dict):
+                    lookup = mask_payload(payload, placeholders=self.vault, cache=self.cache, pipeline=self.pipeline_for(path))
+                    body = json.dumps(payload).encode("utf-8")
+
+            forward = {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+            response = stack.enter_context(self.pool.open(method, path, body, forward))
+            response_headers = [(k, v) for k, v in response.getheaders() if k.lower() not in HOP_BY_HOP_HEADERS]
+            response_type = next((v for k, v in response_headers if k.lower() == "content-type"), "")
+            if "event-stream" in response_type:
+                # the slot and the upstream connection are released once the stream is consumed or closed
+                return response.status, response_headers, EventStream(response, lookup, stack.pop_all())
+            data = response.read()
+            if lookup:
+                data = unmask_body(data, response_type, lookup)
+            return response.status, response_headers, data
+
+    def server(self, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+        return ThreadingHTTPServer((host, port), _handler(self))
+
+
+def _handler(proxy: MaskingProxy) -> Type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _proxy(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else None
+            try:
+                status, headers, data = proxy.handle(self.command, self.path, dict(self.headers.items()), body)
+            except (http.client.HTTPException, OSError) as e:
+                logging.warning(f"Upstream request failed: {e}")
+                status, headers, data = 502, [("Content-Type", "application/json")], b'{"error": "upstream request failed"}'
+            try:
+                self.send_response(status)
+                for k, v in headers:
+                    self.send_header(k, v)
+                if isinstance(data, bytes):
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                # streamed, every chunk is sent as soon as it is unmasked
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for chunk in data:
+                    if chunk:
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                        self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            finally:
+                # the client may be gone before the headers are sent
+                if not isinstance(data, bytes):
+                    data.close()
+
+        do_GET = do_POST = do_PUT = do_DELETE = _proxy
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logging.debug(format, *args)
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cado Security Masked-AI, masking proxy")
+    parser.add_argument("--upstream", action="store", default="https://api.openai.com", help="The API to forward the requests to")
+    parser.add_argument("--host", action="store", default="127.0.0.1")
+    parser.add_argument("--port", action="store", type=int, default=8080)
+    parser.add_argument("--max-concurrency", action="store", dest="max_concurrency", type=int, default=16)
+    parser.add_argument("--pool-size", action="store", dest="pool_size", type=int, default=8, help="Most connections opened to the upstream")
+    parser.add_argument("--timeout", action="store", type=float, default=60.0)
+    parser.add_argument("--skip", action="append", default=None, help="Mask to skip, can be given more than once")
+    parser.add_argument("--profile", action="store", default=registry.DEFAULT_PROFILE, help=f"Masks to run, one of {', '.join(registry.profiles())}")
+    parser.add_argument("--route", action="append", default=[], help="PREFIX=PROFILE, masks to run for the paths starting with PREFIX, can be given more than once")
+    parser.add_argument("--vault", action="store", default=None, help="Keep the placeholders stable across requests, and restarts, in this SQLite file")
+    parser.add_argument("--vault-size", action="store", dest="vault_size", type=int, default=None, help="Most placeholders kept in memory, 100000 by default, without --vault they are only kept in memory")
+    parser.add_argument("--vault-ttl", action="store", dest="vault_ttl", type=float, default=None, help="Seconds a placeholder is kept, forever by default, without --vault they are only kept in memory")
+    parser.add_argument("--cache-size", action="store", dest="cache_size", type=int, default=4096, help="Paragraphs whose masks are cached, 0 to disable")
+    args = parser.parse_args()
+
+    routes = {prefix: profile for prefix, _, profile in (route.partition("=") for route in args.route)}
+    cache = DetectionCache(max_size=args.cache_size) if args.cache_size > 0 else None
+    vault = None
+    if args.vault or args.vault_size is not None or args.vault_ttl is not None:
+        vault = Vault(
+            max_size=args.vault_size if args.vault_size is not None else 100000, ttl=args.vault_ttl,
+            store=SQLiteStore(args.vault) if args.vault else None,
+        )
+    proxy = MaskingProxy(
+        args.upstream, skip=args.skip, max_concurrency=args.max_concurrency, pool_size=args.pool_size, timeout=args.timeout, vault=vault, cache=cache,
+        profile=args.profile, routes=routes,
+    )
+    proxy.warm_up()
+    server = proxy.server(args.host, args.port)
+    print(f"Masking proxy for {args.upstream} listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        proxy.pool.close()
+        if vault is not None:
+            vault.close()
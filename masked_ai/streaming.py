@@ -0,0 +1,238 @@
+"""Masking of unbounded input (files, stdin, sockets), and unmasking of streamed output, chunk by chunk
+
+    masker = StreamingMasker()
+    for chunk in masker.mask_file("syslog"):
+        send(chunk)
+    masker.unmask_data(summary)
+
+Only a bounded buffer is kept in memory. The last ``lookback`` characters of the buffer are held
+back until more data arrives, so a value cut by a chunk boundary (IP, email, URL...) is still found
+whole. The lookup table is shared by the whole stream.
+
+    unmasker = StreamingUnmasker(masker.get_lookup())
+    for delta in completion_deltas:
+        print(unmasker.feed(delta), end="")
+    print(unmasker.flush())
+
+On the way back, only what could be the beginning of a placeholder cut by a chunk boundary
+(i.e. ``<EmailMa``) is held back, everything else is returned right away.
+"""
+import argparse
+import json
+import re
+import sys
+from typing import TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from masked_ai.core import registry
+from masked_ai.core.substitution import Placeholders, substitute, unmask
+from masked_ai.masker import Masker
+
+if TYPE_CHECKING:
+    import torch
+
+
+class StreamingMasker:
+    """Same masks as `Masker`, for input that doesn't fit in memory
+    """
+    def __init__(
+        self,
+        skip: Optional[List] = None,
+        debug: bool = False,
+        pipel: Optional["torch.nn.Module"] = None,
+        lookback: int = 4096,
+        profile: str = registry.DEFAULT_PROFILE,
+    ) -> None:
+        """
+        :param lookback: Characters held back at the end of the buffer, the longest value that can
+            still be found across a chunk boundary
+        :param profile: Which masks to run, see `masked_ai.core.registry`
+        """
+        if lookback <= 0:
+            raise ValueError("lookback must be positive")
+        self.skip = skip
+        self.debug = debug
+        self.pipel = pipel
+        self.lookback = lookback
+        self.pipeline = registry.pipeline(profile, skip=skip, pipel=pipel)
+        self._placeholders = Placeholders()
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add ``chunk`` to the stream, right away
+
+        :return: The masked data that is ready, possibly nothing
+        """
+        self._buffer += chunk
+        # wait for at least `lookback` characters that can be emitted, so each scan makes progress
+        if len(self._buffer) >= 2 * self.lookback:
+            return self._emit(len(self._buffer) - self.lookback)
+        return []
+
+    def flush(self) -> List[str]:
+        """End of the stream, mask and return everything that was held back
+        """
+        return self._emit(len(self._buffer))
+
+    def mask_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.flush()
+
+    def mask_file(self, path: str, chunk_size: int = 1 << 16, encoding: str = "utf-8") -> Iterator[str]:
+        with open(path, encoding=encoding) as f:
+            yield from self.mask_stream(iter(lambda: f.read(chunk_size), ""))
+
+    def get_lookup(self) -> Dict[str, str]:
+        return self._placeholders.lookup
+
+    def unmask_data(self, data: str) -> str:
+        return unmask(data, self._placeholders.lookup)
+
+    def _emit(self, cut: int) -> List[str]:
+        data = self._buffer
+        if cut < len(data):
+            # never cut a word in two
+            boundary = max(data.rfind(" ", 0, cut), data.rfind("\n", 0, cut))
+            if boundary != -1:
+                cut = boundary + 1
+        spans = []
+        for span in Masker.detect(data, debug=self.debug, pipeline=self.pipeline):
+            if span.end <= cut:
+                spans.append(span)
+            else:
+                if span.start < cut:
+                    # hold back the value crossing the cut, it might not be complete yet
+                    cut = span.start
+                break
+        if cut <= 0:
+            return []
+        masked, _, _ = substitute(data[:cut], spans, self._placeholders)
+        self._buffer = data[cut:]
+        return [masked]
+
+
+# what a placeholder looks like before its closing ">", see `substitution.PLACEHOLDER_RE`
+_PARTIAL_PLACEHOLDER_RE = re.compile(r"<\w*")
+
+
+class StreamingUnmasker:
+    """Unmask output that arrives in chunks, i.e. the token deltas of a streamed completion
+    """
+    def __init__(self, lookup: Mapping[str, str]) -> None:
+        self.lookup = lookup
+        self._longest = max((len(placeholder) for placeholder in lookup), default=0)
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        """
+        :return: The unmasked data that is ready, possibly an empty string
+        """
+        data = self._pending + chunk
+        self._pending = ""
+        start = data.rfind("<")
+        if start != -1 and len(data) - start < self._longest and _PARTIAL_PLACEHOLDER_RE.fullmatch(data, start):
+            self._pending = data[start:]
+            data = data[:start]
+        return unmask(data, self.lookup)
+
+    def flush(self) -> str:
+        """End of the stream, what was held back was not a placeholder after all
+        """
+        data, self._pending = self._pending, ""
+        return data
+
+    def unmask_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        for chunk in chunks:
+            data = self.feed(chunk)
+            if data:
+                yield data
+        data = self.flush()
+        if data:
+            yield data
+
+    async def unmask_async(self, chunks: AsyncIterable[str]) -> AsyncIterator[str]:
+        async for chunk in chunks:
+            data = self.feed(chunk)
+            if data:
+                yield data
+        data = self.flush()
+        if data:
+            yield data
+
+
+def _sse_texts(event: Any) -> Iterator[Tuple[Dict[str, Any], str, Any, bool]]:
+    """The generated texts of an OpenAI style stream event, as (dict holding it, key, choice index, is last)
+    """
+    if not isinstance(event, dict):
+        return
+    for choice in event.get("choices") or []:
+        if not isinstance(choice, dict):
+            continue
+        finished = choice.get("finish_reason") is not None
+        delta = choice.get("delta")
+        if isinstance(delta, dict) and isinstance(delta.get("content"), str):
+            yield delta, "content", choice.get("index", 0), finished
+        elif isinstance(choice.get("text"), str):
+            yield choice, "text", choice.get("index", 0), finished
+
+
+def unmask_sse(lines: Iterable[str], lookup: Mapping[str, str]) -> Iterator[str]:
+    """Unmask a server-sent events stream of completion chunks, line by line
+
+    Every choice has its own `StreamingUnmasker`, the text it held back is added to the next event
+    of the same choice, to its last one, or to an extra event before ``[DONE]``.
+    """
+    unmaskers: Dict[Any, StreamingUnmasker] = {}
+    for line in lines:
+        body = line.rstrip("\r\n")
+        if body.startswith("data:") and body[5:].strip() == "[DONE]":
+            for index, unmasker in unmaskers.items():
+                pending = unmasker.flush()
+                if pending:
+                    yield "data: " + json.dumps({"choices": [{"index": index, "delta": {"content": pending}}]}) + "\n\n"
+            yield line
+            continue
+        if not body.startswith("data:"):
+            yield line
+            continue
+        try:
+            event = json.loads(body[5:])
+        except ValueError:
+            yield line
+            continue
+        for holder, key, index, finished in _sse_texts(event):
+            unmasker = unmaskers.setdefault(index, StreamingUnmasker(lookup))
+            unmasked = unmasker.feed(holder[key])
+            if finished:
+                unmasked += unmasker.flush()
+            holder[key] = unmasked
+        yield "data: " + json.dumps(event) + line[len(body):]
+
+
+def mask_file(path: str, **kwargs: Any) -> Iterator[str]:
+    """Masked chunks of the file at ``path``, use `StreamingMasker.mask_file` to keep the lookup table
+    """
+    return StreamingMasker(**kwargs).mask_file(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cado Security Masked-AI, streaming")
+    parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    parser.add_argument("--lookup", action="store", dest="lookup", help="Write the lookup table to this JSON file", default=None)
+    parser.add_argument("--lookback", action="store", type=int, default=4096, help="Characters held back between chunks")
+    parser.add_argument("--profile", action="store", default=registry.DEFAULT_PROFILE, help=f"Masks to run, one of {', '.join(registry.profiles())}")
+    parser.add_argument("path", nargs="?", default="-", help="File to mask, stdin by default")
+    args = parser.parse_args()
+
+    masker = StreamingMasker(debug=args.debug, lookback=args.lookback, profile=args.profile)
+    if args.path == "-":
+        chunks = masker.mask_stream(iter(lambda: sys.stdin.read(1 << 16), ""))
+    else:
+        chunks = masker.mask_file(args.path)
+    for chunk in chunks:
+        sys.stdout.write(chunk)
+    sys.stdout.flush()
+
+    if args.lookup:
+        with open(args.lookup, "w") as f:
+            json.dump(masker.get_lookup(), f)
@@ -0,0 +1,49 @@
+"""
+"""
+import asyncio
+import subprocess
+import sys
+import unittest
+
+from masked_ai.aio import AsyncMasker, run_command
+from masked_ai.masker import Masker
+
+# NLTK and the NER model are not needed for these
+SKIP = ["NamesMask", "NERNamesMASK"]
+
+
+class AsyncMaskerTests(unittest.IsolatedAsyncioTestCase):
+    """
+    """
+
+    async def test_mask(self) -> None:
+        async with AsyncMasker(skip=SKIP) as masker:
+            masked = await masker.mask("ping 10.0.0.1 now")
+        self.assertEqual(masked.masked_data, "ping <IPMask_1> now")
+
+    async def test_many_in_flight(self) -> None:
+        async with AsyncMasker(skip=SKIP, max_workers=2, max_pending=4) as masker:
+            results = await asyncio.gather(*(masker.mask(f"host 10.0.0.{i} down") for i in range(50)))
+        self.assertEqual([result.get_lookup()["<IPMask_1>"] for result in results], [f"10.0.0.{i}" for i in range(50)])
+
+    async def test_run_command(self) -> None:
+        prompt = "Mail bob@corp.com about 10.0.0.1"
+        masker = Masker(prompt, skip=SKIP)
+        self.assertNotIn("bob@corp.com", masker.masked_data)
+        output = await run_command(masker, [sys.executable, "-c", "import sys; print(sys.argv[1])", "{prompt_placeholder}"])
+        self.assertEqual(output, prompt)
+
+    async def test_run_command_failure(self) -> None:
+        masker = Masker("data", skip=SKIP)
+        with self.assertRaises(subprocess.CalledProcessError):
+            await run_command(masker, [sys.executable, "-c", "raise SystemExit(3)"])
+
+    async def test_cli_profile(self) -> None:
+        # the regex masks only, NLTK and the NER model are never loaded
+        result = subprocess.run(
+            [sys.executable, "-m", "masked_ai.aio", "--debug", "--profile", "fast-regex-only", "--prompt", "ping 10.0.0.1",
+             sys.executable, "-c", "import sys; print(sys.argv[1])", "{prompt_placeholder}"],
+            capture_output=True, text=True, check=True,
+        )
+        self.assertIn(" - After masking:  ping <IPMask_1>", result.stdout)
+        self.assertIn(" - Unmask output:  ping 10.0.0.1", result.stdout)
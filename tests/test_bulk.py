@@ -0,0 +1,62 @@
+"""
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from masked_ai.bulk import mask_corpus, mask_files
+from masked_ai.masker import Masker
+
+# NLTK and the NER model are not needed for these
+SKIP = ["NamesMask", "NERNamesMASK"]
+
+
+class BulkTests(unittest.TestCase):
+    """
+    """
+
+    def setUp(self) -> None:
+        self.texts = [f"doc {i} from 10.0.0.{i} by user{i}@corp.com " for i in range(12)]
+
+    def test_results_in_order(self) -> None:
+        results = list(mask_corpus(self.texts, skip=SKIP, workers=2))
+        for text, result in zip(self.texts, results):
+            masker = Masker(text, skip=SKIP)
+            self.assertEqual(result.masked_data, masker.masked_data)
+            self.assertEqual(result.lookup, masker.get_lookup())
+
+    def test_mask_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i, text in enumerate(self.texts[:3]):
+                paths.append(os.path.join(tmp, f"{i}.log"))
+                with open(paths[-1], "w") as f:
+                    f.write(text)
+            output_dir = os.path.join(tmp, "out")
+            jsonl = os.path.join(tmp, "out.jsonl")
+            mask_files(paths, output_dir=output_dir, jsonl=jsonl, skip=SKIP, workers=2)
+
+            with open(os.path.join(output_dir, "1.log")) as f:
+                self.assertEqual(f.read(), "doc 1 from <IPMask_1> by <EmailMask_1> ")
+            with open(os.path.join(output_dir, "1.log.lookup.json")) as f:
+                self.assertEqual(json.load(f), {"<IPMask_1>": "10.0.0.1", "<EmailMask_1>": "user1@corp.com"})
+            with open(jsonl) as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual([line["path"] for line in lines], paths)
+
+    def test_same_name_in_different_directories(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i, directory in enumerate(("a", os.path.join("b", "c"))):
+                os.makedirs(os.path.join(tmp, directory))
+                paths.append(os.path.join(tmp, directory, "x.log"))
+                with open(paths[-1], "w") as f:
+                    f.write(self.texts[i])
+            output_dir = os.path.join(tmp, "out")
+            mask_files(paths, output_dir=output_dir, skip=SKIP, workers=2)
+
+            with open(os.path.join(output_dir, "a", "x.log")) as f:
+                self.assertEqual(f.read(), "doc 0 from <IPMask_1> by <EmailMask_1> ")
+            with open(os.path.join(output_dir, "b", "c", "x.log.lookup.json")) as f:
+                self.assertEqual(json.load(f), {"<IPMask_1>": "10.0.0.1", "<EmailMask_1>": "user1@corp.com"})
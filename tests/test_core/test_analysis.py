@@ -0,0 +1,85 @@
+"""
+"""
+import types
+import unittest
+from collections import Counter
+from typing import Any, List
+from unittest import mock
+
+from masked_ai.core import registry, resources
+from masked_ai.core.analysis import CHUNKS, NER, TOKENS, Analysis, align_tokens
+from masked_ai.core.masks import NERNamesMASK
+
+
+def counting_nltk(calls: Counter) -> Any:
+    """Stands in for nltk, counts the calls of every step
+    """
+    def step(name: str, result: Any) -> Any:
+        def run(*args: Any, **kwargs: Any) -> Any:
+            calls[name] += 1
+            return result(*args)
+        return run
+
+    return types.SimpleNamespace(
+        tokenize=types.SimpleNamespace(word_tokenize=step("tokenize", lambda data: data.split())),
+        pos_tag=step("pos_tag", lambda tokens: [(token, "NN") for token in tokens]),
+        ne_chunk=step("ne_chunk", lambda tagged: list(tagged)),
+    )
+
+
+class AnalysisTests(unittest.TestCase):
+    """
+    """
+
+    def test_computed_once_and_only_if_used(self) -> None:
+        calls: Counter = Counter()
+        with mock.patch.object(resources, "nltk", lambda: counting_nltk(calls)):
+            analysis = Analysis("Adam met Eve")
+            self.assertEqual(calls, Counter())
+            self.assertEqual(analysis.offsets, [(0, 4), (5, 8), (9, 12)])
+            self.assertEqual(len(analysis.chunks), 3)
+            self.assertEqual(analysis.pos_tags[0], ("Adam", "NN"))
+        self.assertEqual(calls, Counter({"tokenize": 1, "pos_tag": 1, "ne_chunk": 1}))
+
+    def test_get(self) -> None:
+        analysis = Analysis("data")
+        computed: List[int] = []
+
+        def compute() -> int:
+            computed.append(len(computed) + 1)
+            return computed[-1]
+
+        self.assertEqual(analysis.get("key", compute), 1)
+        self.assertEqual(analysis.get("key", compute), 1)
+        self.assertEqual(computed, [1])
+
+    def test_windows(self) -> None:
+        short = Analysis("a short document")
+        self.assertIs(short.windows(100, 10)[0][1], short)
+        long = Analysis("word " * 100)
+        parts = long.windows(100, 10)
+        self.assertGreater(len(parts), 1)
+        self.assertTrue(all(part.data == window.text for window, part in parts))
+        self.assertIs(long.windows(100, 10), parts)
+
+    def test_align_quotes(self) -> None:
+        self.assertEqual(align_tokens(["``", "hi", "''", "missing"], '"hi"'), [(0, 1), (1, 3), (3, 4), None])
+
+    def test_ner_output_shared(self) -> None:
+        calls: List[str] = []
+
+        def pipel(data: str) -> List[dict]:
+            calls.append(data)
+            return [{'entity': 'LABEL_3', 'score': 0.99, 'word': 'Zuckerberg', 'start': 5, 'end': 15}]
+
+        analysis = Analysis("Meet Zuckerberg today")
+        first, second = NERNamesMASK(pipel=pipel), NERNamesMASK(pipel=pipel)
+        self.assertEqual(first.find_spans_in(analysis), second.find_spans_in(analysis))
+        self.assertEqual(calls, ["Meet Zuckerberg today"])
+
+    def test_pipeline_needs(self) -> None:
+        self.assertEqual(registry.pipeline("fast-regex-only").needs, frozenset())
+        needs = registry.pipeline().needs
+        self.assertIn(TOKENS, needs)
+        self.assertIn(CHUNKS, needs)
+        self.assertIn(NER, needs)
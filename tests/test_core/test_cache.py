@@ -0,0 +1,68 @@
+"""
+"""
+import unittest
+from unittest import mock
+
+from masked_ai.core.cache import DetectionCache
+from masked_ai.core.masks import CreditCardMask, IPMask, SerialNumMask
+from masked_ai.masker import Masker
+
+# NLTK and the NER model are not needed for these
+SKIP = ["NamesMask", "NERNamesMASK"]
+
+TEMPLATE = """You are a support assistant for operator.com, escalate to noc@operator.com.
+
+Known gateways: 10.0.0.1 and 10.0.0.2, see https://wiki.operator.com/gateways
+
+Ticket: {ticket}
+
+Answer in one paragraph."""
+
+
+class DetectionCacheTests(unittest.TestCase):
+    """
+    """
+
+    def test_same_as_without_cache(self) -> None:
+        cache = DetectionCache()
+        for ticket in ("host 10.0.0.7 down", "mail from bob@corp.com", "nothing to mask", "host 10.0.0.1 down"):
+            prompt = TEMPLATE.format(ticket=ticket)
+            cached = Masker(prompt, skip=SKIP, cache=cache)
+            masker = Masker(prompt, skip=SKIP)
+            self.assertEqual(cached.masked_data, masker.masked_data)
+            self.assertEqual(cached.get_lookup(), masker.get_lookup())
+        # the 3 template paragraphs are only masked once
+        self.assertEqual(cache.stats().misses, 3 + 4)
+        self.assertEqual(cache.stats().hits, 3 * 3)
+
+    def test_moved_paragraph(self) -> None:
+        cache = DetectionCache()
+        Masker("ping 10.0.0.1\n\nfine", skip=SKIP, cache=cache)
+        masker = Masker("header\n\nping 10.0.0.1\n\nfine", skip=SKIP, cache=cache)
+        self.assertEqual(masker.masked_data, "header\n\nping <IPMask_1>\n\nfine")
+        self.assertEqual(cache.stats().hits, 2)
+
+    def test_skip_is_part_of_the_key(self) -> None:
+        cache = DetectionCache()
+        Masker("ping 10.0.0.1", skip=SKIP, cache=cache)
+        masker = Masker("ping 10.0.0.1", skip=SKIP + ["IPMask"], cache=cache)
+        self.assertEqual(masker.masked_data, "ping 10.0.0.1")
+
+    def test_mask_settings_are_part_of_the_key(self) -> None:
+        cache = DetectionCache()
+        prompt = "counter 999.999.999.999 card 4012888888881882 order 555 123 4567"
+        self.assertEqual(
+            Masker(prompt, skip=SKIP, cache=cache).masked_data,
+            "counter <IPMask_1> card <CreditCardMask_1> order <SerialNumMask_1>",
+        )
+        with mock.patch.object(IPMask, "validate", True), mock.patch.object(CreditCardMask, "validate", True), \
+                mock.patch.object(SerialNumMask, "rule", lambda data, start, end: "PhoneMask"):
+            masker = Masker(prompt, skip=SKIP, cache=cache)
+        self.assertEqual(masker.masked_data, "counter 999.999.999.999 card 4012888888881882 order <PhoneMask_1>")
+        self.assertEqual(cache.stats().hits, 0)
+
+    def test_lru_bound(self) -> None:
+        cache = DetectionCache(max_size=2)
+        for text in ("a 10.0.0.1", "b 10.0.0.2", "c 10.0.0.3", "a 10.0.0.1"):
+            Masker(text, skip=SKIP, cache=cache)
+        self.assertEqual(cache.stats(), (0, 4, 2, 2))
@@ -0,0 +1,60 @@
+"""
+"""
+import re
+import unittest
+
+from masked_ai.core.analysis import Analysis
+from masked_ai.core.chunking import merge, paragraphs, token_windows, windows
+from masked_ai.core.masks import Span
+
+
+class ChunkingTests(unittest.TestCase):
+    """
+    """
+
+    def test_short_document_is_one_window(self) -> None:
+        self.assertEqual(windows("short", 100, 10), [(0, "short")])
+
+    def test_windows_cover_the_document(self) -> None:
+        data = " ".join(f"word{i}." if i % 7 == 0 else f"word{i}" for i in range(500))
+        parts = windows(data, 200, 40)
+        self.assertEqual(parts[0].start, 0)
+        self.assertTrue(data.endswith(parts[-1].text))
+        for window, following in zip(parts, parts[1:]):
+            self.assertEqual(data[window.start:window.start + len(window.text)], window.text)
+            self.assertLessEqual(len(window.text), 200)
+            # overlapping, and never cutting a word
+            self.assertLess(following.start, window.start + len(window.text))
+            self.assertTrue(data[following.start - 1].isspace())
+            self.assertTrue(window.text[-1].isspace() or window.text.endswith("."))
+
+    def test_entity_on_a_window_edge(self) -> None:
+        data = "x" * 10 + " " + "filler " * 40 + "bob@corp.com " + "filler " * 40
+        found = Analysis(data).windowed_spans(
+            lambda analysis: [Span(m.start(), m.end(), "EmailMask") for m in re.finditer(r"\S+@\S+", analysis.data)], 120, 30
+        )
+        self.assertEqual([data[span.start:span.end] for span in found], ["bob@corp.com"])
+
+    def test_token_windows(self) -> None:
+        data = " ".join(["1.2.3.4"] * 50 + ["word"] * 50)
+        count = lambda text: len(text.replace(" ", ""))  # noqa: E731
+        parts = token_windows(data, 200, 20, count, 60)
+        self.assertTrue(all(count(window.text) <= 60 for window in parts))
+        self.assertTrue(all(data[window.start:window.start + len(window.text)] == window.text for window in parts))
+        self.assertEqual(parts[-1].start + len(parts[-1].text), len(data))
+        self.assertEqual(token_windows(data, 200, 20), windows(data, 200, 20))
+
+    def test_paragraphs(self) -> None:
+        data = "first line\nsecond line\n\n  \nnext paragraph\n\nlast"
+        parts = paragraphs(data)
+        self.assertEqual([window.text for window in parts], ["first line\nsecond line\n\n  \n", "next paragraph\n\n", "last"])
+        self.assertEqual("".join(window.text for window in parts), data)
+        self.assertEqual(parts[2].start, data.index("last"))
+        self.assertEqual(paragraphs(""), [(0, "")])
+
+    def test_merge_dedup(self) -> None:
+        self.assertEqual(merge([["a", "b"], ["b", "c"]]), ["a", "b", "c"])
+
+    def test_invalid_overlap(self) -> None:
+        with self.assertRaises(ValueError):
+            windows("data", 10, 5)
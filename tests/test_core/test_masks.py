@@ -1,17 +1,47 @@
 """
 """
+import types
 import unittest
+from typing import Any, List, Optional
+from unittest import mock
 
+import nltk
+
+from masked_ai.core import resources
 from masked_ai.core.masks import (
     IPMask,
     NamesMask,
     LinkMask,
     CreditCardMask,
     EmailMask,
-    PhoneMask
+    PhoneMask,
+    SerialNumMask,
+    NERNamesMASK,
+    Span,
 )
 
 
+def fake_nltk(tokens: List[str], persons: List[slice]) -> Any:
+    """Stands in for nltk, ``ne_chunk`` tags the given token slices as persons
+    """
+    def ne_chunk(tagged: List[Any], binary: bool = False) -> nltk.Tree:
+        children: List[Any] = []
+        index = 0
+        for person in persons:
+            children.extend(tagged[index:person.start])
+            children.append(nltk.Tree('PERSON', tagged[person]))
+            index = person.stop
+        children.extend(tagged[index:])
+        return nltk.Tree('S', children)
+
+    return types.SimpleNamespace(
+        tokenize=types.SimpleNamespace(word_tokenize=lambda data: tokens),
+        pos_tag=lambda tokens: [(token, 'NNP') for token in tokens],
+        ne_chunk=ne_chunk,
+        Tree=nltk.Tree,
+    )
+
+
 class MasksTests(unittest.TestCase):
     """
     """
@@ -110,3 +140,90 @@ class MasksTests(unittest.TestCase):
         found = CreditCardMask.find(data)
         self.assertEqual(len(found), 1)
         self.assertTrue("4012-8888-8882-1881" in found)
+
+    def test_credit_card_lengths_need_validation(self) -> None:
+        data = "amex 378282246310005 ts 1681208520000 visa 4012888888881881"
+        self.assertEqual(CreditCardMask.find(data), ["4012888888881881"])
+        with mock.patch.object(CreditCardMask, "validate", True):
+            self.assertEqual(CreditCardMask.find(data), ["378282246310005", "4012888888881881"])
+
+    def test_credit_card_luhn(self) -> None:
+        data = "good 3782-822463-10005 bad 4012888888881882"
+        with mock.patch.object(CreditCardMask, "validate", True):
+            self.assertEqual(CreditCardMask.find(data), ["3782-822463-10005"])
+
+    def test_ip_octets(self) -> None:
+        data = "counter 999.999.999.999 host 10.0.0.255"
+        self.assertEqual(len(IPMask.find(data)), 2)
+        with mock.patch.object(IPMask, "validate", True):
+            self.assertEqual(IPMask.find(data), ["10.0.0.255"])
+
+    def test_ip_cidr(self) -> None:
+        data = "routes 10.0.0.0/8 and 192.168.1.0/33"
+        self.assertEqual(IPMask.find(data), ["10.0.0.0/8", "192.168.1.0"])
+
+    def test_ipv6(self) -> None:
+        data = "peers 2001:db8::1, fe80::/10 and ::ffff:10.0.0.1 at 12:30:45 on std::vector"
+        self.assertEqual(IPMask.find(data), ["2001:db8::1", "fe80::/10", "::ffff:10.0.0.1"])
+
+    def test_ipv6_shape(self) -> None:
+        data = "listen on [::1]:8080 fd00:1::/64 and 2001:0db8:0000:0000:0000:ff00:0042:8329"
+        self.assertEqual(IPMask.find(data), ["::1", "fd00:1::/64", "2001:0db8:0000:0000:0000:ff00:0042:8329"])
+        for data in ("std::vector", "a::b", "Foo::Bar", "a::", "be::ef", "cafe::babe", "ns A::B::C", "ratio 1::2"):
+            self.assertEqual(IPMask.find(data), [], data)
+
+    def test_phone_number_per_occurrence(self) -> None:
+        data = "id x2025550196 then call 2025550196 now"
+        self.assertEqual(PhoneMask.find_spans(data), [Span(25, 35, "PhoneMask")])
+
+    def test_phone_or_serial_by_context(self) -> None:
+        data = "ring 555 123 4567 then order 555 123 4568 and +44 20 7946 0958 , or 555 123 4569"
+        self.assertEqual(PhoneMask.find(data), ["555 123 4567", "7946 0958", "555 123 4569"])
+        self.assertEqual(SerialNumMask.find(data), ["555 123 4568"])
+
+    def test_phone_or_serial_rule(self) -> None:
+        def rule(data: str, start: int, end: int) -> Optional[str]:
+            return "SerialNumMask" if data[start:end].startswith("555") else None
+
+        data = "call 555 123 4567 or 202 555 0196"
+        with mock.patch.object(SerialNumMask, "rule", rule):
+            self.assertEqual(SerialNumMask.find(data), ["555 123 4567"])
+            self.assertEqual(PhoneMask.find(data), ["202 555 0196"])
+
+    def test_prefilters_keep_every_hit(self) -> None:
+        data = (
+            "host 10.0.0.1 and 2001:db8::1, fe80::/10 see https://www.google.com/a?b=c or corp.co.uk, "
+            "call +44 20 7946 0958 or (202) 555-0196 , serial 555 123 4568 , bob.smith+tag@corp.com "
+            "card 4012-8888-8882-1881 or 4012888888881881"
+        )
+        with mock.patch.object(CreditCardMask, "validate", True):
+            for mask in (IPMask, LinkMask, SerialNumMask, EmailMask, CreditCardMask):
+                hits = [data[span.start:span.end] for span in mask.find_spans(data)]
+                self.assertTrue(hits, mask.__name__)
+                # every probe holds for any text containing what it holds for
+                for hit in hits:
+                    self.assertTrue(mask.prefilter(hit), f"{mask.__name__} {hit}")
+
+    def test_prefilters_rule_out(self) -> None:
+        data = "how do you sort a list in python? it is 12:30 now."
+        for mask in (IPMask, SerialNumMask, EmailMask, CreditCardMask, NamesMask):
+            self.assertFalse(mask.prefilter(data), mask.__name__)
+        self.assertTrue(NamesMask.prefilter("ask Zuckerberg"))
+
+    def test_names_positions(self) -> None:
+        data = 'Then Zuckerberg Wozniak met "Jobs Gatesy" and Zuckerberg, again.'
+        tokens = ['Then', 'Zuckerberg', 'Wozniak', 'met', '``', 'Jobs', 'Gatesy', "''", 'and', 'Zuckerberg', ',', 'again', '.']
+        with mock.patch.object(resources, "nltk", lambda: fake_nltk(tokens, [slice(1, 3), slice(5, 7), slice(9, 10)])):
+            spans = NamesMask.find_spans(data)
+        # quoted names are left alone
+        self.assertEqual([data[span.start:span.end] for span in spans], ["Zuckerberg", "Wozniak", "Zuckerberg"])
+        self.assertEqual(spans[2], Span(46, 56, "NamesMask"))
+
+    def test_ner_uses_pipeline_offsets(self) -> None:
+        data = "Zuckerberg met Zuckerberg"
+        results = [
+            {'entity': 'LABEL_3', 'score': 0.9, 'word': 'Zuckerberg', 'start': 15, 'end': 25},
+            {'entity': 'LABEL_3', 'score': 0.1, 'word': 'Zuckerberg', 'start': 0, 'end': 10},
+        ]
+        mask = NERNamesMASK(pipel=lambda data: results)
+        self.assertEqual(mask.find_spans(data), [Span(15, 25, "PersonMASK")])
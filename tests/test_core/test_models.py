@@ -0,0 +1,128 @@
+"""
+"""
+import re
+import sys
+import threading
+import time
+import unittest
+from typing import Any, List
+from unittest import mock
+
+from masked_ai.core import models, resources
+from masked_ai.core.masks import NERNamesMASK
+from masked_ai.core.models import ModelRegistry
+
+
+class FakePipeline:
+    """Stands in for a transformers token classification pipeline
+    """
+    def __call__(self, data: str) -> List[dict]:
+        start = data.find("Zuckerberg")
+        if start == -1:
+            return []
+        return [{'entity': 'LABEL_3', 'score': 0.99, 'word': 'Zuckerberg', 'start': start, 'end': start + 10}]
+
+
+class FakeTokenizer:
+    """Every character that is not a letter or a space is a token, like the pieces of IPs and ids
+    """
+    def __call__(self, text: str, add_special_tokens: bool = True) -> dict:
+        tokens = re.findall(r"[a-zA-Z]+|[^a-zA-Z\s]", text)
+        return {"input_ids": list(range(len(tokens) + (2 if add_special_tokens else 0)))}
+
+
+class TokenizedPipeline(FakePipeline):
+    """Records how many tokens every input has
+    """
+    def __init__(self) -> None:
+        self.tokenizer = FakeTokenizer()
+        self.tokens: List[int] = []
+
+    def __call__(self, data: Any, batch_size: int = 1) -> Any:
+        if isinstance(data, list):
+            return [self(text) for text in data]
+        self.tokens.append(len(self.tokenizer(data)["input_ids"]))
+        return super().__call__(data)
+
+
+class ModelRegistryTests(unittest.TestCase):
+    """
+    """
+
+    def setUp(self) -> None:
+        self.loads: List[str] = []
+
+        def loader(model_name: str, **settings: Any) -> FakePipeline:
+            self.loads.append(model_name)
+            time.sleep(0.01)
+            return FakePipeline()
+
+        self.registry = ModelRegistry(loader=loader)
+
+    def test_loaded_once(self) -> None:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.registry.get("model"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.loads, ["model"])
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_settings_are_part_of_the_key(self) -> None:
+        self.assertIsNot(self.registry.get("model", device=-1), self.registry.get("model", device=0))
+        self.assertEqual(len(self.registry.loaded()), 2)
+
+    def test_offline_loads_from_the_local_cache(self) -> None:
+        transformers = mock.MagicMock()
+        with mock.patch.dict(sys.modules, {"transformers": transformers}):
+            for offline in (True, False):
+                resources.set_offline(offline)
+                try:
+                    models.load_ner_pipeline("model")
+                finally:
+                    resources.set_offline(None)
+                transformers.AutoTokenizer.from_pretrained.assert_called_with("model", local_files_only=offline)
+                transformers.AutoModelForTokenClassification.from_pretrained.assert_called_with("model", local_files_only=offline)
+
+    def test_preload_and_evict(self) -> None:
+        events = []
+        self.registry.subscribe(lambda event, key, seconds: events.append((event, key[0])))
+        self.registry.preload("model")
+        self.registry.evict("model")
+        self.assertEqual(self.registry.loaded(), [])
+        self.registry.get("model")
+        self.assertEqual(self.loads, ["model", "model"])
+        self.assertEqual(events, [("load", "model"), ("evict", "model"), ("load", "model")])
+
+    def test_masks_share_the_process_registry(self) -> None:
+        pipeline = FakePipeline()
+        models.registry.register(pipeline)
+        events = []
+        hook = lambda event, key, seconds: events.append(event)  # noqa: E731
+        models.registry.subscribe(hook)
+        try:
+            first, second = NERNamesMASK(), NERNamesMASK()
+            self.assertIs(first.nlp, pipeline)
+            self.assertIs(second.nlp, pipeline)
+            self.assertEqual(first.find("I met Zuckerberg today"), [("PersonMASK", "Zuckerberg")])
+            self.assertEqual(events, ["inference"])
+        finally:
+            models.registry.unsubscribe(hook)
+            models.registry.evict()
+
+    def test_long_documents_are_chunked(self) -> None:
+        data = "filler " * 400 + "then Zuckerberg said hi " + "filler " * 10
+        mask = NERNamesMASK(pipel=FakePipeline(), window_size=500, window_overlap=50)
+        self.assertEqual(mask.find(data), [("PersonMASK", "Zuckerberg")])
+
+    def test_token_dense_windows_fit_the_model(self) -> None:
+        # 1000 characters of IPs are about 600 tokens
+        data = " ".join(f"10.{i % 250}.{i % 7}.1" for i in range(400)) + " then Zuckerberg said hi"
+        pipeline = TokenizedPipeline()
+        mask = NERNamesMASK(pipel=pipeline, window_size=1000, window_overlap=100, max_tokens=200)
+        self.assertEqual(mask.find(data), [("PersonMASK", "Zuckerberg")])
+        self.assertLessEqual(max(pipeline.tokens), 200 + 2)
+        pipeline.tokens.clear()
+        self.assertEqual(mask.find_spans_many([data], batch_size=4), [mask.find_spans(data)])
+        self.assertLessEqual(max(pipeline.tokens), 200 + 2)
@@ -0,0 +1,91 @@
+"""
+"""
+import re
+import unittest
+from typing import Any, List
+
+from masked_ai.core import registry
+from masked_ai.core.masks import EmailMask, IPMask, MaskBase, NamesMask, NERNamesMASK, Span
+from masked_ai.masker import Masker
+
+
+class TicketMask(MaskBase):
+    """Stands in for a third party mask
+    """
+    pattern = r"\bTICKET-\d+\b"
+
+    @staticmethod
+    def find(data: str) -> List[Any]:
+        return re.findall(TicketMask.pattern, data)
+
+
+class RegistryTests(unittest.TestCase):
+    """
+    """
+
+    def tearDown(self) -> None:
+        registry.unregister("TicketMask")
+        registry.remove_profile("mail")
+
+    def test_builtin_masks_in_order(self) -> None:
+        self.assertEqual([mask.__name__ for mask in registry.available()], [mask.__name__ for mask in registry.BUILTIN_MASKS])
+
+    def test_profiles(self) -> None:
+        fast = registry.resolve("fast-regex-only")
+        self.assertNotIn(NamesMask, fast)
+        self.assertNotIn(NERNamesMASK, fast)
+        self.assertIn(IPMask, fast)
+        self.assertEqual(registry.resolve("no-ner", skip=["NamesMask"])[-1].__name__, "CreditCardMask")
+        with self.assertRaises(ValueError):
+            registry.resolve("unknown")
+
+    def test_pipeline_is_compiled_once(self) -> None:
+        pipeline = registry.pipeline("fast-regex-only", skip=["EmailMask"])
+        self.assertIs(pipeline, registry.pipeline("fast-regex-only", skip=["EmailMask"]))
+        self.assertNotIn("EmailMask", pipeline)
+        self.assertEqual(pipeline.runners, {})
+
+    def test_register(self) -> None:
+        before = registry.pipeline("fast-regex-only")
+        registry.register(TicketMask, before="IPMask")
+        pipeline = registry.pipeline("fast-regex-only")
+        self.assertIsNot(pipeline, before)
+        self.assertEqual(pipeline.names[0], "TicketMask")
+        masker = Masker("see TICKET-42 from 10.0.0.1", pipeline=pipeline)
+        self.assertEqual(masker.masked_data, "see <TicketMask_1> from <IPMask_1>")
+        with self.assertRaises(ValueError):
+            registry.register(TicketMask, before="Unknown")
+        with self.assertRaises(TypeError):
+            registry.register(Span)  # type: ignore[arg-type]
+
+    def test_prefilter(self) -> None:
+        pipeline = registry.pipeline("fast-regex-only")
+        self.assertEqual(pipeline.ruled_out("hello world"), frozenset(pipeline.names))
+        # phone numbers go by the prefilter of the serial numbers they are found with
+        self.assertEqual(pipeline.ruled_out("mail bob@corp.com"), frozenset(pipeline.names) - {"EmailMask", "LinkMask"})
+        self.assertEqual(pipeline.ruled_out("call 555 123 4567", names=["PhoneMask", "IPMask"]), {"IPMask"})
+        self.assertIs(pipeline.scanner_without(frozenset()), pipeline.scanner)
+        self.assertEqual([mask.__name__ for mask in pipeline.scanner_without(frozenset(["IPMask", "EmailMask"])).masks],
+                         ["LinkMask", "SerialNumMask", "PhoneMask", "CreditCardMask"])
+        self.assertEqual(registry.Pipeline(pipeline.masks, prefilter=False).ruled_out("hello world"), frozenset())
+
+    def test_ruled_out_masks_dont_run(self) -> None:
+        class GatedTicketMask(TicketMask):
+            @classmethod
+            def prefilter(cls, data: str) -> bool:
+                return "#" in data
+        data = "see TICKET-42 from 10.0.0.1"
+        masker = Masker(data, pipeline=registry.Pipeline([GatedTicketMask, IPMask]))
+        self.assertEqual(masker.masked_data, "see TICKET-42 from <IPMask_1>")
+        masker = Masker(data, pipeline=registry.Pipeline([GatedTicketMask, IPMask], prefilter=False))
+        self.assertEqual(masker.masked_data, "see <GatedTicketMask_1> from <IPMask_1>")
+
+    def test_add_profile(self) -> None:
+        registry.add_profile("mail", ["EmailMask"])
+        self.assertEqual(registry.resolve("mail"), [EmailMask])
+        masker = Masker("bob@corp.com from 10.0.0.1", profile="mail")
+        self.assertEqual(masker.masked_data, "<EmailMask_1> from 10.0.0.1")
+        registry.remove_profile("mail")
+        self.assertNotIn("mail", registry.profiles())
+        with self.assertRaises(ValueError):
+            registry.resolve("mail")
@@ -0,0 +1,49 @@
+"""
+"""
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from masked_ai.core import resources
+
+HEAVY_MODULES = ("nltk", "english_words", "torch", "transformers")
+
+
+class ResourcesTests(unittest.TestCase):
+    """
+    """
+
+    def test_import_time(self) -> None:
+        """Importing the package must not load any heavy resource, measured with `python -X importtime`
+        """
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import masked_ai.masker"],
+            capture_output=True, text=True, check=True,
+        )
+        imported = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                imported[name.strip()] = int(cumulative)
+        self.assertIn("masked_ai.masker", imported)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported)
+        # generous bound, the point is to catch a heavy import sneaking back in
+        self.assertLess(imported["masked_ai.masker"], 1_000_000)
+
+    def test_offline_fails_fast(self) -> None:
+        import nltk
+
+        resources.set_offline(True)
+        try:
+            with mock.patch.object(resources, "_nltk", None), \
+                    mock.patch.object(nltk.data, "find", side_effect=LookupError), \
+                    mock.patch.object(nltk, "download") as download:
+                with self.assertRaises(LookupError):
+                    resources.nltk()
+                download.assert_not_called()
+        finally:
+            resources.set_offline(None)
@@ -0,0 +1,83 @@
+"""
+"""
+import unittest
+
+from masked_ai.core.masks import (
+    IPMask,
+    LinkMask,
+    CreditCardMask,
+    EmailMask,
+    PhoneMask,
+    SerialNumMask,
+)
+from masked_ai.core.scanner import Scanner, get_scanner
+
+
+class ScannerTests(unittest.TestCase):
+    """
+    """
+
+    def setUp(self) -> None:
+        self.scanner = Scanner([IPMask, LinkMask, SerialNumMask, PhoneMask, EmailMask, CreditCardMask])
+
+    def test_typed_spans(self) -> None:
+        data = "host 10.0.0.1 mailed bob@corp.com about 4012-8888-8882-1881"
+        spans = list(self.scanner.scan(data))
+        self.assertEqual([span.label for span in spans], ["IPMask", "EmailMask", "CreditCardMask"])
+        self.assertEqual([data[span.start:span.end] for span in spans], ["10.0.0.1", "bob@corp.com", "4012-8888-8882-1881"])
+
+    def test_same_as_find(self) -> None:
+        data = "The user clicked on https://www.google.com from 172.217.22.14 and 127.0.0.1"
+        found = self.scanner.find_all(data)
+        self.assertEqual(found["IPMask"], IPMask.find(data))
+        self.assertEqual(found["LinkMask"], LinkMask.find(data))
+
+    def test_priority_follows_masks_order(self) -> None:
+        data = "resolved 10.0.0.1.com today"
+        found = Scanner([IPMask, LinkMask]).find_all(data)
+        self.assertEqual(found["IPMask"], ["10.0.0.1"])
+        self.assertEqual(found["LinkMask"], [])
+
+        found = Scanner([LinkMask, IPMask]).find_all(data)
+        self.assertEqual(found["LinkMask"], ["10.0.0.1.com"])
+        self.assertEqual(found["IPMask"], [])
+
+    def test_hit_starting_first_wins(self) -> None:
+        # LinkMask is before EmailMask, but the email starts first and is masked whole
+        data = "mail john@example.com now"
+        found = self.scanner.find_all(data)
+        self.assertEqual(found["EmailMask"], ["john@example.com"])
+        self.assertEqual(found["LinkMask"], [])
+
+    def test_shared_detection_is_classified(self) -> None:
+        data = "call me on 555 123 4567 about serial 555 123 4568 please"
+        found = self.scanner.find_all(data)
+        self.assertEqual(found["PhoneMask"], ["555 123 4567"])
+        self.assertEqual(found["SerialNumMask"], ["555 123 4568"])
+        # a single group for both masks
+        self.assertEqual(self.scanner.regex.pattern.count("(?P<"), 5)  # type: ignore[union-attr]
+
+    def test_classified_to_a_missing_mask(self) -> None:
+        data = "call me on 555 123 4567 about serial 555 123 4568 please"
+        self.assertEqual(Scanner([PhoneMask]).find_all(data), {"PhoneMask": ["555 123 4567", "555 123 4568"]})
+        self.assertEqual(Scanner([SerialNumMask]).find_all(data), {"SerialNumMask": ["555 123 4567", "555 123 4568"]})
+
+    def test_bytes_same_as_str(self) -> None:
+        data = "née à 10.0.0.1, “https://exämple.com/été” call 555 123 4567 mail bob@corp.com"
+        encoded = data.encode("utf-8")
+        spans = list(self.scanner.scan_bytes(encoded))
+        self.assertEqual(
+            [(span.label, encoded[span.start:span.end].decode()) for span in spans],
+            [(span.label, data[span.start:span.end]) for span in self.scanner.scan(data)],
+        )
+        self.assertEqual(list(self.scanner.scan_bytes(encoded, 0, encoded.index(b"call"))), spans[:2])
+
+    def test_case_insensitive_mask(self) -> None:
+        found = self.scanner.find_all("The user clicked on WWW.GOOGLE.COM")
+        self.assertEqual(found["LinkMask"], ["WWW.GOOGLE.COM"])
+
+    def test_no_masks(self) -> None:
+        self.assertEqual(list(Scanner([]).scan("127.0.0.1")), [])
+
+    def test_cached(self) -> None:
+        self.assertIs(get_scanner((IPMask, EmailMask)), get_scanner((IPMask, EmailMask)))
@@ -0,0 +1,52 @@
+"""
+"""
+import unittest
+from typing import List
+
+from masked_ai.core import stats
+from masked_ai.core.stats import MaskerStats, PrometheusCollector, format_stats
+from masked_ai.masker import Masker
+
+# NLTK and the NER model are not needed for these
+SKIP = ["NamesMask", "NERNamesMASK"]
+
+DATA = "ping 10.0.0.1 and 10.0.0.1, mail bob@corp.com, serial 555 123 4567\nnext"
+
+
+class StatsTests(unittest.TestCase):
+    """
+    """
+
+    def test_off_by_default(self) -> None:
+        self.assertIsNone(Masker(DATA, skip=SKIP).get_stats())
+
+    def test_counts_and_stages(self) -> None:
+        result = Masker(DATA, skip=SKIP, instrument=True).get_stats()
+        assert result is not None
+        self.assertEqual(result.size, len(DATA))
+        self.assertEqual(set(result.stages), {"prefilter", "scanner", "overlaps", "substitution"})
+        masks = {mask.name: mask for mask in result.masks}
+        self.assertNotIn("NamesMask", masks)
+        self.assertEqual((masks["IPMask"].candidates, masks["IPMask"].accepted, masks["IPMask"].kept), (2, 2, 2))
+        self.assertEqual(masks["EmailMask"].kept, 1)
+        # "555 123 4567" is followed by a newline, the serial number filter rejects it
+        self.assertEqual((masks["SerialNumMask"].candidates, masks["SerialNumMask"].accepted), (1, 0))
+        self.assertIn("IPMask", format_stats(result))
+
+    def test_hooks(self) -> None:
+        received: List[MaskerStats] = []
+        collector = PrometheusCollector()
+        stats.subscribe(received.append)
+        stats.subscribe(collector)
+        try:
+            masker = Masker(DATA, skip=SKIP)
+            Masker(DATA, skip=SKIP)
+        finally:
+            stats.unsubscribe(received.append)
+            stats.unsubscribe(collector)
+        self.assertEqual(len(received), 2)
+        self.assertIs(received[0], masker.get_stats())
+        text = collector.render()
+        self.assertIn("masked_ai_documents_total 2", text)
+        self.assertIn('masked_ai_mask_hits_total{mask="IPMask",step="kept"} 4', text)
+        self.assertIsNone(Masker(DATA, skip=SKIP).get_stats())
@@ -0,0 +1,73 @@
+"""
+"""
+import unittest
+
+from masked_ai.core.masks import Span
+from masked_ai.core.substitution import CompactOffsets, CompactPlaceholders, settle_overlaps, substitute, unmask
+from masked_ai.masker import Masker
+
+
+class SubstitutionTests(unittest.TestCase):
+    """
+    """
+
+    def test_earlier_group_wins(self) -> None:
+        first = [Span(5, 10, "A")]
+        second = [Span(0, 6, "B"), Span(8, 12, "B"), Span(10, 12, "B")]
+        self.assertEqual(settle_overlaps([first, second]), [Span(5, 10, "A"), Span(10, 12, "B")])
+
+    def test_substitute(self) -> None:
+        data = "from 10.0.0.1 to 10.0.0.2 and back to 10.0.0.1"
+        spans = [Span(5, 13, "IPMask"), Span(17, 25, "IPMask"), Span(38, 46, "IPMask")]
+        masked, lookup, offsets = substitute(data, spans)
+        self.assertEqual(masked, "from <IPMask_1> to <IPMask_2> and back to <IPMask_1>")
+        self.assertEqual(lookup, {"<IPMask_1>": "10.0.0.1", "<IPMask_2>": "10.0.0.2"})
+        for masked_start, masked_end, start, end in offsets:
+            self.assertEqual(lookup[masked[masked_start:masked_end]], data[start:end])
+
+    def test_unmask(self) -> None:
+        lookup = {"<IPMask_1>": "10.0.0.1", "<PersonMASK_2>": "Adam"}
+        self.assertEqual(unmask("<PersonMASK_2> uses <IPMask_1>, not <IPMask_3>", lookup), "Adam uses 10.0.0.1, not <IPMask_3>")
+
+    def test_compact_same_as_plain(self) -> None:
+        data = "from 10.0.0.1 to 10.0.0.2 and back to 10.0.0.1 by bob@corp.com"
+        spans = [Span(5, 13, "IPMask"), Span(17, 25, "IPMask"), Span(38, 46, "IPMask"), Span(50, 62, "EmailMask")]
+        plain = substitute(data, spans)
+        masked, lookup, offsets = substitute(data, spans, CompactPlaceholders(data))
+        self.assertEqual(masked, plain[0])
+        self.assertEqual(dict(lookup), plain[1])
+        self.assertEqual(list(offsets), plain[2])
+        self.assertEqual(len(lookup), 3)
+        self.assertIsNone(lookup.get("<IPMask_3>"))
+        self.assertIsNone(lookup.get("IPMask_1"))
+        self.assertEqual(unmask(masked, lookup), data)
+
+    def test_compact_hash_collision(self) -> None:
+        data = "aaa bbb aaa bbb"
+        placeholders = CompactPlaceholders(data)
+        self.assertEqual(placeholders.placeholder_at(data, 0, 3, "A"), "<A_1>")
+        # "bbb" as if its hash was the one of "aaa"
+        placeholders._values["A"].numbers[hash("bbb")] = 1
+        self.assertEqual(placeholders.placeholder_at(data, 4, 7, "A"), "<A_2>")
+        self.assertEqual(placeholders.placeholder_at(data, 12, 15, "A"), "<A_2>")
+        self.assertEqual(placeholders.placeholder_at(data, 8, 11, "A"), "<A_1>")
+        self.assertEqual(placeholders.placeholder("A", "bbb"), "<A_2>")
+        with self.assertRaises(ValueError):
+            placeholders.placeholder("A", "ccc")
+
+    def test_compact_offsets(self) -> None:
+        offsets = CompactOffsets()
+        offsets.append((1, 2, 3, 4))
+        offsets.append((5, 6, 7, 8))
+        self.assertEqual(offsets[-1], (5, 6, 7, 8))
+        self.assertEqual(offsets[0:1], [(1, 2, 3, 4)])
+        with self.assertRaises(IndexError):
+            offsets[2]
+
+    def test_compact_masker(self) -> None:
+        data = "host 10.0.0.1 mailed bob@corp.com from 10.0.0.1"
+        skip = ["NamesMask", "NERNamesMASK"]
+        plain, compact = Masker(data, skip=skip), Masker(data, skip=skip, compact=True)
+        self.assertEqual(compact.masked_data, plain.masked_data)
+        self.assertEqual(dict(compact.get_lookup()), plain.get_lookup())
+        self.assertEqual(compact.unmask_data(compact.masked_data), data)
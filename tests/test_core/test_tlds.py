@@ -0,0 +1,49 @@
+"""
+"""
+import os
+import re
+import tempfile
+import unittest
+
+from masked_ai.core import tlds
+from masked_ai.core.masks import LinkMask
+from masked_ai.masker import Masker
+
+# NLTK and the NER model are not needed for these
+SKIP = ["NamesMask", "NERNamesMASK"]
+
+
+class TldsTests(unittest.TestCase):
+    """
+    """
+
+    def tearDown(self) -> None:
+        tlds.set_tlds(tlds.TLDS)
+
+    def test_trie_prefers_longest(self) -> None:
+        words = ["com", "community", "co", "net", "ne", "a-b"]
+        regex = re.compile(tlds.trie_pattern(words))
+        self.assertEqual(tlds.trie_pattern(words), r"(?:a\-b|co(?:m(?:munity)?)?|net?)")
+        for word in words:
+            self.assertEqual(regex.match(word).group(), word)  # type: ignore[union-attr]
+        self.assertEqual(regex.match("comm").group(), "com")  # type: ignore[union-attr]
+
+    def test_same_hits_as_alternation(self) -> None:
+        data = "see https://wiki.operator.com/xy, www.foo.community. xhttps://a.io Mail.Google.COM foo.comx.org x.co1"
+        self.assertEqual(LinkMask.find(data), ["https://wiki.operator.com/xy", "www.foo.com", "https://a.io", "Mail.Google.COM", "foo.comx.org", "x.co"])
+
+    def test_dotted_strings(self) -> None:
+        data = ".".join("ab" for _ in range(2000)) + " then operator.net"
+        self.assertEqual(LinkMask.find(data), ["operator.net"])
+
+    def test_public_suffix_list(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "public_suffix_list.dat")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("// ===BEGIN ICANN DOMAINS===\ncom\nco.uk\n*.ck\n!www.ck\n\n// comment\nмон\ntelecom\n")
+            found = tlds.read_public_suffix_list(path)
+        self.assertEqual(found, ["xn--l1acc", "telecom", "com", "ck", "uk"])
+
+        tlds.set_tlds(found)
+        self.assertEqual(Masker("go to status.operator.telecom now", skip=SKIP).masked_data, "go to <LinkMask_1> now")
+        self.assertEqual(Masker("go to status.operator.io now", skip=SKIP).masked_data, "go to status.operator.io now")
@@ -0,0 +1,88 @@
+"""
+"""
+import os
+import tempfile
+import unittest
+
+from masked_ai.core.vault import SQLiteStore, Vault
+from masked_ai.masker import Masker
+
+# NLTK and the NER model are not needed for these
+SKIP = ["NamesMask", "NERNamesMASK"]
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class VaultTests(unittest.TestCase):
+    """
+    """
+
+    def test_stable_across_maskers(self) -> None:
+        vault = Vault()
+        first = Masker("ping 10.0.0.1", skip=SKIP, placeholders=vault)
+        second = Masker("from 10.0.0.2 to 10.0.0.1", skip=SKIP, placeholders=vault)
+        self.assertEqual(first.masked_data, "ping <IPMask_1>")
+        self.assertEqual(second.masked_data, "from <IPMask_2> to <IPMask_1>")
+        # every masker keeps the lookup of its own placeholders
+        self.assertEqual(second.get_lookup(), {"<IPMask_1>": "10.0.0.1", "<IPMask_2>": "10.0.0.2"})
+        self.assertEqual(vault.unmask("<IPMask_2> and <IPMask_1>"), "10.0.0.2 and 10.0.0.1")
+        self.assertEqual(vault.stats().hits, 1)
+        self.assertEqual(vault.stats().misses, 2)
+
+    def test_lru_eviction(self) -> None:
+        vault = Vault(max_size=2)
+        a = vault.placeholder("IPMask", "10.0.0.1")
+        vault.placeholder("IPMask", "10.0.0.2")
+        vault.placeholder("IPMask", "10.0.0.1")
+        vault.placeholder("IPMask", "10.0.0.3")
+        self.assertEqual(vault.value(a), "10.0.0.1")
+        self.assertIsNone(vault.value("<IPMask_2>"))
+        # numbers are never reused, an evicted placeholder can't point to another value
+        self.assertEqual(vault.placeholder("IPMask", "10.0.0.2"), "<IPMask_4>")
+        self.assertEqual(vault.stats().evictions, 2)
+        self.assertEqual(len(vault), 2)
+
+    def test_ttl(self) -> None:
+        clock = Clock()
+        vault = Vault(ttl=60, clock=clock)
+        placeholder = vault.placeholder("EmailMask", "bob@corp.com")
+        clock.now += 30
+        self.assertEqual(vault.placeholder("EmailMask", "bob@corp.com"), placeholder)
+        clock.now += 31
+        self.assertIsNone(vault.value(placeholder))
+        self.assertEqual(vault.unmask(placeholder), placeholder)
+        self.assertEqual(vault.placeholder("EmailMask", "bob@corp.com"), "<EmailMask_2>")
+        self.assertEqual(vault.stats().expirations, 1)
+
+    def test_sqlite_store_survives_restart(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "vault.db")
+            vault = Vault(max_size=1, store=SQLiteStore(path))
+            first = vault.placeholder("IPMask", "10.0.0.1")
+            second = vault.placeholder("IPMask", "10.0.0.2")
+            # evicted from memory, read back from the store
+            self.assertEqual(vault.placeholder("IPMask", "10.0.0.1"), first)
+            vault.close()
+
+            vault = Vault(store=SQLiteStore(path))
+            self.assertEqual(vault.value(second), "10.0.0.2")
+            self.assertEqual(vault.placeholder("IPMask", "10.0.0.1"), first)
+            self.assertEqual(vault.placeholder("IPMask", "10.0.0.3"), "<IPMask_3>")
+            vault.close()
+
+    def test_sqlite_store_ttl(self) -> None:
+        clock = Clock()
+        vault = Vault(max_size=1, ttl=60, store=SQLiteStore(":memory:"), clock=clock)
+        placeholder = vault.placeholder("IPMask", "10.0.0.1")
+        vault.placeholder("IPMask", "10.0.0.2")
+        clock.now += 61
+        self.assertIsNone(vault.value(placeholder))
+        vault.purge()
+        self.assertEqual(vault.placeholder("IPMask", "10.0.0.1"), "<IPMask_3>")
+        vault.close()
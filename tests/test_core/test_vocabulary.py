@@ -0,0 +1,42 @@
+"""
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from masked_ai.core import masks, vocabulary
+
+
+class VocabularyTests(unittest.TestCase):
+    """
+    """
+
+    def test_case_folded(self) -> None:
+        self.assertTrue(vocabulary.is_allowed("netact"))
+        self.assertTrue(vocabulary.is_allowed("ALARM"))
+        self.assertFalse(vocabulary.is_allowed("Zuckerberg"))
+
+    def test_immutable_and_shared(self) -> None:
+        self.assertIsInstance(vocabulary.allowed_names(), frozenset)
+        self.assertIs(vocabulary.allowed_names(), vocabulary.allowed_names())
+        self.assertIs(masks.__allowed_names__, vocabulary.allowed_names())
+
+    def test_add_vocabulary(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "words.txt")
+            with open(path, "w") as f:
+                f.write("# extra words\nGrafana\n\nKubectl\n")
+            self.assertEqual(vocabulary.read_vocabulary(path), ["Grafana", "Kubectl"])
+            self.assertFalse(vocabulary.is_allowed("grafana"))
+            vocabulary.add_vocabulary(path)
+        self.assertTrue(vocabulary.is_allowed("grafana"))
+        self.assertTrue(vocabulary.is_allowed("KUBECTL"))
+
+    def test_cached_dictionary(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.dict(os.environ, {vocabulary.CACHE_ENV: tmp}):
+                names = vocabulary.build_allowed_names()
+                self.assertTrue(os.path.exists(vocabulary.cache_path()))
+                with mock.patch("english_words.get_english_words_set", side_effect=AssertionError):
+                    self.assertEqual(vocabulary.build_allowed_names(), names)
@@ -0,0 +1,91 @@
+"""
+"""
+import io
+import os
+import re
+import tempfile
+import unittest
+from typing import List
+
+from masked_ai.core import registry
+from masked_ai.core.registry import Pipeline
+from masked_ai.core.substitution import unmask
+from masked_ai.files import FileMasker, mask_path
+from masked_ai.masker import Masker
+
+
+def tag_zuckerberg(data: str) -> List[dict]:
+    """Stands in for the NER pipeline, tags every "Zuckerberg" as a person
+    """
+    return [
+        {'entity': 'LABEL_3', 'score': 0.99, 'word': 'Zuckerberg', 'start': m.start(), 'end': m.end()}
+        for m in re.finditer("Zuckerberg", data)
+    ]
+
+
+class FileMaskerTests(unittest.TestCase):
+    """
+    """
+
+    def setUp(self) -> None:
+        lines = []
+        for i in range(300):
+            lines.append(
+                f"{i:04d} café eNB 10.0.{i % 7}.{i % 13} → noc{i % 5}@operator.com “https://operator{i % 3}.com/alarms” "
+                f"ticket 555 {i % 10:03d} 4567 card 4012888888881881 "
+            )
+        self.data = "\n".join(lines)
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self.data)
+
+    def tearDown(self) -> None:
+        os.remove(self.path)
+
+    def mask(self, masker: FileMasker) -> str:
+        output = io.BytesIO()
+        self.assertEqual(masker.mask_path(self.path, output), len(self.data.encode("utf-8")))
+        return output.getvalue().decode("utf-8")
+
+    def test_same_as_masker(self) -> None:
+        pipeline = registry.pipeline("fast-regex-only")
+        whole = Masker(self.data, pipeline=pipeline)
+        for segment_size in (300, 4096, 1 << 20):
+            masker = FileMasker(pipeline=pipeline, segment_size=segment_size)
+            self.assertEqual(self.mask(masker), whole.masked_data)
+            self.assertEqual(dict(masker.get_lookup()), dict(whole.get_lookup()))
+
+    def test_decoded_masks_use_byte_offsets(self) -> None:
+        self.data = self.data.replace("eNB", "Zuckerberg")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(self.data)
+        # NLTK corpora are not needed
+        pipeline = Pipeline([mask for mask in registry.resolve() if mask.__name__ != "NamesMask"], pipel=tag_zuckerberg)
+        whole = Masker(self.data, pipeline=pipeline)
+        self.assertIn("<PersonMASK_1>", whole.masked_data)
+        masker = FileMasker(pipeline=pipeline, segment_size=4096)
+        self.assertEqual(self.mask(masker), whole.masked_data)
+
+    def test_output_path_and_lookup(self) -> None:
+        output = self.path + ".masked"
+        try:
+            lookup = mask_path(self.path, output, profile="fast-regex-only")
+            with open(output, encoding="utf-8") as f:
+                masked = f.read()
+        finally:
+            os.remove(output)
+        self.assertNotIn("10.0.1.1", masked)
+        self.assertEqual(unmask(masked, lookup), self.data)
+        self.assertEqual(lookup["<EmailMask_1>"], "noc0@operator.com")
+
+    def test_empty_file(self) -> None:
+        self.data = ""
+        with open(self.path, "w"):
+            pass
+        masker = FileMasker(profile="fast-regex-only")
+        self.assertEqual(self.mask(masker), "")
+        self.assertEqual(len(masker.get_lookup()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,4 +16,62 @@
 # generated_text = response.choices[0].text
 # print('Raw response: ', response)
 # unmasked = masker.unmask_data(generated_text)
-# print('Result:', unmasked)
\ No newline at end of file
+# print('Result:', unmasked)
+
+import unittest
+from typing import Any, List
+
+from masked_ai.core import models
+from masked_ai.masker import Masker
+
+# NLTK corpora are not needed for these
+SKIP = ["NamesMask"]
+
+
+class FakePipeline:
+    """Stands in for a transformers token classification pipeline, tags "Zuckerberg" as a person
+    """
+    def __init__(self) -> None:
+        self.calls: List[Any] = []
+
+    def tag(self, data: str) -> List[dict]:
+        start = data.find("Zuckerberg")
+        if start == -1:
+            return []
+        return [{'entity': 'LABEL_3', 'score': 0.99, 'word': 'Zuckerberg', 'start': start, 'end': start + 10}]
+
+    def __call__(self, data: Any, batch_size: int = 1) -> Any:
+        self.calls.append((data, batch_size))
+        if isinstance(data, list):
+            return [self.tag(x) for x in data]
+        return self.tag(data)
+
+
+class MaskerTests(unittest.TestCase):
+    """
+    """
+
+    def setUp(self) -> None:
+        self.pipeline = FakePipeline()
+        models.registry.register(self.pipeline)
+
+    def tearDown(self) -> None:
+        models.registry.evict()
+
+    def test_mask_and_unmask(self) -> None:
+        data = "User Zuckerberg logged in from 10.0.0.1 and mailed bob@corp.com from 10.0.0.1 "
+        masker = Masker(data, skip=SKIP)
+        self.assertEqual(masker.masked_data, "User <PersonMASK_1> logged in from <IPMask_1> and mailed <EmailMask_1> from <IPMask_1> ")
+        self.assertEqual(masker.get_lookup(), {"<PersonMASK_1>": "Zuckerberg", "<IPMask_1>": "10.0.0.1", "<EmailMask_1>": "bob@corp.com"})
+        self.assertEqual(masker.unmask_data(masker.masked_data), data)
+
+    def test_values_are_masked_whole(self) -> None:
+        # the sequential masks gave "mail john@<LinkMask_1> now", LinkMask running before EmailMask
+        masker = Masker("mail john@example.com now", profile="fast-regex-only")
+        self.assertEqual(masker.masked_data, "mail <EmailMask_1> now")
+
+    def test_mask_many_batches(self) -> None:
+        texts = ["Hi Zuckerberg, all good", "from 10.0.0.1", "ping Zuckerberg now"]
+        maskers = Masker.mask_many(texts, skip=SKIP, batch_size=2)
+        self.assertEqual([masker.masked_data for masker in maskers], ["Hi <PersonMASK_1>, all good", "from <IPMask_1>", "ping <PersonMASK_1> now"])
+        self.assertEqual(self.pipeline.calls, [(texts, 2)])
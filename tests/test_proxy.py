@@ -0,0 +1,216 @@
+"""
+"""
+import http.client
+import json
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from masked_ai.core.vault import Vault
+from masked_ai.proxy import ConnectionPool, EventStream, MaskingProxy, mask_payload, unmask_payload
+
+# NLTK and the NER model are not needed for these
+SKIP = ["NamesMask", "NERNamesMASK"]
+
+
+class Upstream(BaseHTTPRequestHandler):
+    """Stands in for the LLM API, answers with the prompt it received
+    """
+    protocol_version = "HTTP/1.1"
+    received: List[Any] = []
+    connections: set = set()
+
+    def do_POST(self) -> None:
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        Upstream.received.append(payload)
+        Upstream.connections.add(self.client_address)
+        prompt = payload.get("prompt") or payload["messages"][-1]["content"]
+        if payload.get("stream"):
+            self.stream(f"You said \"{prompt}\"")
+            return
+        data = json.dumps({"choices": [{"text": f"You said \"{prompt}\""}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def stream(self, text: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # three characters per event, so the placeholders are cut
+        for i in range(0, len(text), 3):
+            event = {"choices": [{"index": 0, "delta": {"content": text[i:i + 3]}, "finish_reason": None}]}
+            self.send_chunk(f"data: {json.dumps(event)}\n\n".encode())
+        self.send_chunk(b"data: [DONE]\n\n")
+        self.send_chunk(b"")
+
+    def send_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class ProxyTests(unittest.TestCase):
+    """
+    """
+
+    def setUp(self) -> None:
+        Upstream.received = []
+        Upstream.connections = set()
+        self.upstream = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+        threading.Thread(target=self.upstream.serve_forever, daemon=True).start()
+        self.proxy = MaskingProxy(f"http://127.0.0.1:{self.upstream.server_address[1]}", skip=SKIP, pool_size=2)
+        self.server = self.proxy.server("127.0.0.1", 0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.proxy.pool.close()
+        self.upstream.shutdown()
+        self.upstream.server_close()
+
+    def test_profile_per_route(self) -> None:
+        proxy = MaskingProxy("http://127.0.0.1:1", skip=SKIP, routes={"/v1/embeddings": "fast-regex-only", "/v1/embeddings/large": "no-ner"})
+        self.assertEqual(proxy.pipeline_for("/v1/completions").name, "default")
+        self.assertEqual(proxy.pipeline_for("/v1/embeddings").name, "fast-regex-only")
+        self.assertEqual(proxy.pipeline_for("/v1/embeddings/large").name, "no-ner")
+
+    def post(self, payload: dict) -> Any:
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1])
+        connection.request("POST", "/v1/completions", body=json.dumps(payload), headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        self.assertEqual(response.status, 200)
+        data = json.loads(response.read())
+        connection.close()
+        return data
+
+    def test_masked_upstream_unmasked_back(self) -> None:
+        prompt = "why is \"10.0.0.1\" down, ask bob@corp.com"
+        data = self.post({"model": "x", "prompt": prompt})
+        self.assertEqual(Upstream.received[0]["prompt"], "why is \"<IPMask_1>\" down, ask <EmailMask_1>")
+        self.assertEqual(data["choices"][0]["text"], f"You said \"{prompt}\"")
+
+    def test_upstream_connections_are_reused(self) -> None:
+        for i in range(5):
+            self.post({"model": "x", "messages": [{"role": "user", "content": f"ping 10.0.0.{i}"}]})
+        self.assertEqual(len(Upstream.received), 5)
+        self.assertEqual(len(Upstream.connections), 1)
+
+    def test_streamed_response(self) -> None:
+        prompt = "why is 10.0.0.1 down, ask bob@corp.com"
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1])
+        connection.request("POST", "/v1/chat/completions", body=json.dumps({"stream": True, "messages": [{"role": "user", "content": prompt}]}), headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        text = ""
+        for line in response.read().decode().splitlines():
+            if line.startswith("data:") and line != "data: [DONE]":
+                text += json.loads(line[5:])["choices"][0]["delta"]["content"]
+        connection.close()
+        self.assertEqual(text, f"You said \"{prompt}\"")
+        # the upstream connection is back in the pool
+        self.post({"model": "x", "prompt": "ping"})
+        self.assertEqual(len(Upstream.connections), 1)
+
+    def test_unstarted_stream_released(self) -> None:
+        proxy = MaskingProxy(f"http://127.0.0.1:{self.upstream.server_address[1]}", skip=SKIP, max_concurrency=1, timeout=1.0)
+        body = json.dumps({"stream": True, "messages": [{"role": "user", "content": "ping 10.0.0.1"}]}).encode()
+        headers = {"Content-Type": "application/json"}
+        try:
+            status, _, data = proxy.handle("POST", "/v1/chat/completions", headers, body)
+            self.assertIsInstance(data, EventStream)
+            # closed without reading a single chunk, i.e. the client is gone
+            data.close()  # type: ignore[union-attr]
+            status, _, data = proxy.handle("POST", "/v1/chat/completions", headers, body)
+            self.assertEqual(status, 200)
+            assert isinstance(data, EventStream)
+            self.assertIn(b"[DONE]", b"".join(data))
+        finally:
+            proxy.pool.close()
+
+    def test_one_lookup_per_request(self) -> None:
+        payload: Dict[str, Any] = {"messages": [{"role": "system", "content": "host 10.0.0.1"}, {"role": "user", "content": [{"type": "text", "text": "is 10.0.0.1 up?"}]}]}
+        lookup = mask_payload(payload, skip=SKIP)
+        self.assertEqual(payload["messages"][0]["content"], "host <IPMask_1>")
+        self.assertEqual(payload["messages"][1]["content"][0]["text"], "is <IPMask_1> up?")
+        self.assertEqual(unmask_payload(payload, lookup)["messages"][0]["content"], "host 10.0.0.1")
+
+    def test_embeddings_input(self) -> None:
+        for value, masked in (
+            ("host 10.0.0.1", "host <IPMask_1>"),
+            (["host 10.0.0.1", "mail bob@corp.com"], ["host <IPMask_1>", "mail <EmailMask_1>"]),
+            ([[1, 2, 3]], [[1, 2, 3]]),
+        ):
+            payload: Dict[str, Any] = {"model": "x", "input": value}
+            lookup = mask_payload(payload, skip=SKIP)
+            self.assertEqual(payload["input"], masked)
+            self.assertEqual(unmask_payload(payload, lookup)["input"], value)
+
+    def test_vault_across_requests(self) -> None:
+        self.proxy.vault = Vault()
+        self.post({"model": "x", "prompt": "ping 10.0.0.1"})
+        data = self.post({"model": "x", "prompt": "ping 10.0.0.2 then 10.0.0.1"})
+        self.assertEqual(Upstream.received[1]["prompt"], "ping <IPMask_2> then <IPMask_1>")
+        self.assertEqual(data["choices"][0]["text"], "You said \"ping 10.0.0.2 then 10.0.0.1\"")
+
+
+class FakeConnection:
+    """Fails the first response with ``error``, if any
+    """
+    def __init__(self, error: Optional[BaseException] = None) -> None:
+        self.error = error
+        self.closed = False
+
+    def request(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def getresponse(self) -> str:
+        if self.error is not None:
+            raise self.error
+        return "response"
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    """
+    """
+
+    def setUp(self) -> None:
+        self.pool = ConnectionPool("http://127.0.0.1:1")
+        self.connected: List[FakeConnection] = []
+
+        def connect() -> FakeConnection:
+            self.connected.append(FakeConnection())
+            return self.connected[-1]
+        self.pool._connect = connect  # type: ignore[assignment]
+
+    def send(self, error: BaseException) -> Any:
+        stale = FakeConnection(error)
+        self.pool._idle.put(stale)  # type: ignore[arg-type]
+        try:
+            return self.pool._send("POST", "/v1/completions", b"{}", {})
+        finally:
+            self.assertTrue(stale.closed)
+
+    def test_stale_connection_is_retried(self) -> None:
+        for error in (http.client.RemoteDisconnected(""), ConnectionResetError(), BrokenPipeError()):
+            self.connected = []
+            connection, response = self.send(error)
+            self.assertEqual(response, "response")
+            self.assertEqual(len(self.connected), 1)
+            self.assertIs(connection, self.connected[0])
+
+    def test_timeout_is_not_retried(self) -> None:
+        for error in (socket.timeout(), TimeoutError(), http.client.IncompleteRead(b"")):
+            with self.assertRaises(type(error)):
+                self.send(error)
+        self.assertEqual(self.connected, [])
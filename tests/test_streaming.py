@@ -0,0 +1,105 @@
+"""
+"""
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from typing import AsyncIterator, List
+
+from masked_ai.masker import Masker
+from masked_ai.streaming import StreamingMasker, StreamingUnmasker, unmask_sse
+
+# NLTK and the NER model are not needed for these
+SKIP = ["NamesMask", "NERNamesMASK"]
+
+
+class StreamingMaskerTests(unittest.TestCase):
+    """
+    """
+
+    def setUp(self) -> None:
+        lines = []
+        for i in range(300):
+            lines.append(f"{i:04d} eNB 10.0.{i % 7}.{i % 13} sent alarm to noc{i % 5}@operator.com see www.operator{i % 3}.com/alarms ")
+        self.data = "\n".join(lines)
+
+    def assert_same_as_masker(self, chunks: list, lookback: int) -> None:
+        streaming = StreamingMasker(skip=SKIP, lookback=lookback)
+        masked = "".join(streaming.mask_stream(chunks))
+        whole = Masker(self.data, skip=SKIP)
+        self.assertEqual(masked, whole.masked_data)
+        self.assertEqual(streaming.get_lookup(), whole.get_lookup())
+        self.assertEqual(streaming.unmask_data(masked), self.data)
+
+    def test_values_across_chunk_boundaries(self) -> None:
+        for size in (7, 64, 1000):
+            chunks = [self.data[i:i + size] for i in range(0, len(self.data), size)]
+            self.assert_same_as_masker(chunks, lookback=128)
+
+    def test_buffer_is_bounded(self) -> None:
+        streaming = StreamingMasker(skip=SKIP, lookback=128)
+        for i in range(0, len(self.data), 50):
+            for _ in streaming.feed(self.data[i:i + 50]):
+                pass
+            self.assertLess(len(streaming._buffer), 2 * 128 + 50)
+
+    def test_feed_without_consuming(self) -> None:
+        streaming = StreamingMasker(skip=SKIP)
+        streaming.feed("host 10.0.0.1 up ")
+        self.assertEqual("".join(streaming.flush()), "host <IPMask_1> up ")
+
+    def test_mask_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "syslog")
+            with open(path, "w") as f:
+                f.write(self.data)
+            streaming = StreamingMasker(skip=SKIP, lookback=256)
+            masked = "".join(streaming.mask_file(path, chunk_size=100))
+        self.assertEqual(masked, Masker(self.data, skip=SKIP).masked_data)
+
+
+class StreamingUnmaskerTests(unittest.TestCase):
+    """
+    """
+
+    def setUp(self) -> None:
+        self.masker = Masker("ping 10.0.0.1 and mail bob@corp.com", skip=SKIP)
+        self.output = "host <IPMask_1> is down, told <EmailMask_1> about <IPMask_1> < 5 min ago <b>"
+        self.expected = "host 10.0.0.1 is down, told bob@corp.com about 10.0.0.1 < 5 min ago <b>"
+
+    def test_placeholders_across_chunk_boundaries(self) -> None:
+        for size in (1, 2, 3, 7):
+            chunks = [self.output[i:i + size] for i in range(0, len(self.output), size)]
+            unmasker = StreamingUnmasker(self.masker.get_lookup())
+            self.assertEqual("".join(unmasker.unmask_stream(chunks)), self.expected)
+
+    def test_only_placeholder_prefixes_are_held_back(self) -> None:
+        unmasker = StreamingUnmasker(self.masker.get_lookup())
+        self.assertEqual(unmasker.feed("host <IPMa"), "host ")
+        self.assertEqual(unmasker.feed("sk_1> is"), "10.0.0.1 is")
+        self.assertEqual(unmasker.feed(" a < b"), " a < b")
+
+    def test_unmask_async(self) -> None:
+        async def deltas() -> AsyncIterator[str]:
+            for i in range(0, len(self.output), 4):
+                yield self.output[i:i + 4]
+
+        async def run() -> str:
+            unmasker = StreamingUnmasker(self.masker.get_lookup())
+            return "".join([chunk async for chunk in unmasker.unmask_async(deltas())])
+
+        self.assertEqual(asyncio.run(run()), self.expected)
+
+    def test_unmask_sse(self) -> None:
+        lines = []
+        for i in range(0, len(self.output), 5):
+            event = {"choices": [{"index": 0, "delta": {"content": self.output[i:i + 5]}, "finish_reason": None}]}
+            lines.append(f"data: {json.dumps(event)}\n\n")
+        lines.append("data: [DONE]\n\n")
+        text = ""
+        events: List[str] = list(unmask_sse(lines, self.masker.get_lookup()))
+        self.assertEqual(events[-1], "data: [DONE]\n\n")
+        for line in events[:-1]:
+            text += json.loads(line[5:])["choices"][0]["delta"]["content"]
+        self.assertEqual(text, self.expected)